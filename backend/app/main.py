@@ -1,29 +1,67 @@
+import asyncio
 import os
 
-import redis.asyncio as redis
 import uvicorn
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.concurrency import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_limiter import FastAPILimiter
 
 from app.routes.scraper_routes import router as scraper_router
 from app.routes.search import router as search
 from app.routes.chat import router as chat_router
+from app.routes.map import router as map_router
+from app.routes.projects import router as projects_router
+from app.routes.suggest import router as suggest_router
+from app.services.admission import admission
+from app.services.chat import llm
+from app.services.corpus.refresh import CORPUS_REFRESH_SECONDS, refresh_loop
+from app.services.db import supa_base_client, vector_store
+from app.services.embedder import embedder
+from app.services.search.corpus import get_corpus
 
 load_dotenv()
 REDIS_URL = os.getenv("REDIS_URL")
+# create the SDK clients and open their connections in the background once the app is up
+CLIENT_WARMUP = os.getenv("CLIENT_WARMUP", "true").lower() == "true"
 
 
-# @asynccontextmanager
-# async def lifespan(app: FastAPI):
-#     redis_conn = await redis.from_url(
-#         REDIS_URL, encoding="utf-8", decode_responses=True
-#     )
-#     await FastAPILimiter.init(redis_conn)
-#     yield
-#     await redis_conn.close()
+def warm_up_clients() -> None:
+    """Build the Supabase, vector store, OpenAI and Gemini clients ahead of the first request; failures only log."""
+    for name, warm_up in [
+        ("Supabase", supa_base_client.warm_up),
+        ("Vector store", vector_store.warm_up),
+        ("OpenAI", embedder.warm_up),
+        ("Gemini", llm.warm_up),
+    ]:
+        try:
+            warm_up()
+        except Exception as e:
+            print(f"Warning: {name} warm-up failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # import redis.asyncio as redis
+    # from fastapi_limiter import FastAPILimiter
+    # redis_conn = await redis.from_url(
+    #     REDIS_URL, encoding="utf-8", decode_responses=True
+    # )
+    # await FastAPILimiter.init(redis_conn)
+    admission.check_config()
+    # load the local snapshot and build the search indexes before taking traffic
+    await asyncio.to_thread(get_corpus)
+    refresh_task = None
+    if CORPUS_REFRESH_SECONDS > 0:
+        refresh_task = asyncio.create_task(refresh_loop(CORPUS_REFRESH_SECONDS))
+    # not awaited: requests are served while the clients warm up (first use creates them anyway)
+    warmup_task = asyncio.create_task(asyncio.to_thread(warm_up_clients)) if CLIENT_WARMUP else None
+    yield
+    if refresh_task:
+        refresh_task.cancel()
+    if warmup_task:
+        warmup_task.cancel()
+    # await redis_conn.close()
 
 
 origins = [
@@ -35,7 +73,7 @@ origins = [
     "https://ideasurf.xyz",
 ]
 
-app = FastAPI()  # type: ignore
+app = FastAPI(lifespan=lifespan)  # type: ignore
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -46,6 +84,9 @@ app.add_middleware(
 app.include_router(scraper_router)
 app.include_router(search)
 app.include_router(chat_router)
+app.include_router(map_router)
+app.include_router(projects_router)
+app.include_router(suggest_router)
 
 
 @app.get("/")
@@ -1,29 +1,26 @@
-import os
-from fastapi import APIRouter
-from pydantic import BaseModel
-from dotenv import load_dotenv
-import google.generativeai as genai
-
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-
-# Configure Gemini
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-
-# Lazy imports to avoid errors if env vars aren't set
-try:
-    from app.services.db.supa_base_client import supa_base_client
-    from app.services.embedder.embedder import embded_query
-    DB_AVAILABLE = True
-except Exception as e:
-    print(f"Warning: Database services not available: {e}")
-    DB_AVAILABLE = False
-    supa_base_client = None
-    embded_query = None
+import uuid
+from typing import Optional
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel, Field
+
+from app.services.admission.admission import admission
+from app.services.chat.cache import get_response_cache, response_key
+from app.services.chat.history import CHAT_CONTEXT_TOKENS, compact_history
+from app.services.chat.llm import GEMINI_API_KEY, chat_model
+from app.services.chat.sessions import get_session_store
+from app.services.db.supa_base_client import supabase_configured
+from app.services.embedder.embedder import embded_query
+from app.services.embedder.text import count_tokens
+from app.services.search.engine import nearest_projects
+
+# clients are created on first use, so a bad configuration shows up as a search error per request
+DB_AVAILABLE = supabase_configured()
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+# Use gemini-2.0-flash (free tier model)
+CHAT_MODEL = "gemini-2.0-flash"
+
 # System instruction for the model
 SYSTEM_INSTRUCTION = """You are a startup consultant with access to a comprehensive vector database (Supabase with pgvector) of all current ideas being pursued by companies. 
 
@@ -48,15 +45,18 @@ class ChatRequest(BaseModel):
     messages: list[ChatMessage]
     search_similar: bool = False  # Flag to trigger similarity search
     idea_query: str = ""  # The idea to search for if search_similar is True
+    diversity: float = Field(0.0, ge=0.0, le=1.0)  # > 0 re-ranks similar ideas with MMR
+    conversation_id: Optional[str] = None  # from the previous response; a new one is issued when missing
 
 
 class ChatResponse(BaseModel):
     message: str
     similar_ideas: list = []  # Similar ideas found in database
+    conversation_id: Optional[str] = None  # send back with the next message to reuse the session and summary
 
 
-@router.post("/", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+@router.post("/", response_model=ChatResponse, dependencies=[Depends(admission("chat"))])
+def chat(request: ChatRequest):
     """Endpoint to chat with Gemini about ideas."""
     if not GEMINI_API_KEY:
         return ChatResponse(
@@ -64,24 +64,33 @@ async def chat(request: ChatRequest):
             similar_ideas=[],
         )
 
+    # the server-side session and history summary are keyed by this id, never by message content
+    conversation_id = request.conversation_id or uuid.uuid4().hex
     try:
+        store = get_session_store()
+        session = store.get(conversation_id) if store is not None else None
+
         # Search for similar ideas if requested
         similar_ideas = []
-        if request.search_similar and request.idea_query:
+        if request.search_similar and request.idea_query.strip():
+            cached_ideas = session.retrieval_for(request.idea_query, request.diversity) if session else None
             if not DB_AVAILABLE:
                 # Don't return error, just continue without search - let Gemini handle it gracefully
                 similar_ideas = []
-            try:
-                embedding = embded_query(request.idea_query)
-                response = supa_base_client.rpc(
-                    "match_projects",
-                    {"query_embedding": embedding, "sources": None},
-                ).execute()
-                similar_ideas = response.data if response.data else []
-                # Limit to top 5 most similar
-                similar_ideas = similar_ideas[:5]
-            except Exception as e:
-                print(f"Error searching for similar ideas: {e}")
+            elif cached_ideas is not None:
+                # follow-up turn about the same idea: no embedding call, no RPC
+                similar_ideas = cached_ideas
+            else:
+                try:
+                    embedding = session.embedding_for(request.idea_query) if session else None
+                    if embedding is None:
+                        embedding = embded_query(request.idea_query)
+                    # Top 5 most similar, spread out over different ideas when diversity is set
+                    similar_ideas = nearest_projects(embedding, k=5, diversity=request.diversity)
+                    if session:
+                        session.set_retrieval(request.idea_query, request.diversity, embedding, similar_ideas)
+                except Exception as e:
+                    print(f"Error searching for similar ideas: {e}")
 
         # Convert messages to Gemini format
         # Gemini uses a different format - we need to combine system instruction with chat history
@@ -99,23 +108,46 @@ async def chat(request: ChatRequest):
                 chat_history.append({"role": "model", "parts": [msg.content]})
 
         if not last_user_message:
-            return ChatResponse(message="Please provide a message to chat.", similar_ideas=[])
+            return ChatResponse(message="Please provide a message to chat.", similar_ideas=[], conversation_id=conversation_id)
+
+        # Build history for chat - need to ensure we have pairs of user/model messages
+        # Remove the last user message from history (we'll send it separately)
+        # History should end with a model response, or be empty
+        history_for_chat = []
+        if len(chat_history) > 1:
+            # Get all messages except the last user message
+            history_for_chat = chat_history[:-1]
+            # Ensure history ends with a model message (if it doesn't, remove the last user message)
+            if history_for_chat and history_for_chat[-1]["role"] == "user":
+                history_for_chat = history_for_chat[:-1]
+        client_history = history_for_chat
+
+        # the session's copy already holds the similar-ideas block from earlier turns
+        matched = session.history_for(client_history) if session else None
+        ideas_in_history = False
+        if matched is not None:
+            history_for_chat, ideas_in_history = matched
+        inline_ideas = bool(similar_ideas) and not ideas_in_history
 
         # Build the message to send to Gemini
         message_to_send = last_user_message
         
         # If we found similar ideas, include them in the context
-        if similar_ideas:
+        if inline_ideas:
             similar_ideas_context = "\n\nHere are similar ideas I found in the database:\n"
             for idx, idea in enumerate(similar_ideas, 1):
                 similarity_score = idea.get("similarity", 0) * 100
-                similar_ideas_context += f"\n{idx}. {idea.get('name', 'Unknown')} (Similarity: {similarity_score:.1f}%)\n"
-                similar_ideas_context += f"   Description: {idea.get('short_description', 'N/A')}\n"
+                entry = f"\n{idx}. {idea.get('name', 'Unknown')} (Similarity: {similarity_score:.1f}%)\n"
+                entry += f"   Description: {idea.get('short_description', 'N/A')}\n"
                 if idea.get("long_description"):
-                    similar_ideas_context += f"   Details: {idea.get('long_description', '')[:200]}...\n"
-                similar_ideas_context += f"   Source: {idea.get('source', 'N/A')}\n"
+                    entry += f"   Details: {idea.get('long_description', '')[:200]}...\n"
+                entry += f"   Source: {idea.get('source', 'N/A')}\n"
                 if idea.get("tags"):
-                    similar_ideas_context += f"   Tags: {', '.join(idea.get('tags', []))}\n"
+                    entry += f"   Tags: {', '.join(idea.get('tags', []))}\n"
+                # keep the context block within its token budget, best matches first
+                if idx > 1 and count_tokens(similar_ideas_context + entry) > CHAT_CONTEXT_TOKENS:
+                    break
+                similar_ideas_context += entry
             
             similar_ideas_context += "\nPlease analyze these similar ideas and tell the user:\n"
             similar_ideas_context += "1. What these companies are doing well\n"
@@ -125,31 +157,58 @@ async def chat(request: ChatRequest):
             message_to_send = f"{last_user_message}\n\n{similar_ideas_context}"
 
         # Initialize the model with system instruction
-        # Use gemini-2.0-flash (free tier model)
-        model = genai.GenerativeModel(
-            model_name="gemini-2.0-flash",
-            system_instruction=SYSTEM_INSTRUCTION,
+        model = chat_model(CHAT_MODEL, SYSTEM_INSTRUCTION)
+
+        def remember(reply: str) -> None:
+            if session:
+                session.record_turn(
+                    history_for_chat
+                    + [{"role": "user", "parts": [message_to_send]}, {"role": "model", "parts": [reply]}],
+                    client_history
+                    + [{"role": "user", "parts": [last_user_message]}, {"role": "model", "parts": [reply]}],
+                    ideas_in_history=ideas_in_history or inline_ideas,
+                )
+                store.trim()
+
+        # identical prompts (same history, message and similar ideas) are answered from the cache
+        cache = get_response_cache()
+        cache_key = response_key(
+            SYSTEM_INSTRUCTION,
+            CHAT_MODEL,
+            history_for_chat,
+            message_to_send,
+            [idea.get("id") for idea in similar_ideas],
+        )
+        cached = cache.get(cache_key) if cache else None
+        if cached is not None:
+            remember(cached)
+            return ChatResponse(message=cached, similar_ideas=similar_ideas, conversation_id=conversation_id)
+
+        # older turns are folded into a cached summary so long sessions stay within the token budget;
+        # the session keeps the uncompacted turns, so the summary is never summarized again
+        compacted = compact_history(
+            history_for_chat,
+            lambda prompt: model.generate_content(prompt).text,
+            conversation_id,
         )
 
-        # Build history for chat - need to ensure we have pairs of user/model messages
-        # Remove the last user message from history (we'll send it separately)
-        # History should end with a model response, or be empty
-        history_for_chat = []
-        if len(chat_history) > 1:
-            # Get all messages except the last user message
-            history_for_chat = chat_history[:-1]
-            # Ensure history ends with a model message (if it doesn't, remove the last user message)
-            if history_for_chat and history_for_chat[-1]["role"] == "user":
-                history_for_chat = history_for_chat[:-1]
-        
-        chat = model.start_chat(history=history_for_chat)
+        chat = model.start_chat(history=compacted)
 
         # Send the message and get response
         response = chat.send_message(message_to_send)
 
-        assistant_message = response.text or "I'm sorry, I couldn't generate a response. Please try again."
-
-        return ChatResponse(message=assistant_message, similar_ideas=similar_ideas)
+        if not response.text:
+            return ChatResponse(
+                message="I'm sorry, I couldn't generate a response. Please try again.",
+                similar_ideas=similar_ideas,
+                conversation_id=conversation_id,
+            )
+        assistant_message = response.text
+        if cache:
+            cache.put(cache_key, assistant_message)
+        remember(assistant_message)
+
+        return ChatResponse(message=assistant_message, similar_ideas=similar_ideas, conversation_id=conversation_id)
     except Exception as e:
-        return ChatResponse(message=f"Error: {str(e)}", similar_ideas=[])
+        return ChatResponse(message=f"Error: {str(e)}", similar_ideas=[], conversation_id=conversation_id)
 
@@ -0,0 +1,71 @@
+import json
+import os
+from typing import Literal
+
+import numpy as np
+import pyarrow as pa
+from fastapi import APIRouter, HTTPException, Query, Response
+
+from app.services.corpus.projection import build_map_table
+from app.services.corpus.snapshot import SNAPSHOT_DIR
+
+router = APIRouter(prefix="/map", tags=["map"])
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# serialized payloads for the current map version, keyed by (dims, format)
+_payloads: dict[tuple[int, str], bytes] = {}
+_payloads_version = None
+
+
+def _map_version():
+    try:
+        return os.stat(os.path.join(SNAPSHOT_DIR, "map", "meta.json")).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _serialize(table: pa.Table, meta: dict, dims: int, format: str) -> bytes:
+    if format == "arrow":
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema.with_metadata({"map_version": str(meta["version"])})) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    columns = {}
+    for name in table.column_names:
+        col = table.column(name)
+        if name in ("x", "y", "z"):
+            columns[name] = np.round(col.to_numpy().astype(np.float64), 4).tolist()
+        else:
+            columns[name] = col.to_pylist()
+    payload = {"version": meta["version"], "dims": dims, "count": table.num_rows, "columns": columns}
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+@router.get("/")
+def embedding_map(
+    dims: int = Query(3, ge=2, le=3, description="2D or 3D coordinates"),
+    format: Literal["json", "arrow"] = Query("json", description="Columnar JSON or an Arrow IPC stream"),
+):
+    """Precomputed coordinates and cluster ids for every project, built by the background corpus job."""
+    global _payloads_version
+    version = _map_version()
+    if version is None:
+        raise HTTPException(status_code=503, detail="Map not built yet, run `python -m app.services.corpus.refresh`")
+
+    if version != _payloads_version:
+        _payloads.clear()
+        _payloads_version = version
+    key = (dims, format)
+    body = _payloads.get(key)
+    if body is None:
+        built = build_map_table(SNAPSHOT_DIR, dims)
+        if built is None:
+            raise HTTPException(status_code=503, detail="Map not built yet")
+        meta, table = built
+        body = _serialize(table, meta, dims, format)
+        _payloads[key] = body
+
+    media_type = ARROW_MEDIA_TYPE if format == "arrow" else "application/json"
+    return Response(content=body, media_type=media_type, headers={"Cache-Control": "public, max-age=300"})
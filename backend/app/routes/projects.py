@@ -0,0 +1,27 @@
+from typing import Literal, Optional
+
+from app.services.search.engine import RESULT_LIMIT, similar_projects
+from fastapi import APIRouter, HTTPException, Query
+
+router = APIRouter(prefix="/projects", tags=["projects"])
+
+
+@router.get("/{project_id}/similar")
+def similar(
+    project_id: int,
+    sources: Optional[list[str]] = Query(
+        None, description="Optional list of sources to filter by"
+    ),
+    tags: Optional[list[str]] = Query(
+        None, description="Optional list of tags to filter by"
+    ),
+    tags_mode: Literal["and", "or"] = Query(
+        "and", description="Require all tags (and) or any tag (or)"
+    ),
+    k: int = Query(RESULT_LIMIT, ge=1, le=100, description="Number of similar projects"),
+):
+    """Endpoint to find projects similar to a stored one, using its stored embedding (no OpenAI call)."""
+    response = similar_projects(project_id, sources or None, tags or None, tags_mode, k)
+    if response is None:
+        raise HTTPException(status_code=404, detail=f"Project {project_id} not found")
+    return response
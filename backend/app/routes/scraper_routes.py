@@ -1,4 +1,3 @@
-from app.services.scraper.yc import run_scrape_yc
 from fastapi import APIRouter
 
 router = APIRouter(prefix="/scraper", tags=["scraper"])
@@ -7,5 +6,8 @@ router = APIRouter(prefix="/scraper", tags=["scraper"])
 @router.post("/yc/")
 async def scrape_yc_batches(batches: list[str]):
     """Endpoint to trigger YC scraper for specified batches. FOR USER - Enter BATCH as LIST OF STRINGS EX ["Fall 2023"]"""
+    # Selenium and the webdriver manager are only needed here, not for the rest of the API
+    from app.services.scraper.yc import run_scrape_yc
+
     run_scrape_yc(batches)
     return {"message": f"Scraping initiated for batches: {batches}"}
@@ -1,31 +1,75 @@
-from typing import Optional
+from typing import Literal, Optional
 
-from app.services.db.supa_base_client import supa_base_client
-from app.services.embedder.embedder import embded_query
+from app.services.admission.admission import admission
+from app.services.search.engine import RESULT_LIMIT, batch_search, search_projects
+from app.services.search.filters import MetadataFilters
 from fastapi import APIRouter, Depends, Query
-from fastapi_limiter.depends import RateLimiter
+from pydantic import BaseModel, Field
 
 router = APIRouter(prefix="/search", tags=["search"])
 
+BATCH_MAX_QUERIES = 100
+
+
+class BatchSearchRequest(BaseModel):
+    queries: list[str] = Field(..., min_length=1, max_length=BATCH_MAX_QUERIES)
+    sources: Optional[list[str]] = None
+    tags: Optional[list[str]] = None
+    tags_mode: Literal["and", "or"] = "and"
+    k: int = Field(RESULT_LIMIT, ge=1, le=100)
+
 
 # @router.get("/", dependencies=[Depends(RateLimiter(times=10, seconds=60))])
-@router.get("/")
-async def search(
+# sync handlers run in the threadpool, so queued requests don't block the event loop
+@router.get("/", dependencies=[Depends(admission("search"))])
+def search(
     query: str = Query(..., description="User search query"),
     sources: Optional[list[str]] = Query(
         None, description="Optional list of sources to filter by"
     ),
+    tags: Optional[list[str]] = Query(
+        None, description="Optional list of tags to filter by"
+    ),
+    tags_mode: Literal["and", "or"] = Query(
+        "and", description="Require all tags (and) or any tag (or)"
+    ),
+    collapse: bool = Query(
+        False, description="Collapse near-duplicate projects from different sources into one result"
+    ),
+    diversity: float = Query(
+        0.0, ge=0.0, le=1.0, description="0 ranks by relevance only; higher values penalize results similar to ones above"
+    ),
+    batch: Optional[list[str]] = Query(None, description="YC batch, e.g. W24 or 'Winter 2024'"),
+    status: Optional[list[str]] = Query(None, description="Company status, e.g. Active"),
+    location: Optional[list[str]] = Query(None, description="Location contains, e.g. San Francisco"),
+    founded_min: Optional[int] = Query(None, description="Founded in or after this year"),
+    founded_max: Optional[int] = Query(None, description="Founded in or before this year"),
+    team_size_min: Optional[int] = Query(None, ge=0, description="Minimum team size"),
+    team_size_max: Optional[int] = Query(None, ge=0, description="Maximum team size"),
 ):
-    """Endpoint to perform a search based on the query string."""
+    """Endpoint to perform a hybrid lexical + vector search based on the query string."""
     if not sources:
         sources = None
-    embedding = embded_query(query)
-
-    response = supa_base_client.rpc(
-        "match_projects",  # custom RPC we'll define below
-        {"query_embedding": embedding, "sources": sources},
-    ).execute()
+    filters = MetadataFilters(
+        batch=batch or [],
+        status=status or [],
+        location=location or [],
+        founded_min=founded_min,
+        founded_max=founded_max,
+        team_size_min=team_size_min,
+        team_size_max=team_size_max,
+    )
+    return search_projects(query, sources, tags or None, tags_mode, collapse, diversity, filters or None)
 
-    results = response.data if response.data else []
 
-    return {"query": query, "results": results}
+@router.post("/batch", dependencies=[Depends(admission("search_batch"))])
+def search_batch(request: BatchSearchRequest):
+    """Endpoint to run many searches with one embedding request and one scoring pass."""
+    results = batch_search(
+        request.queries,
+        request.sources or None,
+        request.tags or None,
+        request.tags_mode,
+        request.k,
+    )
+    return {"results": results}
@@ -0,0 +1,13 @@
+from app.services.search.engine import suggest
+from fastapi import APIRouter, Query
+
+router = APIRouter(prefix="/suggest", tags=["suggest"])
+
+
+@router.get("/")
+async def suggestions(
+    q: str = Query(..., description="Partial search query"),
+    limit: int = Query(8, ge=1, le=20, description="Maximum number of suggestions"),
+):
+    """Endpoint for search-as-you-type completions, served from memory (no OpenAI or database call)."""
+    return {"q": q, "suggestions": suggest(q, limit)}
@@ -0,0 +1,260 @@
+"""
+In-process admission control for the expensive endpoints.
+
+Each protected endpoint has
+  - a per-client token bucket (rate + burst), rejected with 429 when empty;
+    off unless ADMISSION_RATE_LIMIT is set. Clients are keyed by `request.client`;
+    behind a proxy, uvicorn's --forwarded-allow-ips must name it so that this is
+    the address the proxy saw rather than the proxy's own,
+  - a concurrency limit, and a bounded wait queue with a deadline in front of it;
+    a full queue or a missed deadline is rejected with 503.
+Both rejections carry `Retry-After`, so overload costs a fast error instead of
+every request slowing down together.
+
+Token buckets live in process by default. With ADMISSION_REDIS_URL set they are
+kept in Redis (one atomic Lua script per check) and shared by all workers; if
+Redis is unreachable the local buckets are used. Concurrency is always per worker.
+
+Limits come from ADMISSION_<ENDPOINT>_<SETTING>, e.g. ADMISSION_SEARCH_CONCURRENCY=8.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request
+
+load_dotenv()
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+ADMISSION_REDIS_URL = os.getenv("ADMISSION_REDIS_URL", "")
+ADMISSION_RATE_LIMIT = os.getenv("ADMISSION_RATE_LIMIT", "false").lower() == "true"
+
+MAX_TRACKED_CLIENTS = 10000
+
+
+@dataclass
+class Limits:
+    concurrency: int  # requests running at once, per worker
+    queue: int  # requests allowed to wait for a slot
+    wait_seconds: float  # deadline for a queued request
+    rate: float  # tokens per second, per client
+    burst: int  # bucket size, per client
+
+
+DEFAULT_LIMITS = {
+    "search": Limits(concurrency=8, queue=32, wait_seconds=2.0, rate=1.0, burst=10),
+    "search_batch": Limits(concurrency=2, queue=4, wait_seconds=5.0, rate=0.1, burst=3),
+    "chat": Limits(concurrency=4, queue=16, wait_seconds=5.0, rate=0.2, burst=5),
+}
+
+
+def load_limits(endpoint: str) -> Limits:
+    default = DEFAULT_LIMITS[endpoint]
+    prefix = f"ADMISSION_{endpoint.upper()}_"
+    return Limits(
+        concurrency=int(os.getenv(prefix + "CONCURRENCY", default.concurrency)),
+        queue=int(os.getenv(prefix + "QUEUE", default.queue)),
+        wait_seconds=float(os.getenv(prefix + "WAIT_SECONDS", default.wait_seconds)),
+        rate=float(os.getenv(prefix + "RATE", default.rate)),
+        burst=int(os.getenv(prefix + "BURST", default.burst)),
+    )
+
+
+def _reject(status_code: int, detail: str, retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status_code,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class TokenBuckets:
+    """Per-client token buckets in a bounded LRU; returns seconds until a token is available (0 = admitted)."""
+
+    def __init__(self, rate: float, burst: int, max_clients: int = MAX_TRACKED_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()  # client -> (tokens, updated)
+
+    def take(self, client: str, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        tokens, updated = self._buckets.pop(client, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+        wait = 0.0
+        if tokens >= 1.0:
+            tokens -= 1.0
+        else:
+            wait = (1.0 - tokens) / self.rate if self.rate > 0 else 60.0
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            # an evicted client just starts again with a full bucket
+            self._buckets.popitem(last=False)
+        return wait
+
+
+# KEYS[1] bucket key; ARGV: rate, burst, now. Returns milliseconds to wait (0 = admitted).
+_REDIS_BUCKET_SCRIPT = """
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = math.ceil((1 - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return wait
+"""
+
+
+class RedisTokenBuckets:
+    """Token buckets shared by every worker through Redis."""
+
+    def __init__(self, url: str, endpoint: str, rate: float, burst: int):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.script = self.client.register_script(_REDIS_BUCKET_SCRIPT)
+        self.prefix = f"admission:{endpoint}:"
+        self.rate = rate
+        self.burst = burst
+
+    async def take(self, client: str) -> float:
+        wait_ms = await self.script(keys=[self.prefix + client], args=[self.rate, self.burst, time.time()])
+        return int(wait_ms) / 1000.0
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        endpoint: str,
+        limits: Optional[Limits] = None,
+        redis_url: str = ADMISSION_REDIS_URL,
+        rate_limit: bool = ADMISSION_RATE_LIMIT,
+    ):
+        self.endpoint = endpoint
+        self.limits = limits or load_limits(endpoint)
+        self.rate_limit = rate_limit
+        self.buckets = TokenBuckets(self.limits.rate, self.limits.burst)
+        self.shared_buckets = (
+            RedisTokenBuckets(redis_url, endpoint, self.limits.rate, self.limits.burst) if redis_url else None
+        )
+        self.running = 0
+        self.waiting = 0
+        self.rejected = {"rate": 0, "queue_full": 0, "deadline": 0}
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # created lazily so it binds to the server's event loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.limits.concurrency)
+        return self._slots
+
+    async def _rate_wait(self, client: str) -> float:
+        if self.shared_buckets is not None:
+            try:
+                return await self.shared_buckets.take(client)
+            except Exception as e:
+                print(f"Admission: Redis unavailable, using local buckets: {e}")
+        return self.buckets.take(client)
+
+    async def acquire(self, client: str) -> None:
+        """Admit the request or raise 429/503. Must be paired with `release()` when admitted."""
+        wait = await self._rate_wait(client) if self.rate_limit else 0.0
+        if wait > 0:
+            self.rejected["rate"] += 1
+            raise _reject(429, "Too many requests, slow down", wait)
+
+        slots = self._semaphore()
+        if not slots.locked():
+            # a free slot is taken without suspending
+            await slots.acquire()
+            self.running += 1
+            return
+        if self.waiting >= self.limits.queue:
+            self.rejected["queue_full"] += 1
+            raise _reject(503, "Server busy, try again shortly", self.limits.wait_seconds)
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=self.limits.wait_seconds)
+        except asyncio.TimeoutError:
+            self.rejected["deadline"] += 1
+            raise _reject(503, "Server busy, try again shortly", self.limits.wait_seconds)
+        finally:
+            self.waiting -= 1
+        self.running += 1
+
+    def release(self) -> None:
+        self.running -= 1
+        self._semaphore().release()
+
+    def stats(self) -> dict:
+        return {
+            "endpoint": self.endpoint,
+            "running": self.running,
+            "waiting": self.waiting,
+            "rejected": dict(self.rejected),
+            "limits": vars(self.limits),
+            "rate_limit": self.rate_limit,
+        }
+
+
+def client_key(request: Request) -> str:
+    # X-Forwarded-For is resolved by uvicorn's proxy-headers middleware, which only
+    # takes the hop appended by a proxy listed in --forwarded-allow-ips; the header
+    # itself is never read here since any client can send one
+    return request.client.host if request.client else "unknown"
+
+
+def check_config() -> None:
+    """Reject rate limits that cannot refill, and warn when they may be keyed by a proxy's address."""
+    if not (ADMISSION_ENABLED and ADMISSION_RATE_LIMIT):
+        return
+    for endpoint in DEFAULT_LIMITS:
+        limits = load_limits(endpoint)
+        if limits.rate <= 0 or limits.burst < 1:
+            raise ValueError(
+                f"ADMISSION_{endpoint.upper()}_RATE must be > 0 and _BURST >= 1 with ADMISSION_RATE_LIMIT=true"
+            )
+    if not os.getenv("FORWARDED_ALLOW_IPS"):
+        print(
+            "Warning: admission rate limits are keyed by the connecting address; behind a proxy or load balancer "
+            "all users share one bucket unless uvicorn runs with --forwarded-allow-ips set to the proxy's address "
+            "(or FORWARDED_ALLOW_IPS)."
+        )
+
+
+_controllers: dict[str, AdmissionController] = {}
+
+
+def get_controller(endpoint: str) -> AdmissionController:
+    if endpoint not in _controllers:
+        _controllers[endpoint] = AdmissionController(endpoint)
+    return _controllers[endpoint]
+
+
+def admission(endpoint: str):
+    """FastAPI dependency: `dependencies=[Depends(admission("search"))]`."""
+
+    async def admit(request: Request):
+        if not ADMISSION_ENABLED:
+            yield
+            return
+        controller = get_controller(endpoint)
+        await controller.acquire(client_key(request))
+        try:
+            yield
+        finally:
+            controller.release()
+
+    return admit
@@ -0,0 +1,129 @@
+"""
+Response cache for /chat.
+
+Many turns are identical across users: the opening exchange, the frontend's
+seeded questions, the same idea checked twice. Responses are cached under a
+hash of (system instruction version, model, normalized history, similar-idea
+ids) with a TTL, in an in-process LRU. With CHAT_CACHE_REDIS_URL set the entries
+are also stored in Redis so every worker shares them; Redis errors fall back
+to the local cache.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+CHAT_CACHE_TTL_SECONDS = int(os.getenv("CHAT_CACHE_TTL_SECONDS", "3600"))
+CHAT_CACHE_SIZE = int(os.getenv("CHAT_CACHE_SIZE", "2000"))
+CHAT_CACHE_REDIS_URL = os.getenv("CHAT_CACHE_REDIS_URL", "")
+# a slow or unreachable Redis costs a turn at most this long per call before the local cache takes over
+CHAT_CACHE_REDIS_TIMEOUT = float(os.getenv("CHAT_CACHE_REDIS_TIMEOUT", "0.5"))
+
+REDIS_PREFIX = "chat:response:"
+
+
+def instruction_version(instruction: str) -> str:
+    """Short hash of a system instruction, so editing the prompt invalidates old entries."""
+    return hashlib.sha256(instruction.encode("utf-8")).hexdigest()[:12]
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+def response_key(instruction: str, model: str, history: list[dict], message: str, idea_ids: list) -> str:
+    payload = {
+        "instruction": instruction_version(instruction),
+        "model": model,
+        "history": [[m["role"], _normalize(" ".join(str(p) for p in m.get("parts", [])))] for m in history],
+        "message": _normalize(message),
+        "ideas": [str(i) for i in idea_ids],
+    }
+    return hashlib.sha256(json.dumps(payload, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        ttl_seconds: int = CHAT_CACHE_TTL_SECONDS,
+        max_entries: int = CHAT_CACHE_SIZE,
+        redis_url: str = CHAT_CACHE_REDIS_URL,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()  # key -> (expires, response)
+        self._lock = threading.Lock()
+        self._redis = None
+        if redis_url:
+            import redis
+
+            self._redis = redis.Redis.from_url(
+                redis_url,
+                decode_responses=True,
+                socket_timeout=CHAT_CACHE_REDIS_TIMEOUT,
+                socket_connect_timeout=CHAT_CACHE_REDIS_TIMEOUT,
+            )
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._entries[key]
+        if self._redis is not None:
+            try:
+                value = self._redis.get(REDIS_PREFIX + key)
+            except Exception as e:
+                print(f"Chat cache: Redis get failed: {e}")
+                value = None
+            if value is not None:
+                self._put_local(key, value)
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def _put_local(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put(self, key: str, value: str) -> None:
+        self._put_local(key, value)
+        if self._redis is not None:
+            try:
+                self._redis.set(REDIS_PREFIX + key, value, ex=self.ttl_seconds)
+            except Exception as e:
+                print(f"Chat cache: Redis set failed: {e}")
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Shared cache, or None when CHAT_CACHE_TTL_SECONDS is 0."""
+    global _cache
+    if CHAT_CACHE_TTL_SECONDS <= 0:
+        return None
+    if _cache is None:
+        # handlers run in the threadpool; two first requests must not each build a cache
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
@@ -0,0 +1,154 @@
+"""
+Token-budgeted chat history for /chat.
+
+The client sends the whole conversation every turn. Instead of replaying all
+of it to Gemini, `compact_history` keeps the latest turns verbatim within
+CHAT_HISTORY_TOKENS and replaces everything older with a running summary.
+The summary is cached per conversation id together with how many messages it
+covers, so each turn only summarizes the messages that just aged out (usually
+none) instead of re-reading the conversation. Callers pass the full, uncompacted
+history every turn; a compacted list fed back in would not match the cached
+summary and would be summarized again, summary included.
+
+Token counts use the same tiktoken estimate as the embedder; they are a budget,
+not Gemini's exact count.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from dotenv import load_dotenv
+
+from app.services.embedder.text import count_tokens, truncate_tokens
+
+load_dotenv()
+CHAT_HISTORY_TOKENS = int(os.getenv("CHAT_HISTORY_TOKENS", "3000"))
+CHAT_SUMMARY_TOKENS = int(os.getenv("CHAT_SUMMARY_TOKENS", "400"))
+CHAT_SUMMARY_CACHE_SIZE = int(os.getenv("CHAT_SUMMARY_CACHE_SIZE", "1000"))
+# similar-ideas block appended to the user's message
+CHAT_CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", "800"))
+
+# the summary boundary moves a whole turn (user + model) at a time
+SUMMARY_STEP = 2
+# once over budget, fold down to this share of it, so a summary call happens every few turns, not every turn
+FOLD_TARGET = 0.6
+
+SUMMARY_PROMPT = """Summarize this startup consulting conversation for your own later reference.
+Keep the user's idea, target customers, decisions made, competitors already discussed and open questions.
+Write at most {words} words of plain prose.
+
+{previous}Conversation:
+{transcript}"""
+
+
+@dataclass
+class _Summary:
+    covered: int  # number of leading messages folded into the summary
+    digest: str  # hash of those messages, to notice edited history
+    text: str
+
+
+_summaries: OrderedDict[str, _Summary] = OrderedDict()
+_lock = threading.Lock()
+
+
+def _message_text(message: dict) -> str:
+    return " ".join(str(p) for p in message.get("parts", []))
+
+
+def history_digest(messages: list[dict]) -> str:
+    h = hashlib.sha256()
+    for m in messages:
+        h.update(m["role"].encode())
+        h.update(b"\0")
+        h.update(_message_text(m).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _cached(key: Optional[str], history: list[dict]) -> Optional[_Summary]:
+    if not key:
+        return None
+    with _lock:
+        summary = _summaries.get(key)
+        if summary is not None:
+            _summaries.move_to_end(key)
+    if summary is None or summary.covered > len(history):
+        return None
+    if summary.digest != history_digest(history[: summary.covered]):
+        return None
+    return summary
+
+
+def _store(key: Optional[str], summary: _Summary) -> None:
+    if not key:
+        return
+    with _lock:
+        _summaries[key] = summary
+        _summaries.move_to_end(key)
+        while len(_summaries) > CHAT_SUMMARY_CACHE_SIZE:
+            _summaries.popitem(last=False)
+
+
+def _summarize(previous: Optional[str], messages: list[dict], summarize: Callable[[str], str]) -> str:
+    transcript = "\n".join(
+        f"{'User' if m['role'] == 'user' else 'Consultant'}: {_message_text(m)}" for m in messages
+    )
+    prompt = SUMMARY_PROMPT.format(
+        words=int(CHAT_SUMMARY_TOKENS * 0.75),
+        previous=f"Summary so far:\n{previous}\n\n" if previous else "",
+        transcript=transcript,
+    )
+    return truncate_tokens(summarize(prompt).strip(), CHAT_SUMMARY_TOKENS)
+
+
+def compact_history(
+    history: list[dict],
+    summarize: Callable[[str], str],
+    conversation_id: Optional[str] = None,
+    budget: int = CHAT_HISTORY_TOKENS,
+) -> list[dict]:
+    """
+    Gemini-format history ({"role", "parts"}) that fits `budget` tokens: a summary
+    exchange for older turns followed by the most recent turns verbatim.
+    Without a conversation id the summary is not cached: conversations are never
+    keyed by their content, which (like the frontend's greeting) can be shared.
+    """
+    cached = _cached(conversation_id, history)
+    start = cached.covered if cached else 0
+    counts = [count_tokens(_message_text(m)) for m in history[start:]]
+
+    if not cached and sum(counts) <= budget:
+        return history
+
+    # fold whole turns into the summary until the verbatim part fits
+    verbatim_budget = budget - CHAT_SUMMARY_TOKENS
+    boundary = start
+    remaining = sum(counts)
+    target = verbatim_budget if remaining <= verbatim_budget else verbatim_budget * FOLD_TARGET
+    while remaining > target and boundary + SUMMARY_STEP < len(history):
+        remaining -= sum(counts[boundary - start : boundary - start + SUMMARY_STEP])
+        boundary += SUMMARY_STEP
+    while boundary < len(history) and history[boundary]["role"] != "user":
+        boundary += 1
+
+    summary = cached.text if cached else None
+    if boundary > start:
+        try:
+            summary = _summarize(summary, history[start:boundary], summarize)
+            _store(conversation_id, _Summary(boundary, history_digest(history[:boundary]), summary))
+        except Exception as e:
+            # without a fresh summary, keep the old one (if any) and drop what it doesn't cover
+            print(f"Chat history summary failed: {e}")
+
+    if not summary:
+        return history[boundary:]
+    return [
+        {"role": "user", "parts": [f"Summary of our conversation so far:\n{summary}"]},
+        {"role": "model", "parts": ["Understood, I'll keep that in mind."]},
+        *history[boundary:],
+    ]
@@ -0,0 +1,51 @@
+"""
+Factory for the chat model, so /chat can run against something other than Gemini
+(benchmarks/ swaps in a local fake with `set_model_factory`).
+
+google.generativeai is imported and configured on first use rather than when
+the API starts; it is one of the slowest imports in the app.
+"""
+
+import os
+import threading
+from typing import Callable, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+
+_factory: Optional[Callable] = None
+_genai = None
+_lock = threading.Lock()
+
+
+def set_model_factory(factory: Optional[Callable]) -> None:
+    """factory(model_name, system_instruction) -> object with start_chat() and generate_content(); None resets."""
+    global _factory
+    _factory = factory
+
+
+def _gemini():
+    global _genai
+    if _genai is None:
+        with _lock:
+            if _genai is None:
+                import google.generativeai as genai
+
+                if GEMINI_API_KEY:
+                    genai.configure(api_key=GEMINI_API_KEY)
+                _genai = genai
+    return _genai
+
+
+def chat_model(model_name: str, system_instruction: str):
+    if _factory is not None:
+        return _factory(model_name, system_instruction)
+    return _gemini().GenerativeModel(model_name=model_name, system_instruction=system_instruction)
+
+
+def warm_up() -> None:
+    """Import and configure the Gemini SDK ahead of the first chat."""
+    if _factory is None:
+        _gemini()
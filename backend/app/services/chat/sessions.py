@@ -0,0 +1,165 @@
+"""
+Optional server-side chat sessions, keyed by the client's conversation id.
+
+A session remembers what the server already did for a conversation:
+  - the retrieved similar ideas and the query embedding for the current idea,
+    so follow-up turns about the same idea skip the embedding call and the RPC,
+  - the history as sent to Gemini, including the similar-ideas block from the
+    turn that introduced it, so that block isn't inlined again. It is stored
+    before compaction: compact_history runs on it every turn, and its cached
+    summary only matches while the turns it covers are unchanged.
+
+The client keeps sending its own history; while it matches what the session
+last saw (by digest), the session's history is used instead. Any mismatch
+(edited or regenerated turns) falls back to the client's history.
+
+Sessions expire after CHAT_SESSION_TTL_SECONDS idle and the least recently used
+are evicted once the store passes CHAT_SESSION_MAX_MB. Two requests with the same
+conversation id can run at once in the threadpool, so each session guards its
+fields with its own lock and hands out consistent snapshots; the last turn
+recorded wins.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.services.chat.history import history_digest
+
+load_dotenv()
+CHAT_SESSION_TTL_SECONDS = int(os.getenv("CHAT_SESSION_TTL_SECONDS", "1800"))
+CHAT_SESSION_MAX_MB = float(os.getenv("CHAT_SESSION_MAX_MB", "64"))
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+@dataclass
+class ChatSession:
+    conversation_id: str
+    query: Optional[str] = None  # normalized idea_query the retrieval below belongs to
+    diversity: float = 0.0
+    embedding: Optional[np.ndarray] = None
+    similar_ideas: list = field(default_factory=list)
+    ideas_in_history: bool = False  # the similar-ideas block is already part of `history`
+    history: list[dict] = field(default_factory=list)  # as sent to Gemini, before compaction
+    client_digest: Optional[str] = None  # digest of the client-side history `history` corresponds to
+    last_used: float = field(default_factory=time.monotonic)
+    size: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+
+    def retrieval_for(self, query: str, diversity: float) -> Optional[list]:
+        """Cached similar ideas for this idea query, or None."""
+        with self._lock:
+            if self.query == _normalize(query) and self.diversity == diversity:
+                return self.similar_ideas
+            return None
+
+    def embedding_for(self, query: str) -> Optional[np.ndarray]:
+        with self._lock:
+            return self.embedding if self.query == _normalize(query) else None
+
+    def set_retrieval(self, query: str, diversity: float, embedding, similar_ideas: list) -> None:
+        with self._lock:
+            # new ideas have to be shown to the model again
+            self.ideas_in_history = False
+            self.query = _normalize(query)
+            self.diversity = diversity
+            self.embedding = None if embedding is None else np.asarray(embedding, dtype=np.float32)
+            self.similar_ideas = similar_ideas
+            self._resize()
+
+    def history_for(self, client_history: list[dict]) -> Optional[tuple[list[dict], bool]]:
+        """
+        (server-side history, whether it holds the similar-ideas block) if it still
+        matches what the client sent, else None (and the session's history is reset).
+        """
+        digest = history_digest(client_history)
+        with self._lock:
+            if self.client_digest is not None and self.client_digest == digest:
+                return self.history, self.ideas_in_history
+            self.history = []
+            self.client_digest = None
+            self.ideas_in_history = False
+            return None
+
+    def record_turn(self, history: list[dict], client_history: list[dict], ideas_in_history: bool) -> None:
+        """Store a finished turn; `ideas_in_history` says whether `history` holds the similar-ideas block."""
+        digest = history_digest(client_history)
+        with self._lock:
+            self.history = history
+            self.client_digest = digest
+            self.ideas_in_history = ideas_in_history
+            self._resize()
+
+    def _resize(self) -> None:
+        size = 0 if self.embedding is None else self.embedding.nbytes
+        size += len(json.dumps(self.similar_ideas, default=str))
+        size += sum(len(str(p)) for m in self.history for p in m.get("parts", []))
+        self.size = size
+
+
+class SessionStore:
+    def __init__(
+        self, ttl_seconds: int = CHAT_SESSION_TTL_SECONDS, max_bytes: int = int(CHAT_SESSION_MAX_MB * 1024 * 1024)
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._sessions: OrderedDict[str, ChatSession] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, conversation_id: str) -> ChatSession:
+        """The live session for this conversation, created if missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(conversation_id)
+            if session is None:
+                session = ChatSession(conversation_id)
+                self._sessions[conversation_id] = session
+            self._sessions.move_to_end(conversation_id)
+            session.last_used = now
+            return session
+
+    def trim(self) -> None:
+        """Evict least recently used sessions until the store fits its memory cap."""
+        with self._lock:
+            total = sum(s.size for s in self._sessions.values())
+            while total > self.max_bytes and len(self._sessions) > 1:
+                _, evicted = self._sessions.popitem(last=False)
+                total -= evicted.size
+
+    def _expire(self, now: float) -> None:
+        # oldest first, so stop at the first session that is still fresh
+        while self._sessions:
+            key, oldest = next(iter(self._sessions.items()))
+            if now - oldest.last_used <= self.ttl_seconds:
+                break
+            del self._sessions[key]
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> Optional[SessionStore]:
+    """Shared store, or None when CHAT_SESSION_TTL_SECONDS is 0."""
+    global _store
+    if CHAT_SESSION_TTL_SECONDS <= 0:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SessionStore()
+    return _store
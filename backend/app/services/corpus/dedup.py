@@ -0,0 +1,198 @@
+"""
+Cross-source near-duplicate detection.
+
+The same company often shows up from YC, Product Hunt and topstartups under a
+slightly different name and URL. This job compares every snapshot embedding
+against the rest in blocks and links two projects when
+
+  - their embeddings are nearly identical (>= DEDUP_THRESHOLD), or
+  - they share a normalized name or company domain and are still close (>= DEDUP_NAME_THRESHOLD).
+
+Linked projects get the same cluster id (the smallest project id in the group).
+Later runs keep the previous clusters and only compare newly appended rows. Each
+run's ids and clusters are published together as a new version (see
+snapshot.write_version), so readers never pair one run's ids with another's clusters.
+
+Usage:
+  uv run python -m app.services.corpus.dedup
+"""
+
+import argparse
+import os
+import re
+import time
+from typing import Optional
+from urllib.parse import urlparse
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.services.corpus.snapshot import SNAPSHOT_DIR, Snapshot, load_snapshot, read_version, write_version
+
+load_dotenv()
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.95"))
+DEDUP_NAME_THRESHOLD = float(os.getenv("DEDUP_NAME_THRESHOLD", "0.80"))
+
+BLOCK_ROWS = 2048
+COLUMN_BLOCK = 8192  # 2048 x 8192 float32 scores = 64 MB, whatever the corpus size
+
+# URLs on these hosts point at a listing page, not the company's own site
+AGGREGATOR_DOMAINS = {"ycombinator.com", "devpost.com", "producthunt.com", "topstartups.io"}
+NAME_SUFFIXES = {"inc", "llc", "ltd", "corp", "co", "hq", "labs", "app", "ai", "io"}
+
+
+def normalize_company_name(name: Optional[str]) -> str:
+    words = re.findall(r"[a-z0-9]+", (name or "").lower())
+    while len(words) > 1 and words[-1] in NAME_SUFFIXES:
+        words.pop()
+    return "".join(words)
+
+
+def company_domain(url: Optional[str]) -> Optional[str]:
+    if not url:
+        return None
+    host = urlparse(url if "//" in url else f"//{url}").netloc.lower().split(":")[0]
+    if host.startswith("www."):
+        host = host[4:]
+    if not host or any(host == d or host.endswith("." + d) for d in AGGREGATOR_DOMAINS):
+        return None
+    return host
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = np.arange(n)
+
+    def find(self, i: int) -> int:
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def _dedup_dir(snapshot_dir: str) -> str:
+    return os.path.join(snapshot_dir, "dedup")
+
+
+def read_clusters(snapshot_dir: str = SNAPSHOT_DIR) -> Optional[tuple[np.ndarray, np.ndarray]]:
+    """(ids, cluster_ids) from the last run, or None."""
+    stored = read_version(_dedup_dir(snapshot_dir), ["ids", "clusters"])
+    if stored is None:
+        return None
+    return stored[1]["ids"], stored[1]["clusters"]
+
+
+_cluster_cache: dict[str, tuple[int, dict[int, int]]] = {}
+
+
+def load_cluster_map(snapshot_dir: str = SNAPSHOT_DIR) -> dict[int, int]:
+    """project id -> cluster id, re-read only when the dedup job has written a new result."""
+    try:
+        mtime = os.stat(os.path.join(_dedup_dir(snapshot_dir), "meta.json")).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    cached = _cluster_cache.get(snapshot_dir)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    stored = read_clusters(snapshot_dir)
+    if stored is None:
+        return {}
+    ids, clusters = stored
+    mapping = {int(i): int(c) for i, c in zip(ids, clusters) if i != c}
+    _cluster_cache[snapshot_dir] = (mtime, mapping)
+    return mapping
+
+
+def _close_pairs(embeddings, block_start: int, block_end: int, low: float):
+    """(i, j, score) for every earlier row j whose cosine with row i in [block_start, block_end) is >= low."""
+    block = np.asarray(embeddings[block_start:block_end], dtype=np.float32)
+    for c0 in range(0, block_end, COLUMN_BLOCK):
+        c1 = min(c0 + COLUMN_BLOCK, block_end)
+        scores = block @ np.asarray(embeddings[c0:c1], dtype=np.float32).T
+        rows_b, cols = np.nonzero(scores >= low)
+        if c1 > block_start:
+            # the tile crossing the diagonal: keep each pair once, from its later row
+            earlier = c0 + cols < block_start + rows_b
+            rows_b, cols = rows_b[earlier], cols[earlier]
+        values = scores[rows_b, cols]
+        yield from zip((block_start + rows_b).tolist(), (c0 + cols).tolist(), values.tolist())
+
+
+def find_duplicates(snapshot: Snapshot, snapshot_dir: str = SNAPSHOT_DIR, full: bool = False) -> dict:
+    """Assign a canonical cluster id to every snapshot row and store the result."""
+    stored = None if full else read_version(_dedup_dir(snapshot_dir), ["ids", "clusters"])
+    if stored is not None and stored[0].get("snapshot_version") == snapshot.manifest.get("version"):
+        return stored[0]
+
+    started = time.perf_counter()
+    ids = np.asarray(snapshot.ids)
+    n = len(ids)
+    embeddings = snapshot.embeddings
+    rows = snapshot.metadata.select(["name", "url"]).to_pylist()
+
+    uf = _UnionFind(n)
+    start = 0
+    previous = stored[1] if stored is not None else None
+    if previous is not None and len(previous["ids"]) <= n and np.array_equal(previous["ids"], ids[: len(previous["ids"])]):
+        # reuse old groups: point each old row at the position of its cluster's canonical id
+        old_ids, old_clusters = previous["ids"], previous["clusters"]
+        position = {int(pid): i for i, pid in enumerate(old_ids)}
+        for i, cluster in enumerate(old_clusters):
+            uf.union(i, position.get(int(cluster), i))
+        start = len(old_ids)
+
+    names = [normalize_company_name(r["name"]) for r in rows]
+    domains = [company_domain(r["url"]) for r in rows]
+
+    # same normalized name and same company domain is a duplicate even if the descriptions drifted
+    first_seen: dict[tuple[str, str], int] = {}
+    for i in range(n):
+        if names[i] and domains[i]:
+            uf.union(i, first_seen.setdefault((names[i], domains[i]), i))
+
+    links = 0
+    low = min(DEDUP_THRESHOLD, DEDUP_NAME_THRESHOLD)
+    for block_start in range(start, n, BLOCK_ROWS):
+        # each row is compared with every earlier row, so every pair is seen exactly once
+        for i, j, score in _close_pairs(embeddings, block_start, min(block_start + BLOCK_ROWS, n), low):
+            same_name = bool(names[i]) and names[i] == names[j]
+            same_domain = bool(domains[i]) and domains[i] == domains[j]
+            if score >= DEDUP_THRESHOLD or same_name or same_domain:
+                uf.union(i, j)
+                links += 1
+
+    roots = np.array([uf.find(i) for i in range(n)], dtype=np.int64)
+    clusters = ids[roots]
+    groups = int(np.sum(np.bincount(roots) > 1))
+    meta = {
+        "snapshot_version": snapshot.manifest.get("version"),
+        "rows": n,
+        "compared_from": start,
+        "links": links,
+        "duplicate_groups": groups,
+    }
+    write_version(_dedup_dir(snapshot_dir), {"ids": ids, "clusters": clusters}, meta)
+    print(f"Dedup: {n} rows, {groups} duplicate groups, compared from row {start} in {time.perf_counter() - started:.1f}s")
+    return meta
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Assign cross-source duplicate cluster ids to the snapshot")
+    ap.add_argument("--dir", type=str, default=SNAPSHOT_DIR, help="Snapshot directory")
+    ap.add_argument("--full", action="store_true", help="Recompute every pair instead of only new rows")
+    args = ap.parse_args()
+    snapshot = load_snapshot(args.dir)
+    if snapshot is None:
+        raise SystemExit(f"No snapshot in {args.dir}, run `python -m app.services.corpus.snapshot` first")
+    find_duplicates(snapshot, args.dir, full=args.full)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Precomputed k-nearest-neighbor graph over the snapshot.
+
+Every project's top NEIGHBORS_K most similar projects, computed offline with
+blocked float32 matrix multiplication. Row blocks run in a thread pool (NumPy
+releases the GIL inside matmul) and each block walks the corpus in column
+chunks, so memory per worker stays at BLOCK_ROWS x COLUMN_BLOCK scores.
+
+Stored in SNAPSHOT_DIR/neighbors/ as
+  meta.json           build info; `data` names the current version directory
+  v<n>/
+    ids.npy           int64  (n,)    project ids, in snapshot order
+    neighbors.npy     int32  (n, k)  neighbor positions into ids.npy, best first (-1 = none)
+    similarities.npy  float16 (n, k) cosine similarity per neighbor (-inf = none)
+
+Each build is a new version directory published by swapping meta.json (see
+snapshot.write_version), so a reader always gets ids and lists from one build.
+
+When the snapshot only grew, new rows are compared with everything and old rows
+only with the new rows, then merged into their existing lists.
+
+Usage:
+  uv run python -m app.services.corpus.neighbors
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.services.corpus.snapshot import SNAPSHOT_DIR, Snapshot, load_snapshot, read_version, write_version
+
+load_dotenv()
+NEIGHBORS_K = int(os.getenv("NEIGHBORS_K", "20"))
+NEIGHBORS_WORKERS = int(os.getenv("NEIGHBORS_WORKERS", str(os.cpu_count() or 1)))
+
+BLOCK_ROWS = 512
+COLUMN_BLOCK = 32768  # 512 x 32768 float32 scores = 64 MB per worker
+GRAPH_ARRAYS = ["ids", "neighbors", "similarities"]
+
+
+def _neighbors_dir(snapshot_dir: str) -> str:
+    return os.path.join(snapshot_dir, "neighbors")
+
+
+def _merge_topk(
+    sims: np.ndarray, pos: np.ndarray, new_sims: np.ndarray, new_pos: np.ndarray, k: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Row-wise top-k of two (rows, *) candidate sets, sorted best first."""
+    all_sims = np.concatenate([sims, new_sims], axis=1)
+    all_pos = np.concatenate([pos, new_pos], axis=1)
+    if all_sims.shape[1] > k:
+        part = np.argpartition(-all_sims, k - 1, axis=1)[:, :k]
+        all_sims = np.take_along_axis(all_sims, part, axis=1)
+        all_pos = np.take_along_axis(all_pos, part, axis=1)
+    order = np.argsort(-all_sims, axis=1, kind="stable")
+    return np.take_along_axis(all_sims, order, axis=1), np.take_along_axis(all_pos, order, axis=1)
+
+
+def _empty(rows: int, k: int) -> tuple[np.ndarray, np.ndarray]:
+    return np.full((rows, k), -np.inf, dtype=np.float32), np.full((rows, k), -1, dtype=np.int32)
+
+
+def _block_knn(embeddings, start: int, end: int, col_start: int, col_end: int, k: int):
+    """Top-k columns in [col_start, col_end) for rows [start, end), excluding each row itself."""
+    block = np.asarray(embeddings[start:end], dtype=np.float32)
+    sims, pos = _empty(end - start, k)
+    for c0 in range(col_start, col_end, COLUMN_BLOCK):
+        c1 = min(c0 + COLUMN_BLOCK, col_end)
+        scores = block @ np.asarray(embeddings[c0:c1], dtype=np.float32).T
+        # a row is not its own neighbor
+        self_rows = np.arange(max(start, c0), min(end, c1))
+        scores[self_rows - start, self_rows - c0] = -np.inf
+        if scores.shape[1] > k:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        top_sims = np.take_along_axis(scores, top, axis=1)
+        sims, pos = _merge_topk(sims, pos, top_sims, (top + c0).astype(np.int32), k)
+    return sims, pos
+
+
+def compute_knn(
+    embeddings,
+    k: int = NEIGHBORS_K,
+    rows: Optional[tuple[int, int]] = None,
+    columns: Optional[tuple[int, int]] = None,
+    workers: int = NEIGHBORS_WORKERS,
+) -> tuple[np.ndarray, np.ndarray]:
+    """(similarities, positions) of the top-k columns for each row in `rows`, default all vs all."""
+    n = len(embeddings)
+    start, end = rows or (0, n)
+    col_start, col_end = columns or (0, n)
+    blocks = [(s, min(s + BLOCK_ROWS, end)) for s in range(start, end, BLOCK_ROWS)]
+    if not blocks:
+        return _empty(0, k)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(blocks)))) as pool:
+        parts = list(pool.map(lambda b: _block_knn(embeddings, b[0], b[1], col_start, col_end, k), blocks))
+    return np.vstack([p[0] for p in parts]), np.vstack([p[1] for p in parts])
+
+
+def read_neighbors(snapshot_dir: str = SNAPSHOT_DIR) -> Optional[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """(ids, neighbor positions, similarities) memory-mapped from the last build, or None."""
+    stored = read_version(_neighbors_dir(snapshot_dir), GRAPH_ARRAYS, mmap_mode="r")
+    if stored is None:
+        return None
+    return tuple(stored[1][name] for name in GRAPH_ARRAYS)
+
+
+_graph_cache: dict[str, tuple[int, tuple[dict[int, int], np.ndarray, np.ndarray, np.ndarray]]] = {}
+
+
+def project_neighbors(project_id: int, snapshot_dir: str = SNAPSHOT_DIR) -> Optional[list[tuple[int, float]]]:
+    """[(neighbor id, similarity), ...] best first, or None if the project isn't in the graph."""
+    try:
+        mtime = os.stat(os.path.join(_neighbors_dir(snapshot_dir), "meta.json")).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _graph_cache.get(snapshot_dir)
+    if not cached or cached[0] != mtime:
+        graph = read_neighbors(snapshot_dir)
+        if graph is None:
+            return None
+        ids, neighbors, sims = graph
+        cached = (mtime, ({int(pid): i for i, pid in enumerate(ids)}, ids, neighbors, sims))
+        _graph_cache[snapshot_dir] = cached
+    position, ids, neighbors, sims = cached[1]
+    pos = position.get(project_id)
+    if pos is None:
+        return None
+    return [(int(ids[j]), float(s)) for j, s in zip(neighbors[pos], sims[pos]) if j >= 0]
+
+
+def build_neighbors(
+    snapshot: Snapshot, snapshot_dir: str = SNAPSHOT_DIR, k: int = NEIGHBORS_K, full: bool = False
+) -> dict:
+    """Compute or extend the neighbor graph for the snapshot and store it."""
+    stored = None if full else read_version(_neighbors_dir(snapshot_dir), GRAPH_ARRAYS, mmap_mode="r")
+    if stored is not None:
+        last = stored[0]
+        if last.get("snapshot_version") == snapshot.manifest.get("version") and last.get("k") == k:
+            return last
+
+    started = time.perf_counter()
+    ids = np.asarray(snapshot.ids)
+    n = len(ids)
+    embeddings = snapshot.embeddings
+
+    previous = tuple(stored[1][name] for name in GRAPH_ARRAYS) if stored is not None else None
+    old = 0
+    if (
+        previous is not None
+        and previous[1].shape[1] == k
+        and len(previous[0]) <= n
+        and np.array_equal(previous[0], ids[: len(previous[0])])
+    ):
+        old = len(previous[0])
+
+    if old:
+        # old rows only need the new rows as extra candidates
+        extra_sims, extra_pos = compute_knn(embeddings, k, rows=(0, old), columns=(old, n))
+        old_sims, old_pos = _merge_topk(
+            np.asarray(previous[2], dtype=np.float32), np.asarray(previous[1]), extra_sims, extra_pos, k
+        )
+        new_sims, new_pos = compute_knn(embeddings, k, rows=(old, n))
+        sims, pos = np.vstack([old_sims, new_sims]), np.vstack([old_pos, new_pos])
+    else:
+        sims, pos = compute_knn(embeddings, k)
+
+    # padding keeps its -inf similarity, so merging it with later rows can't rank it above a real neighbor
+    pos[~np.isfinite(sims)] = -1
+    meta = {
+        "snapshot_version": snapshot.manifest.get("version"),
+        "rows": n,
+        "k": k,
+        "computed_from": old,
+    }
+    arrays = {"ids": ids, "neighbors": pos.astype(np.int32), "similarities": sims.astype(np.float16)}
+    write_version(_neighbors_dir(snapshot_dir), arrays, meta)
+    print(f"Neighbors: {n} rows, k={k}, computed from row {old} in {time.perf_counter() - started:.1f}s")
+    return meta
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Precompute the k-nearest-neighbor graph of the snapshot")
+    ap.add_argument("--dir", type=str, default=SNAPSHOT_DIR, help="Snapshot directory")
+    ap.add_argument("--k", type=int, default=NEIGHBORS_K, help="Neighbors per project")
+    ap.add_argument("--full", action="store_true", help="Recompute every row instead of only new rows")
+    args = ap.parse_args()
+    snapshot = load_snapshot(args.dir)
+    if snapshot is None:
+        raise SystemExit(f"No snapshot in {args.dir}, run `python -m app.services.corpus.snapshot` first")
+    build_neighbors(snapshot, args.dir, k=args.k, full=args.full)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Precomputed embedding map for the /map endpoint.
+
+Fits a 3-component PCA and spherical k-means over the snapshot embeddings and
+stores the model next to the snapshot, versioned like the snapshot itself. New
+snapshot rows are projected with the stored model and assigned to the nearest
+stored centroid instead of refitting; when the snapshot also changed existing
+rows, every row is re-projected with it. A full refit only happens once the
+corpus has grown by MAP_REFIT_GROWTH.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from typing import Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from dotenv import load_dotenv
+
+from app.services.corpus.snapshot import SNAPSHOT_DIR, Snapshot, read_metadata, read_version, write_version
+
+load_dotenv()
+MAP_CLUSTERS = int(os.getenv("MAP_CLUSTERS", "24"))
+MAP_REFIT_GROWTH = float(os.getenv("MAP_REFIT_GROWTH", "0.2"))
+
+N_COMPONENTS = 3
+BLOCK_ROWS = 8192
+
+
+def _map_dir(snapshot_dir: str) -> str:
+    return os.path.join(snapshot_dir, "map")
+
+
+def fit_pca(embeddings: np.ndarray, n_components: int = N_COMPONENTS) -> tuple[np.ndarray, np.ndarray]:
+    """Mean and top principal axes, accumulating the covariance block by block."""
+    n, d = embeddings.shape
+    mean = np.zeros(d, dtype=np.float64)
+    for start in range(0, n, BLOCK_ROWS):
+        mean += embeddings[start : start + BLOCK_ROWS].sum(axis=0, dtype=np.float64)
+    mean /= max(n, 1)
+
+    cov = np.zeros((d, d), dtype=np.float64)
+    for start in range(0, n, BLOCK_ROWS):
+        block = embeddings[start : start + BLOCK_ROWS] - mean
+        cov += block.T @ block
+    _, vectors = np.linalg.eigh(cov)
+    components = vectors[:, ::-1][:, :n_components].T  # eigh sorts ascending
+    return mean.astype(np.float32), np.ascontiguousarray(components, dtype=np.float32)
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+def assign_clusters(embeddings: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Nearest centroid by cosine similarity, computed in blocks."""
+    labels = np.empty(embeddings.shape[0], dtype=np.int32)
+    for start in range(0, embeddings.shape[0], BLOCK_ROWS):
+        block = _normalize(np.asarray(embeddings[start : start + BLOCK_ROWS], dtype=np.float32))
+        labels[start : start + BLOCK_ROWS] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+def fit_kmeans(embeddings: np.ndarray, k: int, iterations: int = 20, seed: int = 0) -> np.ndarray:
+    """Spherical k-means with k-means++ seeding. Returns unit-length centroids (k, D)."""
+    n = embeddings.shape[0]
+    k = max(1, min(k, n))
+    rng = np.random.default_rng(seed)
+
+    # k-means++ seeding on a sample keeps this cheap on large corpora
+    sample_idx = rng.choice(n, size=min(n, 20 * k), replace=False)
+    sample = _normalize(np.asarray(embeddings[np.sort(sample_idx)], dtype=np.float32))
+    centroids = [sample[rng.integers(len(sample))]]
+    closest = 1.0 - sample @ centroids[0]
+    for _ in range(1, k):
+        weights = np.clip(closest, 0, None)
+        total = weights.sum()
+        pick = rng.choice(len(sample), p=weights / total) if total > 0 else rng.integers(len(sample))
+        centroids.append(sample[pick])
+        closest = np.minimum(closest, 1.0 - sample @ sample[pick])
+    centroids = np.vstack(centroids).astype(np.float32)
+
+    for _ in range(iterations):
+        sums = np.zeros_like(centroids, dtype=np.float64)
+        for start in range(0, n, BLOCK_ROWS):
+            block = _normalize(np.asarray(embeddings[start : start + BLOCK_ROWS], dtype=np.float32))
+            labels = np.argmax(block @ centroids.T, axis=1)
+            np.add.at(sums, labels, block)
+        empty = np.linalg.norm(sums, axis=1) == 0
+        sums[empty] = centroids[empty]  # keep empty clusters where they were
+        updated = _normalize(sums).astype(np.float32)
+        if np.allclose(updated, centroids, atol=1e-5):
+            break
+        centroids = updated
+    return centroids
+
+
+def project(embeddings: np.ndarray, mean: np.ndarray, components: np.ndarray) -> np.ndarray:
+    coords = np.empty((embeddings.shape[0], components.shape[0]), dtype=np.float32)
+    for start in range(0, embeddings.shape[0], BLOCK_ROWS):
+        coords[start : start + BLOCK_ROWS] = (embeddings[start : start + BLOCK_ROWS] - mean) @ components.T
+    return coords
+
+
+MAP_ARRAYS = ["ids", "coords", "clusters", "mean", "components", "centroids"]
+
+
+def read_map(snapshot_dir: str = SNAPSHOT_DIR) -> Optional[dict]:
+    """Load the stored map (ids, coords, clusters, model and meta) or None if not built yet."""
+    stored = read_version(_map_dir(snapshot_dir), MAP_ARRAYS)
+    if stored is None:
+        return None
+    meta, arrays = stored
+    return {"meta": meta, **arrays}
+
+
+def update_map(snapshot: Snapshot, snapshot_dir: str = SNAPSHOT_DIR, force_refit: bool = False) -> Optional[dict]:
+    """Bring the stored map up to date with the snapshot. Returns the map meta."""
+    if len(snapshot) == 0:
+        return None
+    started = time.perf_counter()
+    current = read_map(snapshot_dir)
+    if current and current["meta"].get("snapshot_version") == snapshot.manifest.get("version") and not force_refit:
+        return current["meta"]
+
+    ids = np.asarray(snapshot.ids)
+    refit = (
+        force_refit
+        or current is None
+        or current["components"].shape[1] != snapshot.embeddings.shape[1]
+        or len(snapshot) > current["meta"]["fitted_rows"] * (1 + MAP_REFIT_GROWTH)
+    )
+
+    if refit:
+        mean, components = fit_pca(snapshot.embeddings)
+        centroids = fit_kmeans(snapshot.embeddings, MAP_CLUSTERS)
+        coords = project(snapshot.embeddings, mean, components)
+        clusters = assign_clusters(snapshot.embeddings, centroids)
+        fitted_rows = len(snapshot)
+    else:
+        mean, components, centroids = current["mean"], current["components"], current["centroids"]
+        fitted_rows = current["meta"]["fitted_rows"]
+        # after a snapshot that only appended rows, mapped rows keep their coordinates and only new
+        # ids are projected; any other change may have edited embeddings, so every row is re-projected
+        manifest = snapshot.manifest
+        mapped = current["meta"].get("snapshot_version")
+        only_appended = (
+            mapped is not None
+            and manifest.get("version") == mapped + 1
+            and not manifest.get("full")
+            and not manifest.get("updated")
+        )
+        known = np.isin(ids, current["ids"]) if only_appended else np.zeros(len(ids), dtype=bool)
+        coords = np.empty((len(ids), components.shape[0]), dtype=np.float32)
+        clusters = np.empty(len(ids), dtype=np.int32)
+        old_pos = np.searchsorted(current["ids"], ids[known])
+        coords[known] = current["coords"][old_pos]
+        clusters[known] = current["clusters"][old_pos]
+        fresh = np.flatnonzero(~known)
+        if fresh.size:
+            coords[fresh] = project(snapshot.embeddings[fresh], mean, components)
+            clusters[fresh] = assign_clusters(snapshot.embeddings[fresh], centroids)
+
+    meta = {
+        "version": (current["meta"]["version"] + 1) if current else 1,
+        "snapshot_version": snapshot.manifest.get("version"),
+        "rows": len(ids),
+        "fitted_rows": fitted_rows,
+        "clusters": int(centroids.shape[0]),
+        "refit": bool(refit),
+    }
+    arrays = dict(zip(MAP_ARRAYS, (ids, coords, clusters, mean, components, centroids)))
+    write_version(_map_dir(snapshot_dir), arrays, meta)
+    print(
+        f"Map {'refit' if refit else 'updated'}: {len(ids)} rows, {centroids.shape[0]} clusters "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    return meta
+
+
+def build_map_table(snapshot_dir: str = SNAPSHOT_DIR, dims: int = 3) -> Optional[tuple[dict, pa.Table]]:
+    """Columnar map (id, x, y[, z], cluster, name, source) joined with snapshot names."""
+    current = read_map(snapshot_dir)
+    if current is None:
+        return None
+    ids, coords = current["ids"], current["coords"]
+    columns = {"id": pa.array(ids), "x": pa.array(coords[:, 0]), "y": pa.array(coords[:, 1])}
+    if dims == 3:
+        columns["z"] = pa.array(coords[:, 2])
+    columns["cluster"] = pa.array(current["clusters"])
+
+    # names for hover labels; ids missing from the snapshot (mid-refresh) get nulls
+    labels = read_metadata(snapshot_dir, columns=["id", "name", "source"])
+    if labels is None:
+        return None
+    label_ids = labels.column("id").to_numpy()
+    pos = np.minimum(np.searchsorted(label_ids, ids), len(label_ids) - 1)
+    missing = pa.array(label_ids[pos] != ids)
+    for name in ("name", "source"):
+        values = labels.column(name).take(pa.array(pos))
+        columns[name] = pc.if_else(missing, pa.scalar(None, pa.string()), values)
+    return current["meta"], pa.table(columns)
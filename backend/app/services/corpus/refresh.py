@@ -0,0 +1,59 @@
+"""
+Background refresh of the local corpus and everything derived from it.
+
+The API runs `refresh_loop` from its lifespan when CORPUS_REFRESH_SECONDS > 0.
+Enable it on a single worker (or run this module from cron) so only one process
+writes the derived files; every worker picks the results up from disk.
+
+Usage:
+  uv run python -m app.services.corpus.refresh --sync
+"""
+
+import argparse
+import asyncio
+import os
+
+from dotenv import load_dotenv
+
+from app.services.corpus.dedup import find_duplicates
+from app.services.corpus.neighbors import build_neighbors
+from app.services.corpus.projection import update_map
+from app.services.corpus.snapshot import SNAPSHOT_DIR, load_snapshot, sync_snapshot
+
+load_dotenv()
+CORPUS_REFRESH_SECONDS = int(os.getenv("CORPUS_REFRESH_SECONDS", "0"))
+SNAPSHOT_AUTO_SYNC = os.getenv("SNAPSHOT_AUTO_SYNC", "false").lower() == "true"
+
+
+def refresh_corpus(snapshot_dir: str = SNAPSHOT_DIR, sync: bool = SNAPSHOT_AUTO_SYNC, refit: bool = False) -> None:
+    """Optionally pull new rows into the snapshot, then update the map, duplicate clusters and neighbor graph."""
+    if sync:
+        sync_snapshot(snapshot_dir)
+    snapshot = load_snapshot(snapshot_dir)
+    if snapshot is None:
+        return
+    update_map(snapshot, snapshot_dir, force_refit=refit)
+    find_duplicates(snapshot, snapshot_dir, full=bool(snapshot.manifest.get("updated")))
+    build_neighbors(snapshot, snapshot_dir, full=bool(snapshot.manifest.get("updated")))
+
+
+async def refresh_loop(interval: int = CORPUS_REFRESH_SECONDS) -> None:
+    while True:
+        try:
+            await asyncio.to_thread(refresh_corpus)
+        except Exception as e:
+            print(f"Corpus refresh failed: {e}")
+        await asyncio.sleep(interval)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Refresh the local snapshot and derived indexes once")
+    ap.add_argument("--dir", type=str, default=SNAPSHOT_DIR, help="Snapshot directory")
+    ap.add_argument("--sync", action="store_true", help="Pull new rows from Supabase first")
+    ap.add_argument("--refit", action="store_true", help="Refit the map projection and clusters from scratch")
+    args = ap.parse_args()
+    refresh_corpus(args.dir, sync=args.sync, refit=args.refit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,463 @@
+"""
+Local snapshot of the projects corpus.
+
+Exports the Supabase `projects` table into a directory that offline tools and the
+API can load zero-copy:
+
+  manifest.json       version, row count, dimensionality, last synced id and sync time
+  v<version>/
+    embeddings.npy    float32 (N, D) matrix, rows ordered by id, loadable with mmap
+    ids.npy           int64 (N,) project ids matching the embedding rows
+    sources.npy       int16 (N,) index into the manifest's `sources` list, -1 for none
+    metadata.parquet  every other column, one row per project in the same order
+
+Every version is written to its own directory and never modified; swapping the
+manifest publishes it. Readers memory-map one version's files read-only, so all
+API workers share the same pages and never see files from two versions. The
+previous version is kept for readers still loading it, older ones are removed.
+
+Re-running the export only appends rows with an id greater than the last synced id,
+and optionally refreshes rows whose `--changed-column` moved past the last sync.
+
+Usage:
+  uv run python -m app.services.corpus.snapshot
+  uv run python -m app.services.corpus.snapshot --full --dir data/snapshot
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+
+load_dotenv()
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "data/snapshot")
+
+METADATA_COLUMNS = ["id", "name", "short_description", "long_description", "tags", "source", "url", "metadata"]
+PAGE_SIZE = 1000
+
+METADATA_SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("name", pa.string()),
+        ("short_description", pa.string()),
+        ("long_description", pa.string()),
+        ("tags", pa.list_(pa.string())),
+        ("source", pa.string()),
+        ("url", pa.string()),
+        # free-form JSON object, kept as text so the schema stays fixed
+        ("metadata", pa.string()),
+    ]
+)
+
+
+@dataclass
+class Snapshot:
+    ids: np.ndarray
+    embeddings: np.ndarray
+    metadata: pa.Table
+    manifest: dict
+    # per-row index into `source_names`, None for snapshots written before sources.npy
+    sources: Optional[np.ndarray] = None
+
+    @property
+    def source_names(self) -> list[str]:
+        return list(self.manifest.get("sources") or [])
+
+    def __len__(self) -> int:
+        return int(self.ids.shape[0])
+
+    def rows(self, start: int = 0) -> list[dict]:
+        """Metadata from `start` on as a list of dicts with `metadata` decoded back to an object."""
+        rows = self.metadata.slice(start).to_pylist()
+        for row in rows:
+            row["metadata"] = json.loads(row["metadata"]) if row.get("metadata") else {}
+        return rows
+
+
+def parse_embeddings(values: list, dim: Optional[int] = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Parse PostgREST vector values (strings like "[0.1,0.2]" or lists) into a float32 matrix.
+
+    Returns (matrix, keep) where keep is a boolean mask of the input rows that were valid.
+    Strings are parsed in one pass as a single JSON array and every row's length is
+    checked; rows are only inspected one by one when that finds malformed or mis-sized values.
+    """
+    n = len(values)
+    if n == 0:
+        return np.empty((0, dim or 0), dtype=np.float32), np.zeros(0, dtype=bool)
+
+    rows = values
+    if all(isinstance(v, str) for v in values):
+        try:
+            rows = json.loads("[" + ",".join(values) + "]")
+        except ValueError:
+            rows = None  # malformed text somewhere
+    if rows is not None and len(rows) == n and all(isinstance(v, (list, tuple)) for v in rows):
+        sizes = {len(v) for v in rows}
+        if len(sizes) == 1 and (dim is None or sizes == {dim}):
+            try:
+                matrix = np.asarray(rows, dtype=np.float32)
+            except (ValueError, TypeError):
+                matrix = None
+            if matrix is not None and matrix.ndim == 2:
+                return matrix, np.ones(n, dtype=bool)
+
+    # slow path: figure out which rows are bad
+    parsed: list[Optional[np.ndarray]] = []
+    for v in values:
+        try:
+            if isinstance(v, str):
+                arr = np.array(v.strip().strip("[]").split(","), dtype=np.float32)
+            elif v is None:
+                arr = None
+            else:
+                arr = np.asarray(v, dtype=np.float32).ravel()
+        except (ValueError, TypeError):
+            arr = None
+        parsed.append(arr)
+
+    if dim is None:
+        lengths = [a.shape[0] for a in parsed if a is not None]
+        dim = max(set(lengths), key=lengths.count) if lengths else 0
+    keep = np.array([a is not None and a.shape[0] == dim for a in parsed], dtype=bool)
+    matrix = np.empty((int(keep.sum()), dim), dtype=np.float32)
+    j = 0
+    for a, ok in zip(parsed, keep):
+        if ok:
+            matrix[j] = a
+            j += 1
+    return matrix, keep
+
+
+def fetch_pages(
+    columns: str,
+    after_id: int = 0,
+    page_size: int = PAGE_SIZE,
+    changed_column: Optional[str] = None,
+    changed_since: Optional[str] = None,
+) -> Iterator[list[dict]]:
+    """Yield pages of `projects` rows ordered by id using keyset pagination."""
+    from app.services.db.supa_base_client import get_supabase
+
+    last_id = after_id
+    while True:
+        query = get_supabase().table("projects").select(columns).gt("id", last_id)
+        if changed_column and changed_since:
+            query = query.gt(changed_column, changed_since)
+        res = query.order("id").limit(page_size).execute()
+        rows = res.data or []
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1]["id"]
+        if len(rows) < page_size:
+            return
+
+
+def _rows_to_table(rows: list[dict]) -> pa.Table:
+    cleaned = []
+    for r in rows:
+        cleaned.append(
+            {
+                "id": int(r["id"]),
+                "name": r.get("name"),
+                "short_description": r.get("short_description"),
+                "long_description": r.get("long_description"),
+                "tags": list(r.get("tags") or []),
+                "source": r.get("source"),
+                "url": r.get("url"),
+                "metadata": json.dumps(r["metadata"]) if r.get("metadata") else None,
+            }
+        )
+    return pa.Table.from_pylist(cleaned, schema=METADATA_SCHEMA)
+
+
+def _fetch(after_id: int, page_size: int, changed_column=None, changed_since=None) -> tuple[list[dict], np.ndarray]:
+    columns = ", ".join(METADATA_COLUMNS + ["embedding"])
+    rows: list[dict] = []
+    blocks: list[np.ndarray] = []
+    dim = None
+    for page in fetch_pages(columns, after_id, page_size, changed_column, changed_since):
+        matrix, keep = parse_embeddings([r.get("embedding") for r in page], dim)
+        if matrix.shape[0]:
+            dim = matrix.shape[1]
+        dropped = int((~keep).sum())
+        if dropped:
+            print(f"Dropped {dropped} rows with missing or malformed embeddings")
+        rows.extend(r for r, ok in zip(page, keep) if ok)
+        blocks.append(matrix)
+        print(f"Fetched {len(rows)} rows (last id {page[-1]['id']})")
+    blocks = [b for b in blocks if b.shape[0]]
+    if not blocks:
+        return [], np.empty((0, dim or 0), dtype=np.float32)
+    return rows, np.concatenate(blocks)
+
+
+def _paths(directory: str, data: str = "") -> dict[str, str]:
+    """File paths of one snapshot version; `data` is the manifest's version directory ("" for the old flat layout)."""
+    folder = os.path.join(directory, data) if data else directory
+    return {
+        "embeddings": os.path.join(folder, "embeddings.npy"),
+        "ids": os.path.join(folder, "ids.npy"),
+        "sources": os.path.join(folder, "sources.npy"),
+        "metadata": os.path.join(folder, "metadata.parquet"),
+        "manifest": os.path.join(directory, "manifest.json"),
+    }
+
+
+def _read_json(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_manifest(directory: str = SNAPSHOT_DIR) -> Optional[dict]:
+    return _read_json(_paths(directory)["manifest"])
+
+
+def _load(directory: str, manifest: dict, mmap: bool) -> Snapshot:
+    paths = _paths(directory, manifest.get("data", ""))
+    mode = "r" if mmap else None
+    return Snapshot(
+        ids=np.load(paths["ids"], mmap_mode=mode),
+        embeddings=np.load(paths["embeddings"], mmap_mode=mode),
+        metadata=pq.read_table(paths["metadata"]),
+        manifest=manifest,
+        sources=np.load(paths["sources"], mmap_mode=mode) if os.path.exists(paths["sources"]) else None,
+    )
+
+
+def load_snapshot(directory: str = SNAPSHOT_DIR, mmap: bool = True) -> Optional[Snapshot]:
+    """Load the current snapshot, memory-mapping the arrays. Returns None if none exists."""
+    manifest = read_manifest(directory)
+    if manifest is None:
+        return None
+    try:
+        return _load(directory, manifest, mmap)
+    except FileNotFoundError:
+        # two versions were published while this one was being opened and it got pruned
+        return _load(directory, read_manifest(directory) or manifest, mmap)
+
+
+def read_metadata(directory: str = SNAPSHOT_DIR, columns: Optional[list[str]] = None) -> Optional[pa.Table]:
+    """Metadata table of the current snapshot version (or selected columns). Returns None if none exists."""
+    manifest = read_manifest(directory)
+    if manifest is None:
+        return None
+    try:
+        return pq.read_table(_paths(directory, manifest.get("data", ""))["metadata"], columns=columns)
+    except FileNotFoundError:
+        manifest = read_manifest(directory) or manifest
+        return pq.read_table(_paths(directory, manifest.get("data", ""))["metadata"], columns=columns)
+
+
+def _write_atomic(path: str, write) -> None:
+    tmp = f"{path}.tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def source_codes(metadata: pa.Table) -> tuple[np.ndarray, list[str]]:
+    """int16 code per row into the sorted list of distinct sources, -1 where a row has none."""
+    column = metadata.column("source")
+    names = sorted(s for s in pc.unique(column).to_pylist() if s)
+    codes = pc.fill_null(pc.index_in(column, value_set=pa.array(names, type=pa.string())), -1)
+    return codes.to_numpy().astype(np.int16), names
+
+
+def _prune(directory: str, keep: set[str], flat: list[str]) -> None:
+    """Remove version directories (and the old flat-layout files in `flat`) that no reader can still be opening."""
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith("v") and name[1:].isdigit() and name not in keep and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+    if "" not in keep:
+        for path in flat:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def write_snapshot(directory: str, ids: np.ndarray, embeddings: np.ndarray, metadata: pa.Table, manifest: dict) -> None:
+    """Write a new version directory, then publish it by swapping the manifest."""
+    os.makedirs(directory, exist_ok=True)
+    previous = read_manifest(directory)
+    data = f"v{manifest['version']}"
+    if previous and previous.get("data") == data:
+        raise ValueError(f"Snapshot version {manifest['version']} is already published in {directory}")
+    folder = os.path.join(directory, data)
+    # a leftover from a sync that died before publishing it
+    shutil.rmtree(folder, ignore_errors=True)
+    os.makedirs(folder)
+    paths = _paths(directory, data)
+
+    codes, names = source_codes(metadata)
+    np.save(paths["embeddings"], np.ascontiguousarray(embeddings, dtype=np.float32))
+    np.save(paths["ids"], np.ascontiguousarray(ids, dtype=np.int64))
+    np.save(paths["sources"], codes)
+    pq.write_table(metadata, paths["metadata"], compression="zstd")
+    manifest["data"] = data
+    manifest["sources"] = names
+
+    def write_manifest(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+    _write_atomic(paths["manifest"], write_manifest)
+    flat = [_paths(directory)[key] for key in ("embeddings", "ids", "sources", "metadata")]
+    _prune(directory, {data, previous.get("data", "") if previous else data}, flat)
+
+
+def write_version(directory: str, arrays: dict[str, np.ndarray], meta: dict) -> None:
+    """
+    Store a job's output (the map, dedup clusters, neighbor graph) the way snapshots
+    are stored: each array as `<name>.npy` in a new `v<n>/` directory, published by
+    swapping `meta.json`, whose `data` names the directory.
+    """
+    os.makedirs(directory, exist_ok=True)
+    meta_path = os.path.join(directory, "meta.json")
+    previous = _read_json(meta_path)
+    last = previous.get("data", "") if previous else ""
+    data = f"v{int(last[1:]) + 1 if last else 1}"
+    folder = os.path.join(directory, data)
+    shutil.rmtree(folder, ignore_errors=True)
+    os.makedirs(folder)
+    for name, arr in arrays.items():
+        np.save(os.path.join(folder, f"{name}.npy"), arr)
+    meta["data"] = data
+
+    def write_meta(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+    _write_atomic(meta_path, write_meta)
+    # files next to meta.json are from before outputs were versioned
+    flat = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith((".npy", ".npz"))]
+    _prune(directory, {data, last or data}, flat)
+
+
+def read_version(
+    directory: str, names: list[str], mmap_mode: Optional[str] = None
+) -> Optional[tuple[dict, dict[str, np.ndarray]]]:
+    """(meta, {name: array}) of the version `write_version` last published in `directory`, or None."""
+    meta = _read_json(os.path.join(directory, "meta.json"))
+    if meta is None or not meta.get("data"):
+        # nothing built yet, or an unversioned output from an older build that the next run replaces
+        return None
+
+    def load(meta: dict) -> dict[str, np.ndarray]:
+        folder = os.path.join(directory, meta["data"])
+        return {name: np.load(os.path.join(folder, f"{name}.npy"), mmap_mode=mmap_mode) for name in names}
+
+    try:
+        return meta, load(meta)
+    except FileNotFoundError:
+        # two versions were published while this one was being opened and it got pruned
+        meta = _read_json(os.path.join(directory, "meta.json")) or meta
+        return meta, load(meta)
+
+
+def sync_snapshot(
+    directory: str = SNAPSHOT_DIR,
+    full: bool = False,
+    page_size: int = PAGE_SIZE,
+    changed_column: Optional[str] = None,
+) -> dict:
+    """Create or incrementally update the snapshot and return its manifest."""
+    started = time.perf_counter()
+    synced_at = datetime.now(timezone.utc).isoformat()
+    previous = read_manifest(directory)
+    existing = None if full else load_snapshot(directory, mmap=True)
+
+    if existing is None:
+        rows, matrix = _fetch(0, page_size)
+        ids = np.array([r["id"] for r in rows], dtype=np.int64)
+        table = _rows_to_table(rows)
+        appended, updated = len(rows), 0
+    else:
+        last_id = int(existing.manifest.get("last_id", 0))
+        new_rows, new_matrix = _fetch(last_id, page_size)
+
+        ids = np.asarray(existing.ids)
+        matrix = np.array(existing.embeddings, dtype=np.float32)  # copy, the mmap is read-only
+        table = existing.metadata
+        updated = 0
+
+        since = existing.manifest.get("synced_at")
+        if changed_column and since:
+            changed_rows, changed_matrix = _fetch(0, page_size, changed_column, since)
+            changed_ids = np.array([r["id"] for r in changed_rows], dtype=np.int64)
+            in_snapshot = np.isin(changed_ids, ids)
+            if in_snapshot.any():
+                positions = np.searchsorted(ids, changed_ids[in_snapshot])
+                matrix[positions] = changed_matrix[in_snapshot]
+                current = table.to_pylist()
+                changed_table = _rows_to_table([r for r, ok in zip(changed_rows, in_snapshot) if ok]).to_pylist()
+                for pos, row in zip(positions, changed_table):
+                    current[pos] = row
+                table = pa.Table.from_pylist(current, schema=METADATA_SCHEMA)
+                updated = int(in_snapshot.sum())
+
+        if new_rows:
+            if matrix.shape[0] and new_matrix.shape[1] != matrix.shape[1]:
+                raise ValueError(
+                    f"Embedding dimensionality changed ({matrix.shape[1]} -> {new_matrix.shape[1]}), run with --full"
+                )
+            ids = np.concatenate([ids, np.array([r["id"] for r in new_rows], dtype=np.int64)])
+            matrix = np.concatenate([matrix, new_matrix]) if matrix.shape[0] else new_matrix
+            table = pa.concat_tables([table, _rows_to_table(new_rows)])
+        appended = len(new_rows)
+
+    manifest = {
+        "version": (previous.get("version", 0) + 1) if previous else 1,
+        "rows": int(ids.shape[0]),
+        "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+        "last_id": int(ids[-1]) if ids.shape[0] else 0,
+        "synced_at": synced_at,
+        "changed_column": changed_column,
+        # SearchCorpus.extended reads these: a version that only appended rows extends
+        # copies of the in-memory indexes instead of rebuilding them
+        "appended": appended,
+        "updated": updated,
+        "full": existing is None,
+    }
+    if appended or updated or existing is None:
+        write_snapshot(directory, ids, matrix, table, manifest)
+    else:
+        manifest = existing.manifest
+    print(
+        f"Snapshot {directory}: {manifest['rows']} rows, +{appended} new, {updated} updated "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    return manifest
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Export the projects table to a local snapshot (npy + parquet)")
+    ap.add_argument("--dir", type=str, default=SNAPSHOT_DIR, help="Snapshot directory")
+    ap.add_argument("--full", action="store_true", help="Ignore the existing snapshot and export everything")
+    ap.add_argument("--page-size", type=int, default=PAGE_SIZE, help="Rows per request")
+    ap.add_argument(
+        "--changed-column",
+        type=str,
+        default=None,
+        help="Timestamp column (e.g. updated_at) used to refresh rows changed since the last sync",
+    )
+    args = ap.parse_args()
+    sync_snapshot(args.dir, full=args.full, page_size=args.page_size, changed_column=args.changed_column)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,39 @@
 import os
+import threading
 
 from dotenv import load_dotenv
-from supabase import create_client
 
 load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supa_base_client = create_client(SUPABASE_URL, SUPABASE_KEY)  # pyright: ignore[reportArgumentType]
+
+# created on first use: importing the SDK and building the client is a large share of API start-up
+supa_base_client = None
+_lock = threading.Lock()
+
+
+def supabase_configured() -> bool:
+    return bool(SUPABASE_URL and SUPABASE_KEY)
+
+
+def get_supabase():
+    """The Supabase client used by the services; call this instead of importing the client directly."""
+    global supa_base_client
+    if supa_base_client is None:
+        with _lock:
+            if supa_base_client is None:
+                from supabase import create_client
+
+                supa_base_client = create_client(SUPABASE_URL, SUPABASE_KEY)  # pyright: ignore[reportArgumentType]
+    return supa_base_client
+
+
+def set_supabase(client) -> None:
+    """Swap in another client (e.g. the fakes in benchmarks/)."""
+    global supa_base_client
+    supa_base_client = client
+
+
+def warm_up() -> None:
+    """Create the client and open its connection with a one-row query, so the first request doesn't pay for it."""
+    get_supabase().table("projects").select("id").limit(1).execute()
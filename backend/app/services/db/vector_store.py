@@ -0,0 +1,296 @@
+"""
+Vector search backends behind one interface, used by the search engine (and so
+by /search, /projects and /chat).
+
+  SupabaseVectorStore  the match_projects RPCs over PostgREST (default)
+  PgVectorStore        the same SQL functions over a pooled asyncpg connection,
+                       with vectors sent and received in pgvector's binary form
+                       instead of 1536 JSON floats per call
+  MemoryVectorStore    exact NumPy search over rows held in process, for tests,
+                       benchmarks, or serving straight from the local snapshot
+
+VECTOR_STORE picks the backend ("supabase", "pgvector" or "memory"). The pgvector
+backend connects to DATABASE_URL; behind a transaction pooler (Supabase port 6543)
+set PGVECTOR_STATEMENT_CACHE=0, since prepared statements don't survive it.
+"""
+
+import asyncio
+import json
+import os
+import struct
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.services.corpus.snapshot import parse_embeddings
+from app.services.db.supa_base_client import get_supabase
+from app.services.search.filters import MetadataFilters
+
+load_dotenv()
+VECTOR_STORE = os.getenv("VECTOR_STORE", "supabase").lower()
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+PGVECTOR_POOL_MIN = int(os.getenv("PGVECTOR_POOL_MIN", "1"))
+PGVECTOR_POOL_MAX = int(os.getenv("PGVECTOR_POOL_MAX", "10"))
+PGVECTOR_STATEMENT_CACHE = int(os.getenv("PGVECTOR_STATEMENT_CACHE", "100"))
+PGVECTOR_TIMEOUT_SECONDS = float(os.getenv("PGVECTOR_TIMEOUT_SECONDS", "10"))
+
+# rows returned by match_projects / match_projects_filtered when no count is given
+MATCH_COUNT = 20
+
+
+class VectorStore(ABC):
+    """Nearest projects by embedding. Rows have the match_projects shape plus `similarity`."""
+
+    @abstractmethod
+    def match(self, embedding, sources: Optional[list[str]] = None) -> list[dict]:
+        """Top MATCH_COUNT projects for a query embedding, optionally limited to some sources."""
+
+    def match_filtered(
+        self, embedding, sources: Optional[list[str]], filters: MetadataFilters, count: int = MATCH_COUNT
+    ) -> list[dict]:
+        """Metadata-filtered match; by default post-filters `match`, backends push it into the query."""
+        return [r for r in self.match(embedding, sources) if filters.matches(r)][:count]
+
+    @abstractmethod
+    def embeddings(self, ids: list[int]) -> dict[int, np.ndarray]:
+        """Stored embeddings by project id; ids without one are left out."""
+
+    def warm_up(self) -> None:
+        pass
+
+
+class SupabaseVectorStore(VectorStore):
+    def match(self, embedding, sources: Optional[list[str]] = None) -> list[dict]:
+        response = get_supabase().rpc(
+            "match_projects",
+            {"query_embedding": _as_list(embedding), "sources": sources},
+        ).execute()
+        return response.data if response.data else []
+
+    def match_filtered(
+        self, embedding, sources: Optional[list[str]], filters: MetadataFilters, count: int = MATCH_COUNT
+    ) -> list[dict]:
+        """Filters pushed into SQL (sql/match_projects_filtered.sql); post-filters match_projects if it isn't deployed."""
+        try:
+            response = get_supabase().rpc(
+                "match_projects_filtered",
+                {"query_embedding": _as_list(embedding), "sources": sources, **filters.rpc_params(), "match_count": count},
+            ).execute()
+            return response.data if response.data else []
+        except Exception as e:
+            print(f"match_projects_filtered failed, filtering match_projects results instead: {e}")
+            return super().match_filtered(embedding, sources, filters, count)
+
+    def embeddings(self, ids: list[int]) -> dict[int, np.ndarray]:
+        if not ids:
+            return {}
+        res = get_supabase().table("projects").select("id, embedding").in_("id", list(ids)).execute()
+        fetched = res.data or []
+        matrix, keep = parse_embeddings([r.get("embedding") for r in fetched])
+        return {row["id"]: vector for row, vector in zip([r for r, k in zip(fetched, keep) if k], matrix)}
+
+
+def _as_list(embedding) -> list[float]:
+    return embedding.tolist() if isinstance(embedding, np.ndarray) else list(embedding)
+
+
+# pgvector binary format: int16 dimensions, int16 unused, then big-endian float4 values
+def encode_vector(value) -> bytes:
+    v = np.asarray(value, dtype=">f4")
+    return struct.pack(">HH", v.shape[0], 0) + v.tobytes()
+
+
+def decode_vector(data: bytes) -> np.ndarray:
+    dim, _ = struct.unpack_from(">HH", data)
+    return np.frombuffer(data, dtype=">f4", count=dim, offset=4).astype(np.float32)
+
+
+class PgVectorStore(VectorStore):
+    """
+    Direct Postgres connections from an asyncpg pool. The engine is synchronous, so
+    the pool lives on its own event loop thread and calls block on the result.
+    """
+
+    def __init__(
+        self,
+        dsn: str = DATABASE_URL,
+        min_size: int = PGVECTOR_POOL_MIN,
+        max_size: int = PGVECTOR_POOL_MAX,
+        statement_cache_size: int = PGVECTOR_STATEMENT_CACHE,
+        timeout: float = PGVECTOR_TIMEOUT_SECONDS,
+    ):
+        if not dsn:
+            raise ValueError("VECTOR_STORE=pgvector needs DATABASE_URL")
+        import asyncpg
+
+        self.timeout = timeout
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="pgvector-pool", daemon=True).start()
+        try:
+            self._pool = self._run(
+                asyncpg.create_pool(
+                    dsn,
+                    min_size=min_size,
+                    max_size=max_size,
+                    statement_cache_size=statement_cache_size,
+                    init=self._init_connection,
+                )
+            )
+        except Exception:
+            # the next get_vector_store() retries with a fresh loop
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            raise
+
+    @staticmethod
+    async def _init_connection(conn) -> None:
+        # pgvector may live outside `public` (Supabase installs it in `extensions`)
+        schema = await conn.fetchval(
+            "select n.nspname from pg_type t join pg_namespace n on n.oid = t.typnamespace where t.typname = 'vector'"
+        )
+        await conn.set_type_codec(
+            "vector", schema=schema or "public", encoder=encode_vector, decoder=decode_vector, format="binary"
+        )
+        await conn.set_type_codec("jsonb", schema="pg_catalog", encoder=json.dumps, decoder=json.loads)
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(self.timeout)
+
+    def _fetch(self, query: str, *args) -> list[dict]:
+        async def fetch():
+            async with self._pool.acquire() as conn:
+                return await conn.fetch(query, *args)
+
+        return [dict(r) for r in self._run(fetch())]
+
+    def match(self, embedding, sources: Optional[list[str]] = None) -> list[dict]:
+        return self._fetch(
+            "select * from match_projects(query_embedding => $1, sources => $2)",
+            np.asarray(embedding, dtype=np.float32),
+            sources,
+        )
+
+    def match_filtered(
+        self, embedding, sources: Optional[list[str]], filters: MetadataFilters, count: int = MATCH_COUNT
+    ) -> list[dict]:
+        params = {"query_embedding": np.asarray(embedding, dtype=np.float32), "sources": sources}
+        params.update(filters.rpc_params())
+        params["match_count"] = count
+        # argument names come from rpc_params(), never from the request
+        named = ", ".join(f"{name} => ${i}" for i, name in enumerate(params, 1))
+        try:
+            return self._fetch(f"select * from match_projects_filtered({named})", *params.values())
+        except Exception as e:
+            print(f"match_projects_filtered failed, filtering match_projects results instead: {e}")
+            return super().match_filtered(embedding, sources, filters, count)
+
+    def embeddings(self, ids: list[int]) -> dict[int, np.ndarray]:
+        if not ids:
+            return {}
+        rows = self._fetch(
+            "select id, embedding from projects where id = any($1::bigint[]) and embedding is not null", list(ids)
+        )
+        return {r["id"]: r["embedding"] for r in rows}
+
+    def warm_up(self) -> None:
+        self._fetch("select 1")
+
+
+class MemoryVectorStore(VectorStore):
+    """Exact cosine search over `rows` (match_projects columns) and their embedding matrix."""
+
+    def __init__(self, rows: list[dict], embeddings: np.ndarray, normalize: bool = True):
+        n = min(len(rows), len(embeddings))
+        self.rows = rows[:n]
+        matrix = np.asarray(embeddings[:n], dtype=np.float32)
+        if normalize and n:
+            matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        self.matrix = matrix
+        self.ids = [r["id"] for r in self.rows]
+        self._sources = np.array([r.get("source") for r in self.rows], dtype=object)
+        self._position = {pid: i for i, pid in enumerate(self.ids)}
+
+    def _top(self, embedding, mask: Optional[np.ndarray], count: int) -> list[dict]:
+        q = np.asarray(embedding, dtype=np.float32)
+        q = q / (np.linalg.norm(q) or 1.0)
+        candidates = np.arange(len(self.rows)) if mask is None else np.flatnonzero(mask)
+        if not candidates.size:
+            return []
+        scores = self.matrix[candidates] @ q if mask is not None else self.matrix @ q
+        if candidates.size > count:
+            top = np.argpartition(-scores, count)[:count]
+        else:
+            top = np.arange(candidates.size)
+        top = top[np.argsort(-scores[top])]
+        return [{**self.rows[candidates[i]], "similarity": float(scores[i])} for i in top]
+
+    def _source_mask(self, sources: Optional[list[str]]) -> Optional[np.ndarray]:
+        return np.isin(self._sources, sources) if sources else None
+
+    def match(self, embedding, sources: Optional[list[str]] = None) -> list[dict]:
+        return self._top(embedding, self._source_mask(sources), MATCH_COUNT)
+
+    def match_filtered(
+        self, embedding, sources: Optional[list[str]], filters: MetadataFilters, count: int = MATCH_COUNT
+    ) -> list[dict]:
+        mask = np.array([filters.matches(r) for r in self.rows], dtype=bool)
+        source_mask = self._source_mask(sources)
+        return self._top(embedding, mask if source_mask is None else mask & source_mask, count)
+
+    def embeddings(self, ids: list[int]) -> dict[int, np.ndarray]:
+        return {pid: self.matrix[self._position[pid]] for pid in ids if pid in self._position}
+
+
+_store: Optional[VectorStore] = None  # built from VECTOR_STORE
+_override: Optional[VectorStore] = None  # set_vector_store()
+_memory: Optional[MemoryVectorStore] = None
+_memory_source = None
+_lock = threading.Lock()
+
+
+def _corpus_store() -> MemoryVectorStore:
+    """Memory store over the local snapshot, rebuilt when the corpus swaps its embedding matrix."""
+    global _memory, _memory_source
+    from app.services.search.corpus import get_corpus
+
+    corpus = get_corpus()
+    if corpus is None:
+        raise RuntimeError("VECTOR_STORE=memory needs a local snapshot (see SNAPSHOT_DIR)")
+    with _lock:
+        if _memory is None or _memory_source is not corpus.embeddings:
+            # snapshot embeddings are unit length already, so the matrix is used as it is
+            _memory = MemoryVectorStore(corpus.rows, corpus.embeddings, normalize=False)
+            _memory_source = corpus.embeddings
+        return _memory
+
+
+def get_vector_store() -> VectorStore:
+    """The configured backend, created on first use."""
+    global _store
+    if _override is not None:
+        return _override
+    if VECTOR_STORE == "memory":
+        return _corpus_store()
+    if _store is None:
+        with _lock:
+            if _store is None:
+                if VECTOR_STORE == "pgvector":
+                    _store = PgVectorStore()
+                elif VECTOR_STORE == "supabase":
+                    _store = SupabaseVectorStore()
+                else:
+                    raise ValueError(f"Unknown VECTOR_STORE {VECTOR_STORE!r} (supabase, pgvector or memory)")
+    return _store
+
+
+def set_vector_store(store: Optional[VectorStore]) -> None:
+    """Swap in another backend (e.g. a MemoryVectorStore in benchmarks/); None goes back to VECTOR_STORE."""
+    global _override
+    _override = store
+
+
+def warm_up() -> None:
+    """Create the backend (for pgvector: open the pool) ahead of the first search."""
+    get_vector_store().warm_up()
@@ -0,0 +1,201 @@
+"""
+Persistent on-disk embedding cache.
+
+Vectors are stored in a local SQLite file keyed by sha256(model + dimensions + text)
+as packed float32 blobs, so re-running an ingest over the same dumps never pays
+OpenAI twice for the same text. Only ingest uses it (`embed_texts(..., use_cache=True)`);
+search and chat queries are embedded without it. Old entries are evicted least-recently-used once
+the cache grows past `max_bytes`. The size is tracked as a running total (re-read
+from the file only when it says the cache is full), and last-used times of hits
+are buffered in memory and written in batches, so lookups never write.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Iterable, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", ".cache/embeddings.sqlite")
+EMBED_CACHE_MAX_MB = int(os.getenv("EMBED_CACHE_MAX_MB", "1024"))
+
+# SQLite caps the number of bound parameters per statement
+_LOOKUP_CHUNK = 500
+# buffered last_used updates are written once this many hits are pending (and before eviction)
+_TOUCH_FLUSH = 1000
+# eviction frees down to this share of max_bytes, so a full cache isn't scanned again on the next put
+_EVICT_TARGET = 0.9
+
+
+def cache_key(model: str, dimensions: Optional[int], text: str) -> str:
+    """Content hash used as the cache key."""
+    h = hashlib.sha256()
+    h.update(model.encode("utf-8"))
+    h.update(b"\x00")
+    h.update(str(dimensions or "").encode("utf-8"))
+    h.update(b"\x00")
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()
+
+
+def pack_vector(vector: Iterable[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def unpack_vector(blob: bytes) -> list[float]:
+    vec = array("f")
+    vec.frombytes(blob)
+    return vec.tolist()
+
+
+class EmbeddingCache:
+    """SQLite backed key -> float32 vector store with size based LRU eviction."""
+
+    def __init__(self, path: str = EMBED_CACHE_PATH, max_bytes: int = EMBED_CACHE_MAX_MB * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        self._size = self._sum_sizes()
+        self._touched: dict[str, float] = {}  # key -> last_used not yet written
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        """Look up many keys at once, returning only the hits."""
+        found: dict[str, list[float]] = {}
+        unique = list(dict.fromkeys(keys))
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(unique), _LOOKUP_CHUNK):
+                chunk = unique[start : start + _LOOKUP_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = unpack_vector(blob)
+                    self._touched[key] = now
+            if len(self._touched) >= _TOUCH_FLUSH:
+                self._flush_touched()
+        return found
+
+    def _flush_touched(self) -> None:
+        """Write buffered last_used times; caller holds the lock."""
+        if not self._touched:
+            return
+        self._conn.executemany(
+            "UPDATE embeddings SET last_used = ? WHERE key = ?",
+            [(used, key) for key, used in self._touched.items()],
+        )
+        self._conn.commit()
+        self._touched.clear()
+
+    def _sum_sizes(self) -> int:
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()
+        return int(total)
+
+    def put_many(self, items: dict[str, list[float]]) -> None:
+        """Store vectors and evict old entries if the cache is over budget."""
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for key, vector in items.items():
+            blob = pack_vector(vector)
+            rows.append((key, blob, len(blob), now))
+        keys = [row[0] for row in rows]
+        with self._lock:
+            # replaced entries only add the difference to the running total
+            replaced = 0
+            for start in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[start : start + _LOOKUP_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                (size,) = self._conn.execute(
+                    f"SELECT COALESCE(SUM(size), 0) FROM embeddings WHERE key IN ({marks})", chunk
+                ).fetchone()
+                replaced += int(size)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, size, last_used) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            self._size += sum(row[2] for row in rows) - replaced
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def size_bytes(self) -> int:
+        """Bytes of vectors stored, as tracked by this process."""
+        return self._size
+
+    def evict(self) -> int:
+        """Drop least recently used entries once over `max_bytes`, down to _EVICT_TARGET of it."""
+        with self._lock:
+            # other processes may share the file: re-read the real size before deleting anything
+            self._size = self._sum_sizes()
+            total = self._size
+            if total <= self.max_bytes:
+                return 0
+            self._flush_touched()
+            target = self.max_bytes * _EVICT_TARGET
+            cursor = self._conn.execute("SELECT key, size FROM embeddings ORDER BY last_used ASC")
+            stale = []
+            for key, size in cursor:
+                if total <= target:
+                    break
+                stale.append((key,))
+                total -= size
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", stale)
+            self._conn.commit()
+            self._size = total
+        return len(stale)
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touched()
+            self._conn.close()
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_failed = False
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[EmbeddingCache]:
+    """
+    Shared cache instance, or None when EMBED_CACHE_PATH is set to an empty string
+    or the file cannot be opened (e.g. a read-only filesystem): embedding then
+    simply goes uncached.
+    """
+    global _cache, _cache_failed
+    if not EMBED_CACHE_PATH or _cache_failed:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None and not _cache_failed:
+                try:
+                    _cache = EmbeddingCache()
+                except (OSError, sqlite3.Error) as e:
+                    print(f"Warning: embedding cache at {EMBED_CACHE_PATH} unavailable, not caching: {e}")
+                    _cache_failed = True
+    return _cache
@@ -2,18 +2,10 @@
 This script reads a JSON file that was outputed from devpost.py scraper. It will use all of the data from the JSON
 in order to append to the Supabase 'projects' table with embeddings generated from OpenAI.
 """
-import os 
-from app.services.db.supa_base_client import supa_base_client
-from openai import OpenAI
+from app.services.db.supa_base_client import get_supabase
+from app.services.embedder.embedder import embed_texts
+from app.services.embedder.text import EmbedTextStats, build_embed_text
 import json
-import dotenv
-
-dotenv.load_dotenv()
-
-openAiKey = os.getenv("OPENAI_API_KEY")
-
-openmod = OpenAI(api_key=openAiKey)
-EMBED_MODEL = "text-embedding-3-small"
 
 # Load the JSON file
 # THE FILE MUST BE IN SAME DIRECTORY AS THIS FOLDER, RIGHT NOW IT IS IN /backend/app/services/scraper/
@@ -34,7 +26,7 @@ def supaCheck(link: str) -> bool:
 
     try:
         res = (
-            supa_base_client.table("projects")
+            get_supabase().table("projects")
             .select("url", count="exact")
             .eq("url", link)
             .limit(1)
@@ -47,28 +39,28 @@ def supaCheck(link: str) -> bool:
         return True  # fail closed
 
 
-#Iterate through every item in the projects json file
+#Iterate through every item in the projects json file, keeping the ones not stored yet
+pending = []
 for item in projects:
 
-    # Prepare the text to embed
-    embed_text = " ".join(filter(None, [
-        item.get("name"),
-        item.get("short_description"),
-        item.get("long_description"),
-        item.get("source"),
-    ]))
-
     # Check if the URL is already in the supabase table
     if supaCheck(item.get("url")):
         print("Skipping project since found in supabase:", item.get("url"))
         continue
+    pending.append(item)
 
-    # create embedding
-    response = openmod.embeddings.create(
-        input=embed_text,
-        model=EMBED_MODEL,
-    )
-    emb = response.data[0].embedding
+# Prepare the text to embed
+stats = EmbedTextStats()
+embed_inputs = [build_embed_text(item, stats=stats) for item in pending]
+print(stats.summary())
+
+# create embeddings in batches, already embedded text is served from the local cache
+embeddings = embed_texts(embed_inputs, use_cache=True)
+
+for item, emb in zip(pending, embeddings):
+    if emb is None:
+        print("Skipping project with nothing to embed:", item.get("url"))
+        continue
 
     #Print the number of the item being inserted:
     count += 1
@@ -76,7 +68,7 @@ for item in projects:
 
     # insert
     supaResponse = (
-        supa_base_client.table("projects")
+        get_supabase().table("projects")
         .insert({
             "name": item.get("name"),
             "short_description": item.get("short_description"),
@@ -1,51 +1,120 @@
 import os
+import threading
+from typing import Optional
 
-from app.services.db.supa_base_client import supa_base_client
+from app.services.db.supa_base_client import get_supabase
+from app.services.embedder.cache import cache_key, get_cache
+from app.services.embedder.text import EmbedTextStats, build_embed_text
+from app.services.telemetry import stage
 from dotenv import load_dotenv
-from openai import OpenAI
 
 load_dotenv()
 OPENAI_KEY = os.getenv("OPENAI_KEY")
-openai_client = OpenAI(api_key=OPENAI_KEY)
+# created on first use, the openai package alone takes a large share of API start-up
+openai_client = None
+_client_lock = threading.Lock()
 
 EMBEDDING_MODEL = "text-embedding-3-small"
+# OpenAI accepts up to 2048 inputs per embeddings request
+EMBED_BATCH_SIZE = 256
 
 
-def embded_query(text: str):
-    """Generate embedding for a given text query."""
-    embedding = openai_client.embeddings.create(
-        model=EMBEDDING_MODEL,
-        input=text,
-    )
-    return embedding.data[0].embedding
+def get_openai():
+    global openai_client
+    if openai_client is None:
+        with _client_lock:
+            if openai_client is None:
+                from openai import OpenAI
 
+                openai_client = OpenAI(api_key=OPENAI_KEY)
+    return openai_client
 
-def store_in_db_yc(projects):
-    """Generate Embedding and store in Supabase."""
-    for project in projects:
-        existing = (
-            supa_base_client.table("projects")
-            .select("id")
-            .eq("url", project.url)
-            .execute()
-        )
-        if existing.data:
-            print(f"Skipping storing : {project.name}")
-            continue
-        # ---- Generate embedding with important fields ----
-        text_to_embed = f"""
-        Project name: {project.name}
-        Short description: {project.short_description}
-        Long description: {project.long_description}
-        Tags: {", ".join(project.tags)}
-        Batch: {project.batch}
-        Source: {project.source}
-        """
-        embedding = openai_client.embeddings.create(
-            model=EMBEDDING_MODEL,
-            input=text_to_embed,
+
+def set_openai(client) -> None:
+    """Swap in another client with the same `embeddings.create` interface (e.g. benchmarks/)."""
+    global openai_client
+    openai_client = client
+
+
+def warm_up() -> None:
+    """Create the client and open its connection (model lookups are free), ahead of the first embedding."""
+    get_openai().models.retrieve(EMBEDDING_MODEL)
+
+
+def embed_texts(
+    texts: list[str],
+    model: str = EMBEDDING_MODEL,
+    dimensions: Optional[int] = None,
+    use_cache: bool = False,
+) -> list[Optional[list[float]]]:
+    """
+    Embed many texts in batches. Blank texts are not sent and come back as None.
+    Ingest passes use_cache=True to serve repeats from the on-disk cache; queries
+    are embedded directly so the API never touches the cache file.
+    """
+    cache = get_cache() if use_cache else None
+    keys = [cache_key(model, dimensions, t) if t and t.strip() else None for t in texts]
+    found = cache.get_many([k for k in keys if k]) if cache else {}
+
+    missing = list(dict.fromkeys(k for k in keys if k and k not in found))
+    text_by_key = dict(zip(keys, texts))
+    fresh = {}
+    for start in range(0, len(missing), EMBED_BATCH_SIZE):
+        chunk = missing[start : start + EMBED_BATCH_SIZE]
+        kwargs = {"dimensions": dimensions} if dimensions else {}
+        response = get_openai().embeddings.create(
+            model=model,
+            input=[text_by_key[k] for k in chunk],
+            **kwargs,
         )
+        for key, item in zip(chunk, response.data):
+            fresh[key] = item.embedding
 
+    if cache and fresh:
+        cache.put_many(fresh)
+    found.update(fresh)
+    return [found[k] if k else None for k in keys]
+
+
+def embded_query(text: str) -> Optional[list[float]]:
+    """Generate embedding for a given text query (None for a blank query)."""
+    return embed_texts([text])[0]
+
+
+def store_in_db_yc(projects, check_existing: bool = True):
+    """
+    Generate Embedding and store in Supabase. Projects whose url is already stored
+    are skipped; callers that dedup against the table themselves (the scraper
+    orchestrator) pass check_existing=False to save a query per project.
+    """
+    pending = list(projects)
+    if check_existing:
+        pending = []
+        with stage("dedup"):
+            for project in projects:
+                existing = (
+                    get_supabase().table("projects")
+                    .select("id")
+                    .eq("url", project.url)
+                    .execute()
+                )
+                if existing.data:
+                    print(f"Skipping storing : {project.name}")
+                    continue
+                pending.append(project)
+
+    # ---- Generate embedding with important fields ----
+    with stage("embed"):
+        stats = EmbedTextStats()
+        texts = [build_embed_text(project, stats=stats) for project in pending]
+        if texts:
+            print(stats.summary())
+        embeddings = embed_texts(texts, use_cache=True)
+
+    for project, embedding in zip(pending, embeddings):
+        if embedding is None:
+            print(f"Skipping storing (nothing to embed): {project.name}")
+            continue
         # ---- Group data and store in Supabase ----
         data = {
             "name": project.name,
@@ -54,7 +123,7 @@ def store_in_db_yc(projects):
             "tags": project.tags,
             "source": project.source,
             "url": project.url,
-            "embedding": embedding.data[0].embedding,
+            "embedding": embedding,
             "metadata": {
                 "batch": project.batch,
                 "founded": project.founded,
@@ -64,4 +133,5 @@ def store_in_db_yc(projects):
                 "location": project.location,
             },
         }
-        supa_base_client.table("projects").insert(data).execute()
+        with stage("store", project.url):
+            get_supabase().table("projects").insert(data).execute()
@@ -0,0 +1,153 @@
+"""
+Builds the text we send to the embedder, shared by every ingester.
+
+Whitespace is collapsed, empty/placeholder fields are dropped, text repeated
+across fields (e.g. a short description copied into the long one) is only kept
+once, and each item is capped at EMBED_MAX_TOKENS so long pages don't eat the
+tokens-per-minute budget.
+"""
+
+import os
+import re
+from dataclasses import dataclass
+from typing import Optional, Union
+
+from dotenv import load_dotenv
+from pydantic import BaseModel
+
+load_dotenv()
+EMBED_MAX_TOKENS = int(os.getenv("EMBED_MAX_TOKENS", "512"))
+
+# tokenizer used by the text-embedding-3 models
+TOKENIZER_ENCODING = "cl100k_base"
+
+PLACEHOLDERS = {"", "none", "null", "n/a", "na", "unknown", "no description found", "-"}
+
+_encoding = None
+_encoding_failed = False
+
+
+def _get_encoding():
+    """tiktoken encoding, or None when it isn't installed / can't load its BPE file."""
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+        except Exception as e:
+            print(f"Warning: tiktoken unavailable, estimating tokens from length: {e}")
+            _encoding_failed = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    enc = _get_encoding()
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    # ~4 characters per token for English text
+    return (len(text) + 3) // 4
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    enc = _get_encoding()
+    if enc is not None:
+        tokens = enc.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return enc.decode(tokens[:max_tokens])
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars)
+    return text[: cut if cut > 0 else max_chars]
+
+
+def clean(value) -> Optional[str]:
+    """Collapse whitespace and drop placeholder values."""
+    if value is None:
+        return None
+    text = " ".join(str(value).split())
+    if text.lower().rstrip(".") in PLACEHOLDERS:
+        return None
+    return text
+
+
+def _key(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", text.lower()).strip()
+
+
+@dataclass
+class EmbedTextStats:
+    """Running totals for one ingest run."""
+
+    items: int = 0
+    raw_tokens: int = 0
+    tokens: int = 0
+    truncated: int = 0
+
+    @property
+    def saved(self) -> int:
+        return self.raw_tokens - self.tokens
+
+    def summary(self) -> str:
+        pct = (100 * self.saved / self.raw_tokens) if self.raw_tokens else 0.0
+        return (
+            f"Embed text: {self.items} items, {self.tokens} tokens "
+            f"(saved {self.saved} of {self.raw_tokens}, {pct:.1f}%), {self.truncated} truncated"
+        )
+
+
+def build_embed_text(
+    project: Union[BaseModel, dict],
+    max_tokens: int = EMBED_MAX_TOKENS,
+    stats: Optional[EmbedTextStats] = None,
+) -> str:
+    """Compact, deduplicated embedding text for a scraped project (ProjectYc or a scraper dict)."""
+    data = project.model_dump() if isinstance(project, BaseModel) else dict(project)
+
+    name = clean(data.get("name"))
+    short = clean(data.get("short_description"))
+    long = clean(data.get("long_description"))
+    if short and long:
+        if _key(short) in _key(long):
+            short = None
+        elif _key(long) in _key(short):
+            long = None
+
+    tags = []
+    seen = set()
+    for tag in data.get("tags") or []:
+        tag = clean(tag)
+        if tag and _key(tag) not in seen:
+            seen.add(_key(tag))
+            tags.append(tag)
+
+    lines = []
+    head = ": ".join(p for p in (name, short) if p)
+    if head:
+        lines.append(head)
+    if long:
+        lines.append(long)
+    if tags:
+        lines.append("Tags: " + ", ".join(tags))
+    for label, key in (("Batch", "batch"), ("Source", "source")):
+        value = clean(data.get(key))
+        if value:
+            lines.append(f"{label}: {value}")
+    text = "\n".join(lines)
+
+    tokens = count_tokens(text)
+    truncated = tokens > max_tokens
+    if truncated:
+        text = truncate_tokens(text, max_tokens)
+        tokens = count_tokens(text)
+
+    if stats is not None:
+        raw = " ".join(str(data.get(k) or "") for k in ("name", "short_description", "long_description", "batch", "source"))
+        raw += " " + ", ".join(str(t) for t in data.get("tags") or [])
+        stats.items += 1
+        stats.raw_tokens += count_tokens(raw)
+        stats.tokens += tokens
+        stats.truncated += int(truncated)
+    return text
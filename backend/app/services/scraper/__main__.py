@@ -0,0 +1,4 @@
+from app.services.scraper.orchestrator import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,569 @@
+"""
+Runs every scraper source from one config, concurrently.
+
+  python -m app.services.scraper                      # all enabled sources
+  python -m app.services.scraper --sources yc,devpost --config scrapers.toml
+  python -m app.services.scraper --dry-run            # write projects to a JSONL file, not Supabase
+
+Each source runs on its own thread: it loads its listing pages, drops the
+detail pages whose project is already known, then scrapes the rest with up to
+`concurrency` drivers at once, no faster than `rate` page loads per second.
+All sources borrow browsers from one shared driver pool (`drivers` in total),
+check one shared set of seen project URLs (preloaded from the projects table),
+and hand their projects to a single ingestion sink that embeds and stores them
+in batches.
+
+The config is TOML; anything left out keeps the defaults in DEFAULT_CONFIG:
+
+  drivers = 4
+  headless = true
+
+  [sources.yc]
+  batches = ["Fall 2024", "Winter 2025"]
+  limit = 150
+  concurrency = 2
+  rate = 0.5
+
+  [sources.topstartups]
+  enabled = false
+
+Every source writes its own telemetry run (see telemetry.py), and the sink
+writes one as "ingest".
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+import tomllib
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from copy import deepcopy
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Callable, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from dotenv import load_dotenv
+
+from app.services.scraper.telemetry import (
+    Profiler,
+    ScrapeRun,
+    add_arguments,
+    classify_failure,
+    record_failure,
+    stage,
+)
+
+load_dotenv()
+SCRAPER_CONFIG = os.getenv("SCRAPER_CONFIG", "scrapers.toml")
+
+DEFAULT_CONFIG = {
+    "drivers": 4,
+    "headless": True,
+    # projects per embed + insert batch, and the longest a project waits for its batch to fill
+    "batch_size": 50,
+    "flush_seconds": 30.0,
+    # seed the seen-URL set from the projects table so known projects aren't scraped again
+    "preload_seen": True,
+    "sources": {
+        "yc": {"batches": ["Fall 2024"], "limit": 150, "concurrency": 2, "rate": 0.5},
+        "devpost": {
+            "pages": 24,
+            "listing_url": "https://devpost.com/software/search?query=is%3Afeatured",
+            "limit": 0,
+            "concurrency": 2,
+            "rate": 0.5,
+        },
+        "productHunt": {"dates": ["2025-11-10"], "limit": 0, "concurrency": 1, "rate": 0.2},
+        "topstartups": {"url": "https://topstartups.io/", "concurrency": 1, "rate": 0.5},
+    },
+}
+
+
+def normalize_url(url: Optional[str]) -> Optional[str]:
+    """Key for comparing project URLs: no scheme, www., fragment, trailing slash or utm_* parameters."""
+    if not url:
+        return None
+    parts = urlparse(url.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith("utm_")])
+    return f"{host}{parts.path.rstrip('/')}" + (f"?{query}" if query else "")
+
+
+class SeenUrls:
+    """Project URLs already stored or scraped in this run, shared by every source and the sink."""
+
+    def __init__(self, urls=()):
+        self._seen = {u for u in map(normalize_url, urls) if u}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def __contains__(self, url) -> bool:
+        key = normalize_url(url)
+        return key is not None and key in self._seen
+
+    def add(self, url) -> bool:
+        """Mark a URL as seen; False if it already was. Projects without a URL are always new."""
+        key = normalize_url(url)
+        if key is None:
+            return True
+        with self._lock:
+            if key in self._seen:
+                return False
+            self._seen.add(key)
+            return True
+
+
+def stored_urls() -> list[str]:
+    """Every project URL in the projects table."""
+    from app.services.corpus.snapshot import fetch_pages
+
+    return [r["url"] for page in fetch_pages("id, url") for r in page if r.get("url")]
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across the threads that share it."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            with stage("throttle"):
+                time.sleep(slot - now)
+
+
+class DriverPool:
+    """Up to `size` browsers shared by all sources, started on first use and reused between pages."""
+
+    def __init__(self, factory: Callable, size: int):
+        self.factory = factory
+        self._slots = threading.Semaphore(size)
+        self._idle: list = []
+        self._all: list = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def driver(self):
+        with stage("pool"):
+            self._slots.acquire()
+        driver = None
+        try:
+            with self._lock:
+                driver = self._idle.pop() if self._idle else None
+            if driver is None:
+                driver = self.factory()
+                with self._lock:
+                    self._all.append(driver)
+            yield driver
+        except Exception as e:
+            # a crashed or disconnected browser is replaced, page-level errors keep it
+            if driver is not None and classify_failure(e) == "browser":
+                self._discard(driver)
+                driver = None
+            raise
+        finally:
+            if driver is not None:
+                with self._lock:
+                    self._idle.append(driver)
+            self._slots.release()
+
+    def _discard(self, driver) -> None:
+        with self._lock:
+            if driver in self._all:
+                self._all.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        with self._lock:
+            drivers, self._all, self._idle = self._all, [], []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+class IngestSink:
+    """
+    The one place scraped projects are written. Sources `put` projects from any
+    thread; a single thread drops URLs already seen and stores the rest in
+    batches of `batch_size` (or whatever has arrived after `flush_seconds`).
+    """
+
+    def __init__(
+        self,
+        store: Callable[[list], None],
+        seen: SeenUrls,
+        batch_size: int = 50,
+        flush_seconds: float = 30.0,
+        telemetry: Optional[str] = None,
+    ):
+        self.store = store
+        self.seen = seen
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.telemetry = telemetry
+        self.stored: dict[str, int] = {}
+        self.duplicates: dict[str, int] = {}
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="scraper-ingest", daemon=True)
+        self._thread.start()
+
+    def put(self, projects: list) -> None:
+        for project in projects:
+            self._queue.put(project)
+
+    def close(self) -> None:
+        """Store whatever is still queued and stop."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        with ScrapeRun("ingest", self.telemetry):
+            batch: list = []
+            first_at = 0.0
+            while True:
+                # a partial batch is stored once its first project has waited flush_seconds
+                timeout = max(0.0, first_at + self.flush_seconds - time.monotonic()) if batch else None
+                try:
+                    project = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    self._flush(batch)
+                    batch = []
+                    continue
+                if project is None:
+                    if batch:
+                        self._flush(batch)
+                    return
+                if not self.seen.add(project.url):
+                    self.duplicates[project.source] = self.duplicates.get(project.source, 0) + 1
+                    continue
+                if not batch:
+                    first_at = time.monotonic()
+                batch.append(project)
+                if len(batch) >= self.batch_size:
+                    self._flush(batch)
+                    batch = []
+
+    def _flush(self, batch: list) -> None:
+        try:
+            self.store(batch)
+        except Exception as e:
+            record_failure(e, "store")
+            print(f"[ingest] failed to store {len(batch)} projects: {e}")
+            return
+        for project in batch:
+            self.stored[project.source] = self.stored.get(project.source, 0) + 1
+        print(f"[ingest] stored {len(batch)} projects")
+
+
+class Source(ABC):
+    """
+    A scraper as the orchestrator runs it. `listing` loads the index pages and
+    returns detail tasks, or finished projects when `has_details` is False;
+    `detail` scrapes one task into projects on a pooled driver.
+    """
+
+    name = ""
+    has_details = True
+
+    @abstractmethod
+    def listing(self, driver, options: dict) -> list:
+        """Detail tasks from the index pages (finished projects when `has_details` is False)."""
+
+    @abstractmethod
+    def detail(self, driver, task, options: dict) -> list:
+        """Projects scraped from one listing task."""
+
+    def stored_url(self, task) -> Optional[str]:
+        """The project URL a task will be stored under, if it is known before scraping it."""
+        return None
+
+
+def _limit(items: list, options: dict) -> list:
+    return items[: options["limit"]] if options.get("limit") else items
+
+
+class YcSource(Source):
+    name = "yc"
+
+    def listing(self, driver, options: dict) -> list:
+        from app.services.scraper.yc import list_companies
+
+        return [card for batch in options["batches"] for card in _limit(list_companies(driver, batch), options)]
+
+    def detail(self, driver, task, options: dict) -> list:
+        from app.services.scraper.yc import scrape_company
+
+        return [scrape_company(driver, task)]
+
+    def stored_url(self, task) -> Optional[str]:
+        return task["url"]
+
+
+class DevpostSource(Source):
+    name = "devpost"
+
+    def listing(self, driver, options: dict) -> list:
+        from app.services.scraper.devpost import collect_project_links
+
+        return _limit(collect_project_links(driver, pages=options["pages"], listing_url=options["listing_url"]), options)
+
+    def detail(self, driver, task, options: dict) -> list:
+        from app.services.scraper.devpost import devpost_project, scrape_project
+
+        return [devpost_project(scrape_project(driver, task))]
+
+    def stored_url(self, task) -> Optional[str]:
+        return task
+
+
+class ProductHuntSource(Source):
+    name = "productHunt"
+
+    def listing(self, driver, options: dict) -> list:
+        from app.services.scraper.productHunt import daily_batch, list_products
+
+        tasks = []
+        for day in options["dates"]:
+            d = day if isinstance(day, date) else date.fromisoformat(day)
+            batch = daily_batch(d.year, d.month, d.day)
+            tasks += [(batch, url) for url in _limit(list_products(driver, d.year, d.month, d.day), options)]
+        return tasks
+
+    def detail(self, driver, task, options: dict) -> list:
+        from app.services.scraper.productHunt import scrape_link
+
+        batch, url = task
+        return scrape_link(driver, batch, url)
+
+
+class TopstartupsSource(Source):
+    name = "topstartups"
+    has_details = False
+
+    def listing(self, driver, options: dict) -> list:
+        from app.services.scraper.topstartups import load_page, scrape_page
+
+        load_page(driver, url=options["url"])
+        return scrape_page(driver)
+
+    def detail(self, driver, task, options: dict) -> list:
+        # the listing already returns finished projects
+        return [task]
+
+
+SOURCES: dict[str, Source] = {s.name: s for s in (YcSource(), DevpostSource(), ProductHuntSource(), TopstartupsSource())}
+
+
+@dataclass
+class SourceConfig:
+    name: str
+    enabled: bool = True
+    concurrency: int = 1
+    rate: float = 0.5
+    options: dict = field(default_factory=dict)
+
+
+def load_config(path: Optional[str] = SCRAPER_CONFIG) -> dict:
+    """DEFAULT_CONFIG with the TOML file at `path` (if it exists) merged over it."""
+    config = deepcopy(DEFAULT_CONFIG)
+    if not path or not os.path.exists(path):
+        return config
+    with open(path, "rb") as f:
+        loaded = tomllib.load(f)
+    for name, values in loaded.pop("sources", {}).items():
+        if name not in SOURCES:
+            raise ValueError(f"Unknown scraper source {name!r} in {path} ({', '.join(SOURCES)})")
+        config["sources"][name].update(values)
+    config.update(loaded)
+    return config
+
+
+def source_configs(config: dict) -> list[SourceConfig]:
+    out = []
+    for name, values in config["sources"].items():
+        values = dict(values)
+        out.append(
+            SourceConfig(
+                name=name,
+                enabled=bool(values.pop("enabled", True)),
+                concurrency=max(1, int(values.pop("concurrency", 1))),
+                rate=float(values.pop("rate", 0.5)),
+                options=values,
+            )
+        )
+    return out
+
+
+def run_source(cfg: SourceConfig, pool: DriverPool, seen: SeenUrls, sink: IngestSink, telemetry: Optional[str]) -> None:
+    source = SOURCES[cfg.name]
+    limiter = RateLimiter(cfg.rate)
+    with ScrapeRun(cfg.name, telemetry):
+        limiter.wait()
+        with pool.driver() as driver:
+            tasks = source.listing(driver, cfg.options)
+        if not source.has_details:
+            print(f"[{cfg.name}] {len(tasks)} projects listed")
+            sink.put(tasks)
+            return
+        fresh = [t for t in tasks if source.stored_url(t) not in seen]
+        print(f"[{cfg.name}] {len(tasks)} listed, {len(tasks) - len(fresh)} already known")
+
+        def scrape(task) -> None:
+            try:
+                limiter.wait()
+                with pool.driver() as driver:
+                    sink.put(source.detail(driver, task, cfg.options))
+            except Exception as e:
+                record_failure(e)
+                print(f"[{cfg.name}] failed {source.stored_url(task) or task}: {e}")
+
+        with ThreadPoolExecutor(max_workers=cfg.concurrency, thread_name_prefix=f"scraper-{cfg.name}") as ex:
+            # each task runs in a copy of this thread's context, so it reports into this source's telemetry run
+            futures = [ex.submit(contextvars.copy_context().run, scrape, t) for t in fresh]
+            for future in futures:
+                future.result()
+
+
+def run_all(
+    config: dict,
+    sources: Optional[list[str]] = None,
+    store: Optional[Callable[[list], None]] = None,
+    driver_factory: Optional[Callable] = None,
+    telemetry: Optional[str] = None,
+) -> dict:
+    """Run the enabled (or named) sources concurrently; returns stored and duplicate counts per source."""
+    configs = [c for c in source_configs(config) if (c.name in sources if sources else c.enabled)]
+    if not configs:
+        raise ValueError("No scraper sources to run")
+
+    if store is None:
+        from app.services.embedder.embedder import store_in_db_yc
+
+        # the seen set already covers the projects table when it was preloaded
+        check_existing = not config["preload_seen"]
+
+        def store(batch: list) -> None:
+            store_in_db_yc(batch, check_existing=check_existing)
+
+    if driver_factory is None:
+        from app.services.scraper.yc import start_driver
+
+        headless = config["headless"]
+
+        def driver_factory():
+            return start_driver(headless=headless)
+
+    seen = SeenUrls(stored_urls() if config["preload_seen"] else ())
+    print(f"Running {', '.join(c.name for c in configs)} with {config['drivers']} drivers; {len(seen)} URLs known")
+    pool = DriverPool(driver_factory, int(config["drivers"]))
+    sink = IngestSink(store, seen, int(config["batch_size"]), float(config["flush_seconds"]), telemetry)
+    threads = [
+        threading.Thread(
+            target=_guarded, args=(run_source, c, pool, seen, sink, telemetry), name=f"scraper-{c.name}"
+        )
+        for c in configs
+    ]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sink.close()
+        pool.close()
+    return {"stored": sink.stored, "duplicates": sink.duplicates}
+
+
+def _guarded(fn, cfg: SourceConfig, *args) -> None:
+    # one source failing (e.g. its listing page changed) must not stop the others
+    try:
+        fn(cfg, *args)
+    except Exception as e:
+        print(f"[{cfg.name}] stopped: {e}")
+
+
+def jsonl_store(path: str) -> Callable[[list], None]:
+    """--dry-run sink: append projects to a JSONL file instead of embedding and storing them."""
+
+    def store(batch: list) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            for project in batch:
+                f.write(json.dumps(project.model_dump(mode="json"), ensure_ascii=False) + "\n")
+
+    return store
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Run all scraper sources concurrently from one config")
+    ap.add_argument("--config", type=str, default=SCRAPER_CONFIG, help="TOML config (defaults apply if missing)")
+    ap.add_argument("--sources", type=str, default=None, help="Comma-separated subset: " + ", ".join(SOURCES))
+    ap.add_argument("--drivers", type=int, default=None, help="Override the shared driver pool size")
+    ap.add_argument("--no-headless", action="store_true", help="Run the browsers with UI")
+    ap.add_argument("--no-preload", action="store_true", help="Don't seed the seen-URL set from the projects table")
+    ap.add_argument("--dry-run", action="store_true", help="Write projects to --out instead of Supabase")
+    ap.add_argument("--out", type=str, default="logs/scraped_projects.jsonl", help="JSONL output for --dry-run")
+    add_arguments(ap)
+    args = ap.parse_args()
+
+    config = load_config(args.config)
+    if args.drivers:
+        config["drivers"] = args.drivers
+    if args.no_headless:
+        config["headless"] = False
+    if args.no_preload or args.dry_run:
+        config["preload_seen"] = False
+    sources = [s.strip() for s in args.sources.split(",") if s.strip()] if args.sources else None
+    for name in sources or ():
+        if name not in SOURCES:
+            ap.error(f"unknown source {name!r} ({', '.join(SOURCES)})")
+
+    profiler = None
+    if args.profile:
+        if args.profile == "cprofile":
+            print("Sources run on threads and cProfile only sees one; sampling every thread instead")
+        profiler = Profiler("sample", f"scraper-{datetime.now():%Y%m%d-%H%M%S}")
+        profiler.start()
+    started = time.perf_counter()
+    try:
+        result = run_all(
+            config,
+            sources,
+            store=jsonl_store(args.out) if args.dry_run else None,
+            telemetry=args.telemetry,
+        )
+    finally:
+        if profiler is not None:
+            profiler.stop()
+    print(f"Done in {time.perf_counter() - started:.0f}s")
+    for name in sorted(set(result["stored"]) | set(result["duplicates"])):
+        print(f"  {name:<12} stored {result['stored'].get(name, 0):>5}  duplicates {result['duplicates'].get(name, 0):>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""
+Page parsing for the scrapers, separated from the browser.
+
+The Selenium scrapers only navigate, scroll and click; once a page is rendered
+they hand `driver.page_source` to these functions. Each page is parsed once and
+every field is read from the same document, instead of one WebDriver round trip
+per element. The parsers need no browser, so benchmarks/parsers.py can time
+them and check their output against saved HTML fixtures.
+
+Set SCRAPER_FIXTURE_DIR to have the scrapers save every page they parse there
+(as <source>/<slug>.html), to capture new fixtures during a live crawl.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from typing import Optional, Union
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup, Tag
+from dotenv import load_dotenv
+
+load_dotenv()
+SCRAPER_FIXTURE_DIR = os.getenv("SCRAPER_FIXTURE_DIR", "")
+
+HEADINGS = ("h1", "h2", "h3", "h4", "h5")
+
+Html = Union[str, BeautifulSoup, Tag]
+
+
+def parse_html(html: Html) -> Union[BeautifulSoup, Tag]:
+    """Parse page source once; already parsed documents are passed through."""
+    if isinstance(html, (BeautifulSoup, Tag)):
+        return html
+    return BeautifulSoup(html, "html.parser")
+
+
+def _text(el: Optional[Tag]) -> str:
+    """Visible text with whitespace collapsed, like Selenium's `.text` for inline content."""
+    if el is None:
+        return ""
+    return " ".join(el.get_text(" ").split())
+
+
+def _lines(el: Optional[Tag]) -> list[str]:
+    """Text split on <br> and block boundaries, one stripped line per entry."""
+    if el is None:
+        return []
+    return [" ".join(line.split()) for line in el.get_text("\n").split("\n") if line.strip()]
+
+
+def save_fixture(source: str, url: str, html: str) -> None:
+    """Keep a copy of a page for the parser benchmarks when SCRAPER_FIXTURE_DIR is set."""
+    if not SCRAPER_FIXTURE_DIR:
+        return
+    parts = urlparse(url)
+    slug = re.sub(r"[^a-z0-9]+", "-", f"{parts.path}-{parts.query}".lower()).strip("-") or "index"
+    path = os.path.join(SCRAPER_FIXTURE_DIR, source, f"{slug}.html")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(html)
+
+
+# ---- YC ----
+
+
+def parse_yc_cards(html: Html, base_url: str = "https://www.ycombinator.com") -> list[dict]:
+    """Company cards on a YC batch listing."""
+    doc = parse_html(html)
+    cards = []
+    for card in doc.select("a[class*='company_']"):
+        name = _text(card.select_one("span[class*='_coName']"))
+        if not name:
+            lines = _lines(card)
+            name = lines[0] if lines else ""
+        cards.append(
+            {
+                "name": name,
+                "url": urljoin(base_url, card.get("href", "")),
+                "location": _text(card.select_one("span[class*='_coLocation']")) or "Unknown",
+                "short_description": _text(card.select_one("div.mb-1\\.5.text-sm span")),
+                "tags": [t for t in (_text(el) for el in card.select("div[class*='pillWrapper'] span[class*='pill']")) if t],
+            }
+        )
+    return cards
+
+
+YC_FIELDS = {
+    "founded": "founded",
+    "batch": "batch",
+    "team size": "team_size",
+    "status": "status",
+    "primary partner": "primary_partner",
+}
+
+
+def parse_yc_company(html: Html) -> dict:
+    """Long description and the info rows (founded, batch, team size, ...) of a YC company page."""
+    doc = parse_html(html)
+    details = dict.fromkeys(YC_FIELDS.values())
+
+    desc_el = doc.select_one("div.prose.max-w-full.whitespace-pre-line")
+    if desc_el is not None:
+        details["long_description"] = "\n".join(_lines(desc_el)).replace("\u2019", " ")
+    else:
+        details["long_description"] = "No description found"
+
+    for row in doc.select("div.flex.flex-row.justify-between"):
+        label_el = row.select_one("span")
+        if label_el is None:
+            continue
+        label = _text(label_el).lower().rstrip(":")
+        value_el = row.select_one("span:not(:first-child), a")
+        value = _text(value_el) if value_el is not None else None
+        for key, field in YC_FIELDS.items():
+            if key in label:
+                details[field] = value
+                break
+    return details
+
+
+# ---- Devpost ----
+
+
+def norm_tag(t: str) -> str:
+    t = t.strip().lower()
+    t = re.sub(r"[^a-z0-9\+\.\#\-]+", "-", t)
+    return t.strip("-")
+
+
+BUILT_WITH_SELECTORS = ", ".join(
+    [
+        "section#built-with a", "section#built-with li",
+        ".built-with a", ".built-with li",
+        "ul#built-with a", "ul#built-with li",
+        ".tags a[href*='/software/built-with/']",
+    ]
+)
+
+
+# Extract "Built With" tags from the project page to append to "tags" list on upload.
+def extract_built_with(html: Html) -> list[str]:
+    doc = parse_html(html)
+    tags = set()
+    for el in doc.select(BUILT_WITH_SELECTORS):
+        href = el.get("href") or ""
+        if "/software/built-with/" in href:
+            slug = urlparse(href).path.rsplit("/", 1)[-1]
+            if slug:
+                tags.add(norm_tag(slug))
+                continue
+        txt = _text(el)
+        if txt:
+            tags.add(norm_tag(txt))
+
+    # header-based fallback
+    for h in doc.find_all(["h2", "h3"]):
+        if _text(h).lower() == "built with":
+            for sib in h.find_next_siblings():
+                if sib.name in HEADINGS:
+                    break
+                for el in sib.find_all(["a", "li", "span"]):
+                    txt = _text(el)
+                    if txt:
+                        tags.add(norm_tag(txt))
+            break
+
+    return sorted(t for t in tags if t)
+
+
+def _block_parts(el: Tag) -> list[str]:
+    parts = [_text(p) for p in el.find_all("p")]
+    parts += ["• " + _text(li) for li in el.find_all("li")]
+    return [p for p in parts if p and p != "• "]
+
+
+# Extract text under specific section headings like "What it does" for long description.
+def extract_section_text(html: Html, heading_texts=("what it does",)) -> Optional[str]:
+    doc = parse_html(html)
+    targets = {h.lower().rstrip(":") for h in heading_texts}
+    for h in doc.find_all(HEADINGS):
+        if _text(h).lower().rstrip(":") not in targets:
+            continue
+        parts = []
+        for sib in h.find_next_siblings():
+            if sib.name in HEADINGS:
+                break
+            # paragraphs are usually direct siblings of the heading, so keep each one's own text
+            found = _block_parts(sib)
+            if not found and _text(sib):
+                found = ["\n".join(_lines(sib))]
+            parts += found
+        text = "\n".join(parts).strip()
+        if text:
+            return text
+
+    # container-based fallback
+    for container in doc.find_all(["section", "div"]):
+        keys = " ".join(str(container.get(a) or "") for a in ("id", "data-section", "data-tab")).lower()
+        if "what-it-does" in keys:
+            parts = _block_parts(container)
+            if parts:
+                return "\n".join(parts).strip()
+
+    return None
+
+
+def parse_devpost_project(html: Html, url: str) -> dict:
+    """Fields of a Devpost project page (software/<slug>)."""
+    doc = parse_html(html)
+    d = {
+        "name": None,
+        "short_description": None,
+        "long_description": None,
+        "url": url,
+        "source": "Devpost",
+        "tags": [],
+        "created_at": None,
+    }
+
+    title_el = doc.select_one("h1#app-title, h1.title, h1")
+    if title_el is not None:
+        d["name"] = _text(title_el)
+
+    # short description / tagline
+    for sel in ["p#app-tagline", ".app-tagline", ".small.tagline", "meta[name='description']"]:
+        el = doc.select_one(sel)
+        if el is None:
+            continue
+        if el.name == "meta":
+            content = (el.get("content") or "").strip()
+            if content:
+                d["short_description"] = content
+        else:
+            txt = _text(el)
+            if len(txt) >= 5:
+                d["short_description"] = txt
+        if d["short_description"]:
+            break
+
+    # long description extraction
+    long_desc = extract_section_text(doc, ("what it does", "what it does:", "what does it do"))
+    if not long_desc:
+        for sel in ["#app-details-left .large-12 p", ".app-details .content p", ".gallery p"]:
+            paras = doc.select(sel)
+            if paras:
+                joined = " ".join(t for t in (_text(p) for p in paras[:8]) if t)
+                if joined:
+                    long_desc = joined
+                    break
+    d["long_description"] = long_desc
+    d["tags"] = extract_built_with(doc)
+
+    # Created/submitted date
+    time_el = doc.select_one("time, .submitted-at time")
+    if time_el is not None:
+        dt = time_el.get("datetime") or _text(time_el)
+        if dt:
+            d["created_at"] = dt.strip()
+    else:
+        meta = doc.select_one("meta[property='article:published_time']")
+        if meta is not None and meta.get("content"):
+            d["created_at"] = meta["content"].strip()
+
+    # normalize empty strings
+    for k, v in list(d.items()):
+        if isinstance(v, str) and not v.strip():
+            d[k] = None
+    return d
+
+
+# ---- Product Hunt ----
+
+
+def extract_external_url(html: Html) -> Optional[str]:
+    """The product's own site: the first outbound link tagged ref=producthunt."""
+    doc = parse_html(html)
+    for a in doc.find_all("a", href=True):
+        href = a["href"]
+        if "ref=producthunt" in href and "producthunt.com" not in href:
+            return href
+    return None
+
+
+def _launch_tags_section(doc) -> Optional[Tag]:
+    section = doc.select_one("[data-test='launch-tags']")
+    if section is not None:
+        return section
+    # otherwise the closest ancestor of the "Launch tags" label that holds topic links
+    label = doc.find(string=re.compile("Launch tags"))
+    el = label.parent if label is not None else None
+    while el is not None and not el.select_one("a[href*='/topics/']"):
+        el = el.parent
+    return el
+
+
+def get_launch_tags(html: Html) -> list[str]:
+    doc = parse_html(html)
+
+    def _extract(container) -> list[str]:
+        return [t for t in (_text(a) for a in container.select("a[href*='/topics/']")) if t]
+
+    section = _launch_tags_section(doc)
+    tags = _extract(section) if section is not None else []
+    if not tags:  # fallback if the section locator wasn’t precise
+        tags = _extract(doc)
+
+    # normalize data to return
+    seen, normalized = set(), []
+    for t in tags:
+        clean = " ".join(t.split()).lower()
+        if clean and clean not in seen:
+            seen.add(clean)
+            normalized.append(clean)
+    return normalized
+
+
+# same element as the scraper's old XPath //*[@id='root-container']/div[3]/div/main/div[1]/div[2]/div
+PH_LONG_DESCRIPTION = (
+    "#root-container > div:nth-of-type(3) > div > main > div:nth-of-type(1) > div:nth-of-type(2) > div"
+)
+
+
+def parse_product_hunt_product(html: Html) -> dict:
+    """Fields of a Product Hunt product page (products/<slug>)."""
+    doc = parse_html(html)
+    long_el = doc.select_one(PH_LONG_DESCRIPTION)
+    return {
+        "name": _text(doc.select_one("h1")),
+        "short_description": _text(doc.select_one("h2")),
+        "long_description": "\n".join(_lines(long_el)) if long_el is not None else None,
+        "url": extract_external_url(doc),
+        "tags": get_launch_tags(doc),
+    }
+
+
+# ---- topstartups.io ----
+
+
+def parse_topstartups_cards(html: Html) -> list[dict]:
+    """Startup cards on the topstartups.io listing."""
+    doc = parse_html(html)
+    projects = []
+    for wrap in doc.select("div.col-12.col-md-6.col-xl-4.infinite-item"):
+        card = wrap.select_one("div.card.card-body")
+        if card is None:
+            continue
+        name_el = card.select_one("h3 a#startup-website-link")
+        if name_el is None:
+            continue
+
+        # "What they do:" header, then the description
+        desc_el = card.select_one("p:has(#card-header)")
+        desc_lines = _lines(desc_el)
+        description = "\n".join(desc_lines[1:]) if len(desc_lines) > 1 else None
+
+        tags = [_text(t) for t in card.select("span#industry-tags")]
+        tags += [_text(t) for t in card.select("span#funding-tags")]
+        team_size = [_text(t) for t in card.select("span#company-size-tags")]
+
+        # facts paragraph: a header line, then "HQ: <location>" and "... founded: <year>"
+        location = founded = None
+        facts = _lines(card.select_one("#item-card-filter > p:nth-child(4)"))
+        if len(facts) > 1:
+            location = facts[1].split(":", 1)[-1].strip() or None
+        if len(facts) > 2:
+            founded = facts[2].split()[-1]
+
+        projects.append(
+            {
+                "name": _text(name_el),
+                "url": name_el.get("href"),
+                "short_description": description,
+                "tags": [t for t in tags if t],
+                "team_size": team_size[0] if team_size else None,
+                "location": location,
+                "founded": founded,
+            }
+        )
+    return projects
@@ -1,3 +1,4 @@
+import argparse
 import json
 import time
 
@@ -12,6 +13,8 @@ from selenium.webdriver.common.action_chains import ActionChains
 
 from app.models.project import ProjectYc as Project
 from app.services.embedder.embedder import store_in_db_yc
+from app.services.scraper.parsers import parse_product_hunt_product, save_fixture
+from app.services.scraper.telemetry import ScrapeRun, add_arguments, instrument, pause, record_page, stage
 
 def start_driver(headless: bool = False):
     """Start a ChromeDriver instance with stable options."""
@@ -25,9 +28,10 @@ def start_driver(headless: bool = False):
     options.add_argument("--disable-blink-features=AutomationControlled")
     options.add_argument("--user-agent=Mozilla/5.0 ... Chrome/123.0.0.0 Safari/537.36")
 
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
-    driver.set_page_load_timeout(60)
+    with stage("driver"):
+        service = Service(ChromeDriverManager().install())
+        driver = instrument(webdriver.Chrome(service=service, options=options))
+        driver.set_page_load_timeout(60)
     return driver
 
 def daily_url(year: int, month: int, day: int) -> str:
@@ -35,104 +39,55 @@ def daily_url(year: int, month: int, day: int) -> str:
 
 def collect_product_urls(driver, timeout=30):
     #Wait for the list of product to load
-    WebDriverWait(driver, timeout).until(
-        EC.presence_of_element_located((By.CSS_SELECTOR, "main"))
-    )
+    with stage("wait"):
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "main"))
+        )
 
-    links = driver.find_elements(By.CSS_SELECTOR, "a[href*='/products/']")
+    with stage("extract"):
+        links = driver.find_elements(By.CSS_SELECTOR, "a[href*='/products/']")
     seen = set()
     urls = []
 
     print("Getting links after sleep")
-    time.sleep(2)
+    pause(2)
 
 
-    for a in links:
-        href = a.get_attribute("href")
-        #Ensure there is an href to add to list
-        if not href:
-            continue
-        if "/products/" in href and "#" not in href and href not in seen:
-            seen.add(href)
-            urls.append(href)
+    with stage("extract"):
+        for a in links:
+            href = a.get_attribute("href")
+            #Ensure there is an href to add to list
+            if not href:
+                continue
+            if "/products/" in href and "#" not in href and href not in seen:
+                seen.add(href)
+                urls.append(href)
 
-    time.sleep(2)
+    pause(2)
     
     print(urls)
 
-    time.sleep(2)
+    pause(2)
 
     return urls
 
-def scrape_external_url(driver, timeout=30):
+def reveal_launch_tags(driver, timeout=20):
+    """Scroll the "Launch tags" section into view so its lazy content renders before parsing."""
     WebDriverWait(driver, timeout).until(
         EC.presence_of_element_located((By.CSS_SELECTOR, "main"))
     )
-
-    links = driver.find_elements(By.TAG_NAME, "a")
-
-    for a in links:
-        href = a.get_attribute("href") or ""
-        if "ref=producthunt" in href and "producthunt.com" not in href:
-            return href
-    
-    return None
-
-def get_launch_tags(driver, timeout=20):
-    # make sure page is ready
-    WebDriverWait(driver, timeout).until(
-        EC.presence_of_element_located((By.CSS_SELECTOR, "main"))
-    )
-
-    #try to locate the “Launch tags:” container (two strategies)
-    section = None
-    #CSS first: some builds expose data attributes
-    for sel in [
-        "[data-test='launch-tags']",
-        "section:has(> h2:contains('Launch tags'))",  # may not work in all drivers
-    ]:
-        try:
-            section = driver.find_element(By.CSS_SELECTOR, sel)
-            break
-        except Exception:
-            pass
-
-    # if first doesn't worl try XPath fallback using the visible label text
-    if section is None:
+    try:
+        section = driver.find_element(By.CSS_SELECTOR, "[data-test='launch-tags']")
+    except Exception:
         try:
-            section = driver.find_element(
-                By.XPATH,
-                "//*[@class and contains(., 'Launch tags')]"
-            )
+            section = driver.find_element(By.XPATH, "//*[@class and contains(., 'Launch tags')]")
         except Exception:
-            section = driver.find_element(By.CSS_SELECTOR, "main")  # very last resort
-
-    #scroll into view so lazy content renders
+            return
     try:
         ActionChains(driver).move_to_element(section).perform()
     except Exception:
         driver.execute_script("arguments[0].scrollIntoView({block:'center'});", section)
 
-    #grab topic links inside the section (and fallback to the whole page if needed)
-    def _extract(container):
-        anchors = container.find_elements(By.CSS_SELECTOR, "a[href*='/topics/']")
-        tags = [a.text.strip() for a in anchors if a.text.strip()]
-        return tags
-
-    tags = _extract(section)
-    if not tags:  # fallback if the section locator wasn’t precise
-        tags = _extract(driver)
-
-    # normalize data to return
-    seen, normalized = set(), []
-    for t in tags:
-        clean = " ".join(t.split()).lower()
-        if clean and clean not in seen:
-            seen.add(clean)
-            normalized.append(clean)
-    return normalized
-
-
 
 def scrape_link(driver, batch: str ,url: str, timeout = 30):
 
@@ -140,58 +95,48 @@ def scrape_link(driver, batch: str ,url: str, timeout = 30):
     source = "Product Hunt"
 
     #Get the page url and wait for page to load
-    driver.get(url)
+    with stage("navigate", url):
+        driver.get(url)
 
-    WebDriverWait(driver, timeout).until(
-        EC.presence_of_element_located((By.CSS_SELECTOR, "main"))
-    )
-
-    time.sleep(1)
-
-    #Ensure the title loads before scrapping it
-    title_el = WebDriverWait(driver, timeout).until(
-        EC.presence_of_element_located((By.CSS_SELECTOR, "h1"))
-    )
-
-    short_el = WebDriverWait(driver, timeout).until(
-        EC.presence_of_element_located((By.CSS_SELECTOR, "h2"))
-    )
-
-    #Extract the long description
-    xpath = "//*[@id='root-container']/div[3]/div/main/div[1]/div[2]/div"
-    try:
-        long_el = WebDriverWait(driver, timeout).until(
-            EC.presence_of_element_located((By.XPATH, xpath))
+    with stage("wait", url):
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "main"))
         )
-    except Exception:
-        print("Error extracting long description")
-
-
-    title = title_el.text.strip()
-    short_description = short_el.text.strip()
-    long_description = long_el.text.strip()
 
-    #Scrape external link of product
-    external_link = scrape_external_url(driver)
+        time.sleep(1)
 
-    #Get the tags to append
-    tags = get_launch_tags(driver)
-
-    time.sleep(1)
-
-    projects.append(
-        Project(
-            name = title,
-            short_description=short_description,
-            long_description=long_description,
-            url = external_link,
-            source = source,
-            tags = tags,
-            batch = batch,
+        #Ensure the title and tagline load before scraping them
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "h1"))
+        )
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "h2"))
+        )
+        reveal_launch_tags(driver)
+
+    #Parse title, descriptions, external link and tags from the rendered page
+    with stage("extract", url):
+        html = driver.page_source
+        record_page(url, html, driver)
+        save_fixture("producthunt", url, html)
+        product = parse_product_hunt_product(html)
+
+    pause(1)
+
+    with stage("extract", url):
+        projects.append(
+            Project(
+                name = product["name"],
+                short_description=product["short_description"],
+                long_description=product["long_description"],
+                url = product["url"],
+                source = source,
+                tags = product["tags"],
+                batch = batch,
+            )
         )
-    )
 
-    time.sleep(2)
+    pause(2)
 
     #print(projects)
 
@@ -202,21 +147,35 @@ def scrape_link(driver, batch: str ,url: str, timeout = 30):
 
 
 
-def run_scrape(driver, year: int, month: int, day:int):
-    driver.get(daily_url(year, month, day))
-    WebDriverWait(driver, 30).until(
-        EC.presence_of_element_located((By.CSS_SELECTOR, "main"))
-    )
+def daily_batch(year: int, month: int, day: int) -> str:
+    return str(year) + str(month) + str(day)
+
+
+def list_products(driver, year: int, month: int, day: int) -> list[str]:
+    """Product page URLs on a daily leaderboard."""
+    url = daily_url(year, month, day)
+    with stage("navigate", url):
+        driver.get(url)
+    with stage("wait", url):
+        WebDriverWait(driver, 30).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "main"))
+        )
 
     print("Loaded main page")
 
-    time.sleep(10)
+    pause(10)
 
+    with stage("extract", url):
+        record_page(url, driver.page_source, driver)
     urls = collect_product_urls(driver)
 
-    time.sleep(2)
+    pause(2)
+    return urls
+
 
-    batch = str(year) + str(month) + str(day)
+def run_scrape(driver, year: int, month: int, day:int):
+    urls = list_products(driver, year, month, day)
+    batch = daily_batch(year, month, day)
 
     for u in urls:
         projects = scrape_link(driver, batch, u)
@@ -226,12 +185,20 @@ def run_scrape(driver, year: int, month: int, day:int):
         store_in_db_yc(projects)
 
 
-if __name__ == "__main__":
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Scrape a Product Hunt daily leaderboard into the projects table")
+    add_arguments(ap)
+    args = ap.parse_args()
     year = 2025
     month = 11
     day = 10
-    driver = start_driver()
-    try:
-        project_upload = run_scrape(driver, year, month, day)
-    finally:
-        driver.quit()
\ No newline at end of file
+    with ScrapeRun("productHunt", args.telemetry, args.profile):
+        driver = start_driver()
+        try:
+            project_upload = run_scrape(driver, year, month, day)
+        finally:
+            driver.quit()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
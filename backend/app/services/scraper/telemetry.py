@@ -0,0 +1,384 @@
+"""
+Run telemetry for the scrapers.
+
+A `ScrapeRun` wraps one scraper run. Inside it, `stage("navigate")`,
+`stage("wait")`, `stage("extract")`, ... time each step, `record_page` counts
+pages and bytes, and drivers passed through `instrument` count every WebDriver
+command. Stages, pages and failures are appended to SCRAPER_TELEMETRY_PATH as
+JSON lines, followed by a summary line when the run ends:
+
+  {"event": "summary", "source": "yc", "pages": 151, "pages_per_sec": 0.41,
+   "stages": {"navigate": {"count": 151, "total_s": 88.2, ...}, ...},
+   "failures": {"timeout": 3}, "html_bytes": ..., "transfer_bytes": ...,
+   "webdriver": {"calls": 1204, "seconds": 97.5, "commands": {"get": 151, ...}}}
+
+A `ScrapeRun` is the active run of app.services.telemetry while it is open, so
+code outside the scraper package (e.g. the embedder's dedup/embed/store steps)
+reports into whichever run called it through that module's `stage`, and `stage`
+is a no-op outside a run. `stage`, `current_run` and `record_failure` are
+re-exported here for the scrapers.
+
+`--profile cprofile` saves a cProfile of the run (.prof, open with snakeviz or
+pstats; it only sees the thread that started the run); `--profile sample` samples every thread's stack and saves folded stacks
+(.folded, for flamegraph.pl or speedscope), which also shows time spent waiting
+on the browser.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional
+
+from dotenv import load_dotenv
+
+# stage, current_run and record_failure are used by the scrapers through this module
+from app.services.telemetry import activate, current_run, deactivate, record_failure, stage  # noqa: F401
+
+load_dotenv()
+SCRAPER_TELEMETRY_PATH = os.getenv("SCRAPER_TELEMETRY_PATH", "logs/scraper_runs.jsonl")
+SCRAPER_PROFILE_DIR = os.getenv("SCRAPER_PROFILE_DIR", "logs/profiles")
+
+PROFILE_MODES = ("cprofile", "sample")
+SAMPLE_INTERVAL_SECONDS = 0.005
+
+# bytes the browser received for the current document and everything it loaded since
+# (cross-origin resources without Timing-Allow-Origin report 0)
+TRANSFER_BYTES_JS = (
+    "return performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'))"
+    ".reduce(function (n, e) { return n + (e.transferSize || 0); }, 0);"
+)
+
+_TIMEOUT_ERRORS = {"TimeoutException", "TimeoutError", "ReadTimeout", "ReadTimeoutError", "timeout"}
+_ELEMENT_ERRORS = {
+    "NoSuchElementException",
+    "StaleElementReferenceException",
+    "ElementNotInteractableException",
+    "ElementClickInterceptedException",
+    "InvalidSelectorException",
+}
+_NETWORK_ERRORS = {"ConnectionError", "ConnectionResetError", "ConnectionRefusedError", "MaxRetryError"}
+_STAGE_FAILURES = {"extract": "parse", "embed": "embed", "dedup": "store", "store": "store", "write": "store"}
+
+
+def classify_failure(exc: BaseException, stage: Optional[str] = None) -> str:
+    """
+    Failure kind: timeout, element (missing/stale/unclickable), network, browser
+    (other WebDriver errors), validation (model fields), parse/embed/store (by
+    the stage it was raised in) or other.
+    """
+    name = type(exc).__name__
+    if name in _TIMEOUT_ERRORS:
+        return "timeout"
+    if name in _ELEMENT_ERRORS:
+        return "element"
+    if name in _NETWORK_ERRORS or "net::ERR_" in str(exc):
+        return "network"
+    if name == "ValidationError":
+        return "validation"
+    if stage in _STAGE_FAILURES:
+        return _STAGE_FAILURES[stage]
+    if name.endswith("Exception") and type(exc).__module__.startswith("selenium"):
+        return "browser"
+    return "other"
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class StackSampler:
+    """Samples every other thread's Python stack on an interval and counts them as folded stacks."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="scraper-sampler", daemon=True)
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join([names.get(ident, str(ident))] + stack[::-1])] += 1
+            self.samples += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def top(self, n: int = 15) -> list[tuple[str, int]]:
+        """Innermost frames by sample count."""
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(n)
+
+
+class Profiler:
+    """cProfile or the stack sampler around part of a run, written to `profile_dir/<name>.prof|.folded`."""
+
+    def __init__(self, mode: str, name: str, profile_dir: str = SCRAPER_PROFILE_DIR):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode!r} ({', '.join(PROFILE_MODES)})")
+        self.mode = mode
+        self.name = name
+        self.profile_dir = profile_dir
+        self._profiler = cProfile.Profile() if mode == "cprofile" else StackSampler()
+
+    def start(self) -> None:
+        if isinstance(self._profiler, StackSampler):
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self) -> str:
+        """Stop, write the profile, print its top entries and return its path."""
+        os.makedirs(self.profile_dir, exist_ok=True)
+        stem = os.path.join(self.profile_dir, self.name)
+        if isinstance(self._profiler, StackSampler):
+            self._profiler.stop()
+            path = f"{stem}.folded"
+            self._profiler.write(path)
+            print(f"Sampled {self._profiler.samples} stacks; busiest frames:")
+            for frame, count in self._profiler.top():
+                print(f"  {count:>7}  {frame}")
+        else:
+            self._profiler.disable()
+            path = f"{stem}.prof"
+            self._profiler.dump_stats(path)
+            pstats.Stats(self._profiler).sort_stats("cumulative").print_stats(25)
+        print(f"Profile written to {path}")
+        return path
+
+
+class ScrapeRun:
+    """Telemetry for one scraper run; use as a context manager around the run."""
+
+    def __init__(
+        self,
+        source: str,
+        path: Optional[str] = SCRAPER_TELEMETRY_PATH,
+        profile: Optional[str] = None,
+        profile_dir: str = SCRAPER_PROFILE_DIR,
+    ):
+        self.source = source
+        self.path = path
+        self.profile = profile
+        self.run_id = uuid.uuid4().hex[:12]
+        self.pages = 0
+        self.html_bytes = 0
+        self.transfer_bytes = 0
+        self.stages: dict[str, list[float]] = defaultdict(list)
+        self.failures: Counter = Counter()
+        self.commands: Counter = Counter()
+        self.webdriver_seconds = 0.0
+        self.profile_path: Optional[str] = None
+        self._started = 0.0
+        self._lock = threading.Lock()
+        self._token = None
+        self._profiler = Profiler(profile, f"{source}-{self.run_id}", profile_dir) if profile else None
+
+    def _emit(self, event: str, **fields) -> None:
+        if not self.path:
+            return
+        line = {"ts": datetime.now(timezone.utc).isoformat(), "run": self.run_id, "source": self.source, "event": event}
+        line.update(fields)
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(line, default=str) + "\n")
+
+    def __enter__(self) -> "ScrapeRun":
+        self._token = activate(self)
+        self._emit("start", profile=self.profile)
+        if self._profiler is not None:
+            self._profiler.start()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        duration = time.perf_counter() - self._started
+        if self._profiler is not None:
+            self.profile_path = self._profiler.stop()
+        if isinstance(exc, Exception):
+            self.failure(exc, stage="run")
+        summary = self.summary(duration)
+        self._emit("summary", **summary)
+        deactivate(self._token)
+        print(self.format_summary(summary))
+
+    @contextmanager
+    def stage(self, name: str, url: Optional[str] = None):
+        """Time a step; an exception raised in it is recorded as a failure and re-raised."""
+        started = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except Exception as e:
+            ok = False
+            self.failure(e, stage=name, url=url)
+            raise
+        finally:
+            seconds = time.perf_counter() - started
+            with self._lock:
+                self.stages[name].append(seconds)
+            self._emit("stage", stage=name, seconds=round(seconds, 4), url=url, ok=ok)
+
+    def page(self, url: str, html: str, driver=None) -> None:
+        """Count a rendered page; with the driver, also what the browser downloaded for it."""
+        html_bytes = len(html.encode("utf-8"))
+        transfer = transfer_bytes(driver) if driver is not None else None
+        with self._lock:
+            self.pages += 1
+            self.html_bytes += html_bytes
+            self.transfer_bytes += transfer or 0
+        self._emit("page", url=url, html_bytes=html_bytes, transfer_bytes=transfer)
+
+    def failure(self, exc: BaseException, stage: Optional[str] = None, url: Optional[str] = None) -> None:
+        # a failure inside nested stages is counted once, where it was first seen
+        if getattr(exc, "_telemetry_recorded", False):
+            return
+        try:
+            exc._telemetry_recorded = True  # pyright: ignore[reportAttributeAccessIssue]
+        except AttributeError:
+            pass
+        kind = classify_failure(exc, stage)
+        with self._lock:
+            self.failures[kind] += 1
+        self._emit("failure", kind=kind, stage=stage, url=url, error=f"{type(exc).__name__}: {exc}"[:500])
+
+    def webdriver_call(self, command: str, seconds: float) -> None:
+        with self._lock:
+            self.commands[command] += 1
+            self.webdriver_seconds += seconds
+
+    def summary(self, duration: Optional[float] = None) -> dict:
+        if duration is None:
+            duration = time.perf_counter() - self._started
+        with self._lock:
+            stages = {
+                name: {
+                    "count": len(times),
+                    "total_s": round(sum(times), 3),
+                    "mean_ms": round(sum(times) / len(times) * 1000, 1),
+                    "p95_ms": round(_percentile(times, 0.95) * 1000, 1),
+                    "max_ms": round(max(times) * 1000, 1),
+                }
+                for name, times in self.stages.items()
+            }
+            return {
+                "duration_s": round(duration, 3),
+                "pages": self.pages,
+                "pages_per_sec": round(self.pages / duration, 3) if duration > 0 else 0.0,
+                "stages": stages,
+                "failures": dict(self.failures),
+                "html_bytes": self.html_bytes,
+                "transfer_bytes": self.transfer_bytes,
+                "webdriver": {
+                    "calls": sum(self.commands.values()),
+                    "seconds": round(self.webdriver_seconds, 3),
+                    "commands": dict(self.commands.most_common()),
+                },
+                "profile": self.profile_path,
+            }
+
+    def format_summary(self, summary: dict) -> str:
+        lines = [
+            f"[{self.source}] {summary['pages']} pages in {summary['duration_s']:.1f}s "
+            f"({summary['pages_per_sec']:.2f} pages/s), {summary['transfer_bytes'] / 1e6:.1f} MB transferred, "
+            f"{summary['webdriver']['calls']} WebDriver calls ({summary['webdriver']['seconds']:.1f}s)"
+        ]
+        for name, s in sorted(summary["stages"].items(), key=lambda kv: -kv[1]["total_s"]):
+            lines.append(f"  {name:<10} {s['count']:>6}x {s['total_s']:>9.2f}s  p95 {s['p95_ms']:>8.1f} ms")
+        if summary["failures"]:
+            lines.append("  failures: " + ", ".join(f"{k} {v}" for k, v in sorted(summary["failures"].items())))
+        return "\n".join(lines)
+
+
+def record_page(url: str, html: str, driver=None) -> None:
+    run = current_run()
+    if isinstance(run, ScrapeRun):
+        run.page(url, html, driver)
+
+
+def pause(seconds: float) -> None:
+    """A deliberate wait between requests, timed as the `throttle` stage."""
+    with stage("throttle"):
+        time.sleep(seconds)
+
+
+def instrument(driver):
+    """Count and time every WebDriver command the driver (and its elements) sends, into the active run."""
+    execute = driver.execute
+
+    def timed_execute(driver_command, params=None):
+        run = current_run()
+        if not isinstance(run, ScrapeRun) or getattr(driver, "_telemetry_paused", False):
+            return execute(driver_command, params)
+        started = time.perf_counter()
+        try:
+            return execute(driver_command, params)
+        finally:
+            run.webdriver_call(driver_command, time.perf_counter() - started)
+
+    driver.execute = timed_execute
+    return driver
+
+
+def transfer_bytes(driver) -> Optional[int]:
+    """Bytes downloaded for the current document per the Resource Timing API; None if it can't be read."""
+    driver._telemetry_paused = True
+    try:
+        return int(driver.execute_script(TRANSFER_BYTES_JS) or 0)
+    except Exception:
+        return None
+    finally:
+        driver._telemetry_paused = False
+
+
+def add_arguments(ap) -> None:
+    """--telemetry and --profile for a scraper's command line."""
+    ap.add_argument(
+        "--telemetry",
+        type=str,
+        default=SCRAPER_TELEMETRY_PATH,
+        help="JSONL file for per-stage timings and the run summary (empty to only print the summary)",
+    )
+    ap.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        nargs="?",
+        const="cprofile",
+        default=None,
+        help="Profile the run: cprofile (default) or sample (folded stacks), written to SCRAPER_PROFILE_DIR",
+    )
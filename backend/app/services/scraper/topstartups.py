@@ -1,3 +1,4 @@
+import argparse
 import json
 import time
 import random
@@ -11,6 +12,8 @@ from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.action_chains import ActionChains
 from app.models.project import ProjectYc as Project
 from app.services.embedder.embedder import store_in_db_yc
+from app.services.scraper.parsers import parse_topstartups_cards, save_fixture
+from app.services.scraper.telemetry import ScrapeRun, add_arguments, instrument, pause, record_failure, record_page, stage
 
 
 def setup_driver(headless: bool = False) -> webdriver.Chrome:
@@ -25,14 +28,15 @@ def setup_driver(headless: bool = False) -> webdriver.Chrome:
     options.add_argument("--disable-blink-features=AutomationControlled")
     options.add_argument("--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36")
 
-    driver = webdriver.Chrome(options = options)
-    driver.set_page_load_timeout(45)
+    with stage("driver"):
+        driver = instrument(webdriver.Chrome(options = options))
+        driver.set_page_load_timeout(45)
 
     return driver
 
 def period_sleep(a: float = 0.6, b: float = 1.2):
     """Sleep for a random period between a and b seconds."""
-    time.sleep(random.uniform(a,b))
+    pause(random.uniform(a,b))
 
 def scroll_to_bottom(driver: webdriver.Chrome):
     """Scroll to the bottom of the page to load all of the content."""
@@ -55,119 +59,67 @@ def show_more(driver: webdriver.Chrome):
         )
         show_more.click()
     except Exception as e:
+        record_failure(e, "wait")
         print(f"Error when trying to click show more at bottom of page: {e}")
 
 def scrape_page(driver: webdriver.Chrome) -> list:
-    card_wrapper = driver.find_elements(
-        By.CSS_SELECTOR,
-        "div.col-12.col-md-6.col-xl-4.infinite-item",
-    )
-
-    count = 0
-    projects = []
-    for wrap in card_wrapper:
-
-        current_project = []
-
-        card = wrap.find_element(By.CSS_SELECTOR, "div.card.card-body")
-        #Extract the company name from the card
-        company_name = card.find_element(By.CSS_SELECTOR, "h3 a#startup-website-link")
-
-        #Extract the company link from the card
-        company_link = company_name.get_attribute("href")
-
-        #Extract the description of the company
-        company_desc_el = card.find_element(By.CSS_SELECTOR, "p:has(#card-header)")
-        #Extract the "what they do" part from the text
-        company_desc = company_desc_el.text[13:].strip("\n")
-
-        #Extract the tags from the card
-        company_tags = []
-        tag_elements = card.find_elements(
-            By.CSS_SELECTOR, "span#industry-tags"
-        )
-        for tag in tag_elements:
-            company_tags.append(tag.text)
-
-        funding_tags = card.find_elements(
-            By.CSS_SELECTOR, "span#funding-tags"
-        )
-        for tag in funding_tags:
-            company_tags.append(tag.text)
-
-        #Extract the team size from the card
-        team_size = []
-        facts_tags = card.find_elements(
-            By.CSS_SELECTOR, "span#company-size-tags"
-        )
-        for tag in facts_tags:
-            team_size.append(tag.text)
-
-        #Extract the location of the company from the card
-        company_location = ""
-
-        company_el = card.find_element(
-            By.CSS_SELECTOR, "#item-card-filter > p:nth-child(4)"
-        )
-
-        #Strip the location text to just be location
-        line = company_el.text.split("\n")
-        company_location = line[1]
-        company_location = company_location[5:]
-
-        #Strip the founded date
-        company_founded = line[2]
-        founded_arr = company_founded.split(" ")
-        founded_date = founded_arr[3]
-        print(founded_date)
-
-        count += 1
-        current_project.append(company_name.text)
-        current_project.append(company_link)
-        current_project.append(company_desc)
-        current_project.append(company_tags)
-        current_project.append(team_size[0])
-        #print(current_project)
-        #projects.append(current_project)
-
-        projects.append(
-            Project(
-                name = company_name.text,
-                short_description=company_desc,
-                url = company_link,
-                source = "Topstartups",
-                tags = company_tags,
-                location = company_location,
-                founded = founded_date,
-                team_size = team_size[0]
+    with stage("extract"):
+        html = driver.page_source
+        url = driver.current_url
+        record_page(url, html, driver)
+        save_fixture("topstartups", url, html)
+        cards = parse_topstartups_cards(html)
+
+        projects = []
+        for card in cards:
+            projects.append(
+                Project(
+                    name = card["name"],
+                    short_description=card["short_description"],
+                    url = card["url"],
+                    source = "Topstartups",
+                    tags = card["tags"],
+                    location = card["location"],
+                    founded = card["founded"],
+                    team_size = card["team_size"]
+                )
             )
-        )
-
-        print(projects)
 
-    print("Listed items", count)
+    print("Listed items", len(projects))
     period_sleep()
 
     return projects
 
 
 def load_page(driver: webdriver.Chrome, url: str):
-    driver.get(url)
+    with stage("navigate", url):
+        driver.get(url)
     period_sleep()
 
     #Scroll to the bottom and click the "show more button"
-    scroll_to_bottom(driver)
+    with stage("wait", url):
+        scroll_to_bottom(driver)
     period_sleep()
-    show_more(driver)
+    with stage("wait", url):
+        show_more(driver)
     period_sleep()
 
     #Repeatidly scroll to the bottom till all page content has loaded
-    scroll_to_bottom(driver)
+    with stage("wait", url):
+        scroll_to_bottom(driver)
     period_sleep()
 
     return None
 
 def main() -> None:
+    ap = argparse.ArgumentParser(description="Scrape topstartups.io into the projects table")
+    add_arguments(ap)
+    args = ap.parse_args()
+    with ScrapeRun("topstartups", args.telemetry, args.profile):
+        scrape()
+
+
+def scrape() -> None:
     try:
         #Load all of elements on the page
         driver = setup_driver(headless=False)
@@ -180,6 +132,7 @@ def main() -> None:
         print(f"Storing {len(projects)} projects into DB.")
 
     except Exception as e:
+        record_failure(e)
         print("Error in main when scrapping: ", e)
 
 if __name__ == "__main__":
@@ -1,8 +1,11 @@
+import argparse
 import json
 import time
 
 from app.models.project import ProjectYc as Project
 from app.services.embedder.embedder import store_in_db_yc
+from app.services.scraper.parsers import parse_yc_cards, parse_yc_company, save_fixture
+from app.services.scraper.telemetry import ScrapeRun, add_arguments, instrument, pause, record_page, stage
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
@@ -23,9 +26,10 @@ def start_driver(headless: bool = False):
     options.add_argument("--window-size=1920,1080")
     options.add_argument("--disable-blink-features=AutomationControlled")
 
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
-    return driver
+    with stage("driver"):
+        service = Service(ChromeDriverManager().install())
+        driver = webdriver.Chrome(service=service, options=options)
+    return instrument(driver)
 
 
 def scroll_to_bottom(driver):
@@ -44,142 +48,103 @@ def scrape_more_batches(batch_name):
     pass
 
 
-def scrape_batch(batch_name: str, limit: int = 10):
-    """Scrape YC company list and individual company pages."""
-    base_url = (
-        f"https://www.ycombinator.com/companies?batch={batch_name.replace(' ', '%20')}"
-    )
-    print(f"\nScraping batch: {batch_name}")
+def batch_url(batch_name: str) -> str:
+    return f"https://www.ycombinator.com/companies?batch={batch_name.replace(' ', '%20')}"
 
-    driver = start_driver(headless=True)  # start a chrome browser instance
+
+def list_companies(driver, batch_name: str) -> list[dict]:
+    """Company cards (url, name, short_description, tags, location) on a batch's listing page."""
+    base_url = batch_url(batch_name)
 
     # navigate to the yc companies page for the specified batch then wait for js to load
-    driver.get(base_url)
-    time.sleep(3)
+    with stage("navigate", base_url):
+        driver.get(base_url)
+    with stage("wait", base_url):
+        time.sleep(3)
+
+        # scroll to bottom to load all companies
+        scroll_to_bottom(driver)
+
+    # every company card on the page (anchors with a class name containing 'company_')
+    with stage("extract", base_url):
+        html = driver.page_source
+        record_page(base_url, html, driver)
+        save_fixture("yc", base_url, html)
+        cards = parse_yc_cards(html)
+    print(f"Found {len(cards)} companies in {batch_name}")
+    return cards
 
-    # scroll to bottom to load all companies
-    scroll_to_bottom(driver)
 
-    # creates a list of all company cards found on the page that match Anchor tag with class name containing 'company_'
-    cards = driver.find_elements(By.CSS_SELECTOR, "a[class*='company_']")
-    print(f"Found {len(cards)} companies in {batch_name}")
+def company_project(driver, card: dict) -> Project:
+    """Wait for the company page open in `driver` to render and parse it with its listing card."""
+    href = card["url"]
+    with stage("wait", href):
+        try:  # wait for the long description to render
+            WebDriverWait(driver, 3).until(
+                EC.presence_of_element_located(
+                    (By.CSS_SELECTOR, "div.prose.max-w-full.whitespace-pre-line")
+                )
+            )
+        except Exception:
+            pass
+    with stage("extract", href):
+        company_html = driver.page_source
+        record_page(href, company_html, driver)
+        save_fixture("yc", href, company_html)
+        details = parse_yc_company(company_html)
+
+        return Project(
+            name=card["name"],
+            short_description=card["short_description"],
+            url=href,
+            source="YC",
+            tags=card["tags"],
+            location=card["location"],
+            **details,
+        )
 
-    projects = []
 
-    # Go into card here
-    for i, card in enumerate(cards[:limit], 1):
-        href = card.get_attribute("href")
+def scrape_company(driver, card: dict) -> Project:
+    """Load a company page in the current tab and parse it."""
+    with stage("navigate", card["url"]):
+        driver.get(card["url"])
+    return company_project(driver, card)
 
-        try:  # try grabbing name
-            name = card.find_element(
-                By.CSS_SELECTOR, "span[class*='_coName']"
-            ).text.strip()
-        except Exception:
-            print("Could not find company name element, using fallback.")
-            name = card.text.strip().split("\n")[0]
 
-        try:  # try grabbing location
-            location = card.find_element(
-                By.CSS_SELECTOR, "span[class*='_coLocation']"
-            ).text.strip()
-        except Exception:
-            location = "Unknown"
+def scrape_batch(batch_name: str, limit: int = 10):
+    """Scrape YC company list and individual company pages."""
+    print(f"\nScraping batch: {batch_name}")
 
-        try:  # try grabbing short description
-            short_desc_el = card.find_element(
-                By.CSS_SELECTOR, "div.mb-1\\.5.text-sm span"
-            )
-            short_description = short_desc_el.text.strip()
-        except Exception:
-            short_description = ""
+    driver = start_driver(headless=True)  # start a chrome browser instance
+    cards = list_companies(driver, batch_name)
 
-        try:  # try grabbing tags
-            tag_elements = card.find_elements(
-                By.CSS_SELECTOR, "div[class*='pillWrapper'] span[class*='pill']"
-            )
-            tags = [t.text.strip() for t in tag_elements if t.text.strip()]
-        except Exception:
-            tags = []
+    projects = []
+
+    # Go into card here
+    for i, card in enumerate(cards[:limit], 1):
+        href = card["url"]
+        name = card["name"]
 
         # now go to the company page
         print(f"→ ({i}/{limit}) Visiting {name}")
-        time.sleep(1)
+        pause(1)
 
         # open company in a new tab
-        driver.execute_script(f"window.open('{href}', '_blank');")
-        driver.switch_to.window(driver.window_handles[1])
+        with stage("navigate", href):
+            driver.execute_script(f"window.open('{href}', '_blank');")
+            driver.switch_to.window(driver.window_handles[1])
 
-        try:  # try grabbing long description
-            desc_el = WebDriverWait(driver, 3).until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, "div.prose.max-w-full.whitespace-pre-line")
-                )
-            )
-            long_description = desc_el.text.strip()
-            long_description = long_description.replace("\u2019", " ")
-        except Exception:
-            long_description = "No description found"
-        info_rows = driver.find_elements(
-            By.CSS_SELECTOR, "div.flex.flex-row.justify-between"
-        )
-
-        # init defaults
-        founded = batch = team_size = status = primary_partner = None
-
-        # try grabbing extra info
-        for row in info_rows:
-            try:
-                label_el = row.find_element(By.CSS_SELECTOR, "span")
-                label = label_el.text.strip().lower().rstrip(":")
-
-                # value in either <span> or <a>
-                try:
-                    value_el = row.find_element(
-                        By.CSS_SELECTOR, "span:not(:first-child), a"
-                    )
-                    value = value_el.text.strip()
-                except Exception:
-                    value = None
-
-                # map into variables
-                if "founded" in label:
-                    founded = value
-                elif "batch" in label:
-                    batch = value
-                elif "team size" in label:
-                    team_size = value
-                elif "status" in label:
-                    status = value
-                elif "primary partner" in label:
-                    primary_partner = value
-
-            except Exception:
-                continue
-        projects.append(
-            Project(
-                name=name,
-                short_description=short_description,
-                long_description=long_description,
-                url=href,
-                source="YC",
-                tags=tags,
-                location=location,
-                founded=founded,
-                batch=batch,
-                team_size=team_size,
-                status=status,
-                primary_partner=primary_partner,
-            )
-        )
+        projects.append(company_project(driver, card))
 
         # close tab and return to yc all companies page
-        driver.close()
-        driver.switch_to.window(driver.window_handles[0])
-        time.sleep(1)
+        with stage("navigate"):
+            driver.close()
+            driver.switch_to.window(driver.window_handles[0])
+        pause(1)
 
     # * save results -- in json for logs
     output_path = f"yc_{batch_name.replace(' ', '_')}.json"
-    with open(output_path, "w") as f:
+    with stage("write"), open(output_path, "w") as f:
         json.dump([p.model_dump(mode="json") for p in projects], f, indent=2)
     print(f"Saved projects in json for logs to {output_path}")
     print("=========================================")
@@ -206,7 +171,15 @@ def just_test_scrape():
         store_in_db_yc(projects)
 
 
-if __name__ == "__main__":
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Scrape YC batches into the projects table")
+    add_arguments(ap)
+    args = ap.parse_args()
     batches = ["Fall 2024"]
-    run_scrape_yc(batches, 150)  # limit to 150 per batch for testing
+    with ScrapeRun("yc", args.telemetry, args.profile):
+        run_scrape_yc(batches, 150)  # limit to 150 per batch for testing
     # just_test_scrape()
+
+
+if __name__ == "__main__":
+    main()
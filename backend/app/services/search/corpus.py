@@ -0,0 +1,223 @@
+"""
+In-memory view of the local corpus snapshot used by the search endpoints.
+
+The snapshot's embedding matrix, ids and source codes stay memory-mapped
+read-only, so every uvicorn worker maps the same page-cache pages instead of
+holding its own copy; project rows and the lexical index live in process.
+`get_corpus()` checks the snapshot manifest at most every CORPUS_RELOAD_SECONDS
+and builds a new corpus for a new version on a background thread while requests
+keep using the current one. When the new version only appended rows, the new
+corpus extends copies of the current indexes with those rows instead of
+re-indexing everything. The finished corpus is published with a single
+reference swap and never modified afterwards, so a request holding it sees
+consistent rows, indexes and matrix. Without a snapshot it returns None and
+search falls back to the Supabase RPC alone.
+"""
+
+import copy
+import os
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.services.corpus.snapshot import SNAPSHOT_DIR, Snapshot, load_snapshot, read_manifest
+from app.services.search.facets import FacetIndex
+from app.services.search.filters import MetadataIndex
+from app.services.search.lexical import LexicalIndex
+from app.services.search.suggest import SuggestIndex, replay_queries
+
+load_dotenv()
+CORPUS_RELOAD_SECONDS = float(os.getenv("CORPUS_RELOAD_SECONDS", "30"))
+
+# rows of the embedding matrix scored per matrix multiply, bounds memory for big batches
+SCORE_BLOCK_ROWS = 65536
+
+
+class IdIndex:
+    """Project id -> corpus position, by binary search over the (memory-mapped) id array instead of a dict."""
+
+    def __init__(self, ids: np.ndarray):
+        self.ids = ids
+        # snapshots are written in id order; anything else gets a private sort order
+        ordered = ids.shape[0] < 2 or bool(np.all(ids[1:] > ids[:-1]))
+        self._order = None if ordered else np.argsort(ids, kind="stable")
+        self._sorted = ids if ordered else ids[self._order]
+
+    def __len__(self) -> int:
+        return int(self.ids.shape[0])
+
+    def get(self, project_id, default=None):
+        try:
+            key = int(project_id)
+        except (TypeError, ValueError):
+            return default
+        i = int(np.searchsorted(self._sorted, key))
+        if i == self._sorted.shape[0] or self._sorted[i] != key:
+            return default
+        return i if self._order is None else int(self._order[i])
+
+    def __contains__(self, project_id) -> bool:
+        return self.get(project_id) is not None
+
+    def __getitem__(self, project_id) -> int:
+        pos = self.get(project_id)
+        if pos is None:
+            raise KeyError(project_id)
+        return pos
+
+
+class SearchCorpus:
+    def __init__(self, snapshot: Snapshot):
+        self.version = snapshot.manifest.get("version")
+        self.ids = np.asarray(snapshot.ids)
+        self.embeddings = snapshot.embeddings
+        self.position = IdIndex(self.ids)
+        self.lexical = LexicalIndex()
+        self.facets = FacetIndex()
+        self.facets.set_source_codes(snapshot.sources, snapshot.source_names)
+        self.metadata = MetadataIndex()
+        self.suggest = SuggestIndex()
+        self.rows: list[dict] = snapshot.rows()
+        self.lexical.add(self.rows)
+        self.facets.add(self.rows)
+        self.metadata.add(self.rows)
+        self.suggest.add_rows(self.rows)
+        replay_queries(self.suggest)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def extended(self, snapshot: Snapshot) -> Optional["SearchCorpus"]:
+        """
+        A new corpus for the next snapshot version when that version only appended
+        rows, built from copies of this corpus's indexes; None when it has to be
+        rebuilt. This corpus is left unchanged.
+        """
+        n = len(self.rows)
+        manifest = snapshot.manifest
+        if self.version is None or manifest.get("version") != self.version + 1:
+            return None
+        if manifest.get("full") or manifest.get("updated") or manifest.get("appended") != len(snapshot) - n:
+            return None
+        if n and not np.array_equal(np.asarray(snapshot.ids[:n]), self.ids):
+            return None
+        rows = snapshot.rows(start=n)
+        corpus = copy.copy(self)
+        corpus.version = manifest.get("version")
+        corpus.ids = np.asarray(snapshot.ids)
+        corpus.embeddings = snapshot.embeddings
+        corpus.position = IdIndex(corpus.ids)
+        corpus.rows = self.rows + rows
+        corpus.lexical = self.lexical.extended(rows)
+        corpus.facets = self.facets.extended(rows, snapshot.sources, snapshot.source_names)
+        corpus.metadata = self.metadata.extended(rows)
+        corpus.suggest = self.suggest.extended(rows)
+        return corpus
+
+    def vector_search(self, query: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> list[tuple[int, float]]:
+        """Exact cosine top-k over the stored embeddings, scoring only the positions in `mask`."""
+        return self.batch_vector_search(query[None, :], k, mask)[0]
+
+    def batch_vector_search(
+        self, queries: np.ndarray, k: int, mask: Optional[np.ndarray] = None
+    ) -> list[list[tuple[int, float]]]:
+        """Top-k for many unit query vectors (m, D) with one matrix multiply per block of candidates."""
+        n = min(len(self.rows), len(self.embeddings))
+        candidates = np.arange(n) if mask is None else np.flatnonzero(mask[:n])
+        m = queries.shape[0]
+        if not candidates.size:
+            return [[] for _ in range(m)]
+
+        best_pos = np.empty((m, 0), dtype=np.int64)
+        best_score = np.empty((m, 0), dtype=np.float32)
+        for start in range(0, candidates.size, SCORE_BLOCK_ROWS):
+            block = candidates[start : start + SCORE_BLOCK_ROWS]
+            # unfiltered blocks are contiguous: a slice reads the shared mapping, fancy indexing would copy it
+            matrix = self.embeddings[start : start + block.size] if mask is None else self.embeddings[block]
+            scores = queries @ matrix.T  # (m, block)
+            if block.size > k:
+                top = np.argpartition(-scores, k, axis=1)[:, :k]
+                scores = np.take_along_axis(scores, top, axis=1)
+                positions = block[top]
+            else:
+                positions = np.broadcast_to(block, scores.shape)
+            best_pos = np.concatenate([best_pos, positions], axis=1)
+            best_score = np.concatenate([best_score, scores], axis=1)
+            if best_pos.shape[1] > k:
+                keep = np.argpartition(-best_score, k, axis=1)[:, :k]
+                best_pos = np.take_along_axis(best_pos, keep, axis=1)
+                best_score = np.take_along_axis(best_score, keep, axis=1)
+
+        order = np.argsort(-best_score, axis=1)
+        best_pos = np.take_along_axis(best_pos, order, axis=1)
+        best_score = np.take_along_axis(best_score, order, axis=1)
+        return [
+            [(int(p), float(sc)) for p, sc in zip(best_pos[i], best_score[i])]
+            for i in range(m)
+        ]
+
+    def row(self, position: int) -> dict:
+        return dict(self.rows[position])
+
+
+_corpus: Optional[SearchCorpus] = None
+_checked_at = 0.0
+_reloading = False
+_lock = threading.Lock()
+
+
+def _load(snapshot_dir: str, current: Optional[SearchCorpus] = None) -> Optional[SearchCorpus]:
+    """A new corpus for the snapshot on disk (extending `current` when possible), or None if there is none."""
+    started = time.perf_counter()
+    snapshot = load_snapshot(snapshot_dir)
+    if snapshot is None:
+        return None
+    corpus = current.extended(snapshot) if current is not None else None
+    if corpus is not None:
+        print(f"Search corpus extended to {len(corpus)} rows in {time.perf_counter() - started:.2f}s")
+        return corpus
+    corpus = SearchCorpus(snapshot)
+    print(
+        f"Search corpus loaded: {len(corpus)} rows (version {corpus.version}) "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+    return corpus
+
+
+def _reload(snapshot_dir: str) -> None:
+    global _corpus, _reloading
+    try:
+        # built off to the side and published in one assignment; readers keep the old one meanwhile
+        corpus = _load(snapshot_dir, _corpus)
+        if corpus is not None:
+            _corpus = corpus
+    except Exception as e:
+        print(f"Search corpus reload failed, keeping version {_corpus.version if _corpus else None}: {e}")
+    finally:
+        _reloading = False
+
+
+def get_corpus(snapshot_dir: str = SNAPSHOT_DIR) -> Optional[SearchCorpus]:
+    """
+    Current corpus. The first call loads it; after that a new snapshot version is
+    loaded in the background and swapped in when ready, so no request waits on it.
+    """
+    global _corpus, _checked_at, _reloading
+    if time.monotonic() - _checked_at < CORPUS_RELOAD_SECONDS:
+        return _corpus
+    with _lock:
+        if time.monotonic() - _checked_at < CORPUS_RELOAD_SECONDS:
+            return _corpus
+        _checked_at = time.monotonic()
+        manifest = read_manifest(snapshot_dir)
+        if manifest is None or (_corpus is not None and manifest.get("version") == _corpus.version):
+            return _corpus
+        if _corpus is None:
+            _corpus = _load(snapshot_dir)
+        elif not _reloading:
+            _reloading = True
+            threading.Thread(target=_reload, args=(snapshot_dir,), name="corpus-reload", daemon=True).start()
+        return _corpus
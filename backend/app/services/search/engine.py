@@ -0,0 +1,287 @@
+"""
+Hybrid search over the projects corpus.
+
+Vector results come from the configured vector store (the `match_projects` RPC by
+default, see app/services/db/vector_store.py); lexical results come from the
+in-process BM25/trigram index over the local snapshot. The two rankings are merged
+with reciprocal-rank fusion. A query that matches a project name with high
+confidence is answered from the lexical index alone, skipping the embedding call.
+With `diversity` > 0 a larger candidate set is re-ranked with MMR so near-identical
+projects don't fill the whole page.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Literal, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.services.corpus.dedup import load_cluster_map
+from app.services.corpus.neighbors import NEIGHBORS_K, project_neighbors
+from app.services.db.vector_store import get_vector_store
+from app.services.embedder.embedder import embded_query, embed_texts
+from app.services.search.corpus import SearchCorpus, get_corpus
+from app.services.search.facets import facet_counts, matches_tags
+from app.services.search.filters import MetadataFilters
+from app.services.search.ranking import maximal_marginal_relevance, reciprocal_rank_fusion
+from app.services.search.suggest import SUGGEST_LIMIT, record_query
+
+load_dotenv()
+NAME_MATCH_CONFIDENCE = float(os.getenv("NAME_MATCH_CONFIDENCE", "0.9"))
+
+RESULT_LIMIT = 20
+# candidates scored locally before MMR picks RESULT_LIMIT of them
+MMR_CANDIDATES = 200
+LEXICAL_CANDIDATES = 50
+# concurrent RPC calls when a batch has to fall back to match_projects
+RPC_FALLBACK_WORKERS = 8
+
+
+def _match_projects(embedding, sources: Optional[list[str]]) -> list[dict]:
+    return get_vector_store().match(embedding, sources)
+
+
+def _match_projects_filtered(embedding, sources: Optional[list[str]], filters: MetadataFilters) -> list[dict]:
+    return get_vector_store().match_filtered(embedding, sources, filters, RESULT_LIMIT)
+
+
+def _filter_mask(corpus: SearchCorpus, sources, tags, tags_mode, filters: Optional[MetadataFilters]):
+    mask = corpus.facets.filter_mask(sources, tags, tags_mode)
+    meta_mask = corpus.metadata.filter_mask(filters)
+    if meta_mask is None:
+        return mask
+    return meta_mask if mask is None else mask & meta_mask
+
+
+def _lexical_results(corpus: SearchCorpus, names, bm25) -> list[dict]:
+    """Name matches first (similarity = match confidence), then BM25 hits scaled below them."""
+    results = []
+    seen = set()
+    for pos, confidence in names:
+        if confidence >= NAME_MATCH_CONFIDENCE and pos not in seen:
+            seen.add(pos)
+            results.append({**corpus.row(pos), "similarity": round(confidence, 4)})
+    top = bm25[0][1] if bm25 else 1.0
+    floor = min((r["similarity"] for r in results), default=1.0)
+    for pos, score in bm25:
+        if pos not in seen:
+            seen.add(pos)
+            results.append({**corpus.row(pos), "similarity": round(floor * 0.9 * score / top, 4)})
+    return results[:RESULT_LIMIT]
+
+
+def _unit(embedding) -> np.ndarray:
+    q = np.asarray(embedding, dtype=np.float32)
+    return q / (np.linalg.norm(q) or 1.0)
+
+
+def collapse_duplicates(results: list[dict]) -> list[dict]:
+    """Keep the best-ranked project per duplicate cluster; the others are listed under `duplicates`."""
+    clusters = load_cluster_map()
+    kept: dict[int, dict] = {}
+    collapsed = []
+    for row in results:
+        cluster = clusters.get(row["id"], row["id"])
+        if cluster in kept:
+            kept[cluster]["duplicates"].append(row["id"])
+            continue
+        kept[cluster] = {**row, "cluster_id": cluster, "duplicates": []}
+        collapsed.append(kept[cluster])
+    return collapsed
+
+
+def _result_embeddings(results: list[dict], corpus: Optional[SearchCorpus]) -> tuple[np.ndarray, np.ndarray]:
+    """(matrix, has_embedding) for result rows: snapshot rows first, the rest in one vector store lookup."""
+    vectors: dict[int, np.ndarray] = {}
+    missing = []
+    for row in results:
+        pos = corpus.position.get(row["id"]) if corpus else None
+        if pos is not None and pos < len(corpus.embeddings):
+            vectors[row["id"]] = corpus.embeddings[pos]
+        else:
+            missing.append(row["id"])
+    if missing:
+        vectors.update(get_vector_store().embeddings(missing))
+
+    has_embedding = np.array([row["id"] in vectors for row in results], dtype=bool)
+    if not has_embedding.any():
+        return np.zeros((0, 0), dtype=np.float32), has_embedding
+    return np.vstack([vectors[row["id"]] for row in results if row["id"] in vectors]), has_embedding
+
+
+def diversify(
+    results: list[dict], diversity: float, corpus: Optional[SearchCorpus] = None, k: int = RESULT_LIMIT
+) -> list[dict]:
+    """MMR re-rank of results by their `similarity` and stored embeddings. diversity=0 keeps the order."""
+    if diversity <= 0 or len(results) <= 1:
+        return results[:k]
+    matrix, has_embedding = _result_embeddings(results, corpus)
+    candidates = [row for row, ok in zip(results, has_embedding) if ok]
+    if not candidates:
+        return results[:k]
+    relevance = np.array([row.get("similarity") or 0.0 for row in candidates], dtype=np.float32)
+    picked = [candidates[i] for i in maximal_marginal_relevance(relevance, matrix, k, diversity)]
+    # rows without an embedding can't be compared, so they only fill leftover slots
+    picked += [row for row, ok in zip(results, has_embedding) if not ok]
+    return picked[:k]
+
+
+def _response(query: str, mode: str, results: list[dict], collapse: bool = False) -> dict:
+    if collapse:
+        results = collapse_duplicates(results)
+    if results:
+        corpus = get_corpus()
+        record_query(corpus.suggest if corpus else None, query)
+    return {"query": query, "mode": mode, "results": results, "facets": facet_counts(results)}
+
+
+def search_projects(
+    query: str,
+    sources: Optional[list[str]] = None,
+    tags: Optional[list[str]] = None,
+    tags_mode: Literal["and", "or"] = "and",
+    collapse: bool = False,
+    diversity: float = 0.0,
+    filters: Optional[MetadataFilters] = None,
+) -> dict:
+    """Run a hybrid search and return {"query", "mode", "results", "facets"}."""
+    if not query.strip():
+        return _response(query, "vector", [])
+    corpus = get_corpus()
+    mask = _filter_mask(corpus, sources, tags, tags_mode, filters) if corpus else None
+
+    names: list = []
+    bm25: list = []
+    if corpus:
+        names = corpus.lexical.match_name(query, mask)
+        bm25 = corpus.lexical.search(query, LEXICAL_CANDIDATES, mask)
+        if names and names[0][1] >= NAME_MATCH_CONFIDENCE:
+            return _response(query, "lexical", _lexical_results(corpus, names, bm25), collapse)
+
+    embedding = embded_query(query)
+    q = _unit(embedding)
+    if corpus and (tags or filters or diversity > 0):
+        # tag and metadata filters are applied first; only the remaining candidates are scored
+        limit = MMR_CANDIDATES if diversity > 0 else RESULT_LIMIT
+        vector_results = [
+            {**corpus.row(pos), "similarity": score} for pos, score in corpus.vector_search(q, limit, mask)
+        ]
+    else:
+        if filters:
+            vector_results = _match_projects_filtered(embedding, sources, filters)
+        else:
+            vector_results = _match_projects(embedding, sources)
+        if tags:
+            vector_results = [r for r in vector_results if matches_tags(r, tags, tags_mode)]
+    if not corpus or not (names or bm25):
+        return _response(query, "vector", diversify(vector_results, diversity, corpus), collapse)
+
+    by_id = {r["id"]: r for r in vector_results}
+    lexical_ids = list(dict.fromkeys(corpus.rows[pos]["id"] for pos, _ in names + bm25))
+    fused = reciprocal_rank_fusion([[r["id"] for r in vector_results], lexical_ids])
+
+    results = []
+    for pid, _ in fused[: max(len(vector_results), RESULT_LIMIT)]:
+        if pid in by_id:
+            results.append(by_id[pid])
+            continue
+        pos = corpus.position[pid]
+        similarity = float(corpus.embeddings[pos] @ q) if pos < len(corpus.embeddings) else 0.0
+        results.append({**corpus.row(pos), "similarity": similarity})
+    return _response(query, "hybrid", diversify(results, diversity, corpus), collapse)
+
+
+def nearest_projects(
+    embedding, k: int = RESULT_LIMIT, diversity: float = 0.0, sources: Optional[list[str]] = None
+) -> list[dict]:
+    """Vector-only neighbours of an embedding (chat retrieval), MMR re-ranked when diversity > 0."""
+    corpus = get_corpus()
+    if corpus and diversity > 0:
+        mask = corpus.facets.filter_mask(sources)
+        hits = corpus.vector_search(_unit(embedding), MMR_CANDIDATES, mask)
+        results = [{**corpus.row(pos), "similarity": score} for pos, score in hits]
+    else:
+        results = _match_projects(embedding, sources)
+    return diversify(results, diversity, corpus, k)
+
+
+def batch_search(
+    queries: list[str],
+    sources: Optional[list[str]] = None,
+    tags: Optional[list[str]] = None,
+    tags_mode: Literal["and", "or"] = "and",
+    k: int = RESULT_LIMIT,
+) -> list[dict]:
+    """Embed every query in one request and score them together against the corpus."""
+    if not queries:
+        return []
+    embeddings = embed_texts(queries)
+    corpus = get_corpus()
+    # blank queries are not embedded and match nothing
+    live = [i for i, e in enumerate(embeddings) if e is not None]
+    per_query: list[list[dict]] = [[] for _ in queries]
+
+    if corpus and live:
+        mask = corpus.facets.filter_mask(sources, tags, tags_mode)
+        q = np.vstack([_unit(embeddings[i]) for i in live])
+        ranked = corpus.batch_vector_search(q, k, mask)
+        for i, hits in zip(live, ranked):
+            per_query[i] = [{**corpus.row(pos), "similarity": score} for pos, score in hits]
+    elif live:
+        with ThreadPoolExecutor(max_workers=min(RPC_FALLBACK_WORKERS, len(live))) as pool:
+            matched = pool.map(lambda i: _match_projects(embeddings[i], sources), live)
+            for i, rows in zip(live, matched):
+                if tags:
+                    rows = [r for r in rows if matches_tags(r, tags, tags_mode)]
+                per_query[i] = rows[:k]
+
+    return [
+        {"query": query, "mode": "vector", "results": results, "facets": facet_counts(results)}
+        for query, results in zip(queries, per_query)
+    ]
+
+
+def _stored_embedding(project_id: int) -> Optional[np.ndarray]:
+    return get_vector_store().embeddings([project_id]).get(project_id)
+
+
+def similar_projects(
+    project_id: int,
+    sources: Optional[list[str]] = None,
+    tags: Optional[list[str]] = None,
+    tags_mode: Literal["and", "or"] = "and",
+    k: int = RESULT_LIMIT,
+) -> Optional[dict]:
+    """Projects closest to a stored project's own embedding. None if the project doesn't exist."""
+    corpus = get_corpus()
+    pos = corpus.position.get(project_id) if corpus else None
+
+    graph = project_neighbors(project_id) if pos is not None and not (sources or tags) and k <= NEIGHBORS_K else None
+    if graph and all(pid in corpus.position for pid, _ in graph[:k]):
+        # precomputed by the neighbor graph job, no scoring at request time
+        results = [{**corpus.row(corpus.position[pid]), "similarity": score} for pid, score in graph[:k]]
+    elif pos is not None and pos < len(corpus.embeddings):
+        mask = corpus.facets.filter_mask(sources, tags, tags_mode)
+        if mask is None:
+            mask = np.ones(len(corpus), dtype=bool)
+        mask[pos] = False
+        q = _unit(corpus.embeddings[pos])
+        results = [{**corpus.row(p), "similarity": score} for p, score in corpus.vector_search(q, k, mask)]
+    else:
+        embedding = _stored_embedding(project_id)
+        if embedding is None:
+            return None
+        results = [r for r in _match_projects(embedding, sources) if r.get("id") != project_id]
+        if tags:
+            results = [r for r in results if matches_tags(r, tags, tags_mode)]
+        results = results[:k]
+    return {"id": project_id, "results": results, "facets": facet_counts(results)}
+
+
+def suggest(prefix: str, limit: int = SUGGEST_LIMIT) -> list[dict]:
+    """Completions for a partial query from project names, tags and past queries."""
+    corpus = get_corpus()
+    if corpus is None:
+        return []
+    return corpus.suggest.complete(prefix, limit)
@@ -0,0 +1,122 @@
+"""
+Tag and source facet index.
+
+Keeps a posting list of corpus positions per tag and per source, so filters turn
+into boolean masks before any vector scoring, and counts facet values over a
+result set without touching the database. When the snapshot carries per-row
+source codes, source filters read those (memory-mapped, shared by all workers)
+instead of keeping source posting lists.
+"""
+
+from collections import Counter, defaultdict
+from typing import Iterable, Literal, Optional
+
+import numpy as np
+
+FACET_LIMIT = 30
+
+
+def normalize_tag(tag) -> str:
+    return " ".join(str(tag).lower().replace("_", " ").split())
+
+
+class FacetIndex:
+    def __init__(self):
+        self.size = 0
+        self.tags: dict[str, list[int]] = defaultdict(list)
+        self.sources: dict[str, list[int]] = defaultdict(list)
+        self._arrays: dict[tuple[str, str], np.ndarray] = {}
+        self._source_codes: Optional[tuple[np.ndarray, list[str]]] = None
+
+    def set_source_codes(self, codes: Optional[np.ndarray], names: list[str]) -> None:
+        """Per-position index into `names` (-1 for none); covers rows added before or after the call."""
+        self._source_codes = None if codes is None else (codes, names)
+
+    def add(self, rows: Iterable[dict]) -> None:
+        for row in rows:
+            pos = self.size
+            self.size += 1
+            for tag in dict.fromkeys(normalize_tag(t) for t in row.get("tags") or []):
+                if tag:
+                    self.tags[tag].append(pos)
+            if row.get("source") and self._source_codes is None:
+                self.sources[row["source"]].append(pos)
+        self._arrays.clear()
+
+    def extended(self, rows: Iterable[dict], codes: Optional[np.ndarray], names: list[str]) -> "FacetIndex":
+        """A new index with `rows` appended and the new snapshot's source codes; this one is left unchanged."""
+        new = FacetIndex()
+        new.size = self.size
+        # posting lists are small next to the rows, so they are copied rather than shared
+        new.tags = defaultdict(list, {k: list(v) for k, v in self.tags.items()})
+        new.sources = defaultdict(list, {k: list(v) for k, v in self.sources.items()})
+        new.set_source_codes(codes, names)
+        new.add(rows)
+        return new
+
+    def _positions(self, kind: str, value: str) -> np.ndarray:
+        key = (kind, value)
+        arr = self._arrays.get(key)
+        if arr is None:
+            postings = self.tags if kind == "tag" else self.sources
+            arr = np.asarray(postings.get(value, ()), dtype=np.int64)
+            self._arrays[key] = arr
+        return arr
+
+    def _source_mask(self, values: list[str]) -> np.ndarray:
+        codes, names = self._source_codes
+        wanted = [i for i, name in enumerate(names) if name in values]
+        mask = np.zeros(self.size, dtype=bool)
+        n = min(self.size, len(codes))
+        mask[:n] = np.isin(codes[:n], wanted)
+        return mask
+
+    def _mask(self, kind: str, values: list[str], mode: str) -> np.ndarray:
+        if kind == "source" and self._source_codes is not None:
+            return self._source_mask(values)
+        combined = np.ones(self.size, dtype=bool) if mode == "and" else np.zeros(self.size, dtype=bool)
+        for value in values:
+            mask = np.zeros(self.size, dtype=bool)
+            mask[self._positions(kind, value)] = True
+            combined = combined & mask if mode == "and" else combined | mask
+        return combined
+
+    def filter_mask(
+        self,
+        sources: Optional[list[str]] = None,
+        tags: Optional[list[str]] = None,
+        tags_mode: Literal["and", "or"] = "and",
+    ) -> Optional[np.ndarray]:
+        """Boolean mask over corpus positions, or None when nothing is filtered."""
+        mask = None
+        if sources:
+            mask = self._mask("source", sources, "or")
+        if tags:
+            tag_mask = self._mask("tag", [normalize_tag(t) for t in tags], tags_mode)
+            mask = tag_mask if mask is None else mask & tag_mask
+        return mask
+
+
+def matches_tags(row: dict, tags: list[str], tags_mode: str = "and") -> bool:
+    """Same tag semantics as FacetIndex, applied to a single result row."""
+    have = {normalize_tag(t) for t in row.get("tags") or []}
+    want = [normalize_tag(t) for t in tags]
+    return all(t in have for t in want) if tags_mode == "and" else any(t in have for t in want)
+
+
+def facet_counts(results: list[dict], limit: int = FACET_LIMIT) -> dict:
+    """Tag and source counts over a result set, most common first."""
+    tags: Counter = Counter()
+    labels: dict[str, str] = {}
+    sources: Counter = Counter()
+    for row in results:
+        for tag in dict.fromkeys(row.get("tags") or []):
+            key = normalize_tag(tag)
+            labels.setdefault(key, tag)
+            tags[key] += 1
+        if row.get("source"):
+            sources[row["source"]] += 1
+    return {
+        "tags": [{"value": labels[k], "count": c} for k, c in tags.most_common(limit)],
+        "sources": [{"value": k, "count": c} for k, c in sources.most_common()],
+    }
@@ -0,0 +1,186 @@
+"""
+Typed filters on the YC metadata stored with each project
+(batch, founded, team_size, status, location).
+
+`MetadataIndex` keeps posting lists per batch/status/location value and numeric
+columns for founded and team size, so a filter becomes a boolean mask over
+corpus positions before any scoring. `matches` applies the same rules to one row
+(RPC fallback), and `rpc_params` turns a filter into arguments for the
+`match_projects_filtered` function in sql/match_projects_filtered.sql.
+"""
+
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+import numpy as np
+
+SEASONS = {"winter": "w", "spring": "x", "summer": "s", "fall": "f", "autumn": "f"}
+SEASON_NAMES = {"w": "winter", "x": "spring", "s": "summer", "f": "fall"}
+
+
+# the first number in the text, with optional thousands separators; same pattern as project_meta_int in SQL
+_INT_RE = re.compile(r"\d{1,3}(?:,\d{3})+|\d+")
+MAX_INT_DIGITS = 9  # fits the SQL int
+
+
+def parse_int(value) -> Optional[int]:
+    """'1,200' -> 1200, '11-50' -> 11, '2021-2022' -> 2021, no digits or over MAX_INT_DIGITS -> None."""
+    m = _INT_RE.search(str(value)) if value is not None else None
+    digits = m.group().replace(",", "") if m else ""
+    return int(digits) if digits and len(digits) <= MAX_INT_DIGITS else None
+
+
+def normalize_batch(value) -> str:
+    """'Winter 2024', 'W24' and 'w24' all become 'w24'."""
+    text = " ".join(str(value or "").lower().split())
+    m = re.fullmatch(r"([wxsf])(\d{2})", text)
+    if m:
+        return text
+    m = re.fullmatch(r"(winter|spring|summer|fall|autumn) (\d{4})", text)
+    if m:
+        return f"{SEASONS[m.group(1)]}{m.group(2)[2:]}"
+    return text
+
+
+def batch_variants(value) -> list[str]:
+    """Every spelling of a batch the database might hold, lower-cased ('w24', 'winter 2024')."""
+    code = normalize_batch(value)
+    m = re.fullmatch(r"([wxsf])(\d{2})", code)
+    if not m:
+        return [code]
+    return [code, f"{SEASON_NAMES[m.group(1)]} 20{m.group(2)}"]
+
+
+def _norm(value) -> str:
+    return " ".join(str(value or "").lower().split())
+
+
+@dataclass
+class MetadataFilters:
+    batch: list[str] = field(default_factory=list)
+    status: list[str] = field(default_factory=list)
+    location: list[str] = field(default_factory=list)  # substring match, any of
+    founded_min: Optional[int] = None
+    founded_max: Optional[int] = None
+    team_size_min: Optional[int] = None
+    team_size_max: Optional[int] = None
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.batch
+            or self.status
+            or self.location
+            or any(
+                v is not None
+                for v in (self.founded_min, self.founded_max, self.team_size_min, self.team_size_max)
+            )
+        )
+
+    def matches(self, row: dict) -> bool:
+        meta = row.get("metadata") or {}
+        if self.batch and normalize_batch(meta.get("batch")) not in {normalize_batch(b) for b in self.batch}:
+            return False
+        if self.status and _norm(meta.get("status")) not in {_norm(s) for s in self.status}:
+            return False
+        if self.location and not any(_norm(loc) in _norm(meta.get("location")) for loc in self.location):
+            return False
+        for value, low, high in (
+            (parse_int(meta.get("founded")), self.founded_min, self.founded_max),
+            (parse_int(meta.get("team_size")), self.team_size_min, self.team_size_max),
+        ):
+            if (low is not None or high is not None) and value is None:
+                return False
+            if (low is not None and value < low) or (high is not None and value > high):
+                return False
+        return True
+
+    def rpc_params(self) -> dict:
+        """Arguments for match_projects_filtered; values are lower-cased like its indexed expressions."""
+        return {
+            "batches": [v for b in self.batch for v in batch_variants(b)] or None,
+            "statuses": [_norm(s) for s in self.status] or None,
+            "locations": [f"%{_norm(loc)}%" for loc in self.location] or None,
+            "founded_min": self.founded_min,
+            "founded_max": self.founded_max,
+            "team_size_min": self.team_size_min,
+            "team_size_max": self.team_size_max,
+        }
+
+
+class MetadataIndex:
+    def __init__(self):
+        self.size = 0
+        self.batches: dict[str, list[int]] = defaultdict(list)
+        self.statuses: dict[str, list[int]] = defaultdict(list)
+        # few distinct locations, so substring filters scan the keys, not the rows
+        self.locations: dict[str, list[int]] = defaultdict(list)
+        self._founded: list[float] = []
+        self._team_size: list[float] = []
+        self._columns: Optional[tuple[np.ndarray, np.ndarray]] = None
+
+    def add(self, rows: Iterable[dict]) -> None:
+        for row in rows:
+            pos = self.size
+            self.size += 1
+            meta = row.get("metadata") or {}
+            if meta.get("batch"):
+                self.batches[normalize_batch(meta["batch"])].append(pos)
+            if meta.get("status"):
+                self.statuses[_norm(meta["status"])].append(pos)
+            if meta.get("location"):
+                self.locations[_norm(meta["location"])].append(pos)
+            founded, team_size = parse_int(meta.get("founded")), parse_int(meta.get("team_size"))
+            self._founded.append(np.nan if founded is None else founded)
+            self._team_size.append(np.nan if team_size is None else team_size)
+        self._columns = None
+
+    def extended(self, rows: Iterable[dict]) -> "MetadataIndex":
+        """A new index with `rows` appended; this one is left unchanged."""
+        new = MetadataIndex()
+        new.size = self.size
+        for name in ("batches", "statuses", "locations"):
+            setattr(new, name, defaultdict(list, {k: list(v) for k, v in getattr(self, name).items()}))
+        new._founded = list(self._founded)
+        new._team_size = list(self._team_size)
+        new.add(rows)
+        return new
+
+    def _numeric(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._columns is None:
+            self._columns = (
+                np.asarray(self._founded, dtype=np.float32),
+                np.asarray(self._team_size, dtype=np.float32),
+            )
+        return self._columns
+
+    def _any_of(self, postings: dict[str, list[int]], keys: Iterable[str]) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        for key in keys:
+            mask[np.asarray(postings.get(key, ()), dtype=np.int64)] = True
+        return mask
+
+    def filter_mask(self, filters: Optional[MetadataFilters]) -> Optional[np.ndarray]:
+        """Boolean mask over corpus positions, or None when nothing is filtered."""
+        if not filters:
+            return None
+        mask = np.ones(self.size, dtype=bool)
+        if filters.batch:
+            mask &= self._any_of(self.batches, {normalize_batch(b) for b in filters.batch})
+        if filters.status:
+            mask &= self._any_of(self.statuses, {_norm(s) for s in filters.status})
+        if filters.location:
+            wanted = [_norm(loc) for loc in filters.location]
+            mask &= self._any_of(self.locations, [k for k in self.locations if any(w in k for w in wanted)])
+        founded, team_size = self._numeric()
+        for column, low, high in (
+            (founded, filters.founded_min, filters.founded_max),
+            (team_size, filters.team_size_min, filters.team_size_max),
+        ):
+            # NaN (unknown) fails every comparison, so rows without the value drop out
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+        return mask
@@ -0,0 +1,152 @@
+"""
+In-process lexical index over the corpus.
+
+BM25 over name, tags, short and long description (name and tags weighted up),
+plus a trigram index over project names for fuzzy company-name lookups. Documents
+are addressed by their position in the corpus. `add` appends in place while an
+index is being built; `extended` returns a new index with more documents that
+shares the untouched posting lists with this one, so a published index is never
+modified and new rows cost only their own tokenization.
+"""
+
+import math
+import re
+from collections import defaultdict
+from typing import Iterable, Optional
+
+import numpy as np
+
+FIELD_WEIGHTS = {"name": 3.0, "tags": 2.0, "short_description": 1.5, "long_description": 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it",
+    "of", "on", "or", "that", "the", "to", "with", "we", "our", "your", "you",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    if not text:
+        return []
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def normalize_name(name: Optional[str]) -> str:
+    return " ".join(_TOKEN_RE.findall((name or "").lower()))
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class LexicalIndex:
+    def __init__(self):
+        self.postings: dict[str, dict[int, float]] = defaultdict(dict)
+        self.doc_len: list[float] = []
+        self.total_len = 0.0
+        self.names: list[str] = []
+        self.name_lookup: dict[str, list[int]] = defaultdict(list)
+        self.name_trigrams: dict[str, set[int]] = defaultdict(set)
+        # (table, key) entries already copied from the index this one was extended from; None when nothing is shared
+        self._owned: Optional[set[tuple[str, str]]] = None
+
+    def __len__(self) -> int:
+        return len(self.doc_len)
+
+    def add(self, rows: Iterable[dict]) -> None:
+        """Append documents; their positions continue from the current size."""
+        for row in rows:
+            doc = len(self.doc_len)
+            tf: dict[str, float] = defaultdict(float)
+            for field, weight in FIELD_WEIGHTS.items():
+                value = row.get(field)
+                if isinstance(value, list):
+                    value = " ".join(str(v) for v in value)
+                for term in tokenize(value):
+                    tf[term] += weight
+            if self._owned is None:
+                for term, freq in tf.items():
+                    self.postings[term][doc] = freq
+            else:
+                for term, freq in tf.items():
+                    self._writable("postings", term)[doc] = freq
+            length = sum(tf.values())
+            self.doc_len.append(length)
+            self.total_len += length
+
+            name = normalize_name(row.get("name"))
+            self.names.append(name)
+            if name:
+                self._writable("name_lookup", name).append(doc)
+                for gram in trigrams(name):
+                    self._writable("name_trigrams", gram).add(doc)
+
+    def _writable(self, table: str, key: str):
+        """Entry of `table` to modify, copied first if it is still shared with the index this was extended from."""
+        entries = getattr(self, table)
+        if self._owned is not None and (table, key) not in self._owned:
+            self._owned.add((table, key))
+            if key in entries:
+                entries[key] = type(entries[key])(entries[key])
+        return entries[key]
+
+    def extended(self, rows: Iterable[dict]) -> "LexicalIndex":
+        """A new index with `rows` appended; this one is left unchanged and can keep serving reads."""
+        new = LexicalIndex()
+        new.postings = defaultdict(dict, self.postings)
+        new.doc_len = list(self.doc_len)
+        new.total_len = self.total_len
+        new.names = list(self.names)
+        new.name_lookup = defaultdict(list, self.name_lookup)
+        new.name_trigrams = defaultdict(set, self.name_trigrams)
+        new._owned = set()
+        new.add(rows)
+        new._owned = None
+        return new
+
+    def search(self, query: str, k: int = 20, allowed: Optional[np.ndarray] = None) -> list[tuple[int, float]]:
+        """BM25 top-k as (position, score). `allowed` is an optional boolean mask over positions."""
+        n = len(self.doc_len)
+        if not n:
+            return []
+        avgdl = self.total_len / n or 1.0
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc, freq in posting.items():
+                if allowed is not None and not allowed[doc]:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[doc] / avgdl)
+                scores[doc] += idf * freq * (BM25_K1 + 1) / (freq + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def match_name(self, query: str, allowed: Optional[np.ndarray] = None, min_score: float = 0.5) -> list[tuple[int, float]]:
+        """Projects whose name matches the query, as (position, confidence in [0, 1])."""
+        name = normalize_name(query)
+        if not name:
+            return []
+        exact = [d for d in self.name_lookup.get(name, []) if allowed is None or allowed[d]]
+        if exact:
+            return [(d, 1.0) for d in exact]
+
+        # Dice coefficient over name trigrams
+        grams = trigrams(name)
+        overlap: dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for doc in self.name_trigrams.get(gram, ()):
+                overlap[doc] += 1
+        matches = []
+        for doc, shared in overlap.items():
+            if allowed is not None and not allowed[doc]:
+                continue
+            score = 2 * shared / (len(grams) + len(trigrams(self.names[doc])))
+            if score >= min_score:
+                matches.append((doc, score))
+        return sorted(matches, key=lambda item: item[1], reverse=True)
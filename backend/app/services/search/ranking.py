@@ -0,0 +1,47 @@
+"""Rank fusion and re-ranking helpers for search results."""
+
+from collections import defaultdict
+from typing import Hashable, Iterable
+
+import numpy as np
+
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(rankings: Iterable[list[Hashable]], k: int = RRF_K) -> list[tuple[Hashable, float]]:
+    """Fuse ranked id lists: score(id) = sum over lists of 1 / (k + rank)."""
+    scores: dict[Hashable, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, 1):
+            scores[item] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def maximal_marginal_relevance(
+    relevance: np.ndarray, vectors: np.ndarray, k: int, diversity: float = 0.5
+) -> list[int]:
+    """
+    Greedy MMR over candidate rows: each step picks the candidate maximizing
+    (1 - diversity) * relevance - diversity * (max similarity to already picked).
+    Only one matrix-vector product per pick, so a few hundred candidates take well under a millisecond.
+    """
+    n = len(relevance)
+    k = min(k, n)
+    if k == 0:
+        return []
+    relevance = np.asarray(relevance, dtype=np.float32)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.sqrt(np.einsum("ij,ij->i", vectors, vectors))
+    if not np.allclose(norms, 1.0, atol=1e-3):
+        # stored embeddings are already unit length; only rescale when they aren't
+        vectors = vectors / np.maximum(norms, 1e-12)[:, None]
+
+    weighted = (1.0 - diversity) * relevance
+    max_sim = np.full(n, -np.inf, dtype=np.float32)
+    picked = [int(np.argmax(relevance))]
+    for _ in range(k - 1):
+        max_sim = np.maximum(max_sim, vectors @ vectors[picked[-1]])
+        scores = weighted - diversity * max_sim
+        scores[picked] = -np.inf
+        picked.append(int(np.argmax(scores)))
+    return picked
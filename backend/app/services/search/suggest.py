@@ -0,0 +1,159 @@
+"""
+Search-as-you-type suggestions.
+
+A sorted array of normalized keys searched with binary search. Keys come from
+project names (full name and each later word, so "rob" finds "Acme Robotics"),
+tags, and queries people have searched before (only once they have been
+searched SUGGEST_MIN_QUERY_COUNT times, so one person's query is not shown to
+everyone). Each suggestion carries a frequency weight used for ranking. Prefix
+results are cached until a key under the prefix is added or reweighted. Searches
+add queries from the request threadpool, so the index is guarded by a lock.
+New snapshot rows go into an `extended` copy, merged into the sorted keys in one
+pass, while the published index keeps serving.
+"""
+
+import bisect
+import heapq
+import os
+import threading
+from collections import Counter
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+SUGGEST_MIN_QUERY_COUNT = max(1, int(os.getenv("SUGGEST_MIN_QUERY_COUNT", "3")))
+
+SUGGEST_LIMIT = 8
+QUERY_WEIGHT = 3
+MAX_TRACKED_QUERIES = 10000
+_CACHE_SIZE = 4096
+
+# queries that returned results, kept across corpus rebuilds
+_query_counts: Counter = Counter()
+_query_lock = threading.Lock()
+
+
+def normalize(text: str) -> str:
+    return " ".join(str(text).lower().split())
+
+
+def _keys_for(text: str, kind: str) -> set[str]:
+    words = normalize(text).split(" ")
+    if kind == "name":
+        return {" ".join(words[i:]) for i in range(len(words))}
+    return {" ".join(words)}
+
+
+class SuggestIndex:
+    def __init__(self):
+        self.keys: list[str] = []
+        self.entries: list[tuple[str, str]] = []  # (text, kind), parallel to keys
+        self.weights: Counter = Counter()  # (text, kind) -> frequency
+        self.entry_keys: dict[tuple[str, str], set[str]] = {}
+        self._cache: dict[str, list[dict]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, text: str, kind: str, weight: int = 1) -> None:
+        self.add_many([(text, kind, weight)])
+
+    def add_many(self, items) -> None:
+        """Add (text, kind, weight) items; big batches are sorted and merged in one pass instead of inserted."""
+        with self._lock:
+            self._add_many(items)
+
+    def _add_many(self, items) -> None:
+        new_pairs = []
+        touched = []
+        for text, kind, weight in items:
+            text = " ".join(str(text).split())
+            if not text:
+                continue
+            entry = (text, kind)
+            if entry not in self.entry_keys:
+                self.entry_keys[entry] = _keys_for(text, kind)
+                new_pairs.extend((key, entry) for key in self.entry_keys[entry])
+            self.weights[entry] += weight
+            touched.append(entry)
+
+        if len(new_pairs) > 64:
+            merged = list(heapq.merge(zip(self.keys, self.entries), sorted(new_pairs)))
+            self.keys = [k for k, _ in merged]
+            self.entries = [e for _, e in merged]
+            self._cache.clear()
+            return
+        for key, entry in new_pairs:
+            pos = bisect.bisect_left(self.keys, key)
+            self.keys.insert(pos, key)
+            self.entries.insert(pos, entry)
+        # only prefixes of the touched keys can have changed
+        for entry in touched:
+            for key in self.entry_keys[entry]:
+                for i in range(1, len(key) + 1):
+                    self._cache.pop(key[:i], None)
+
+    def add_rows(self, rows: list[dict]) -> None:
+        items = []
+        for row in rows:
+            if row.get("name"):
+                items.append((row["name"], "name", 1))
+            for tag in row.get("tags") or []:
+                items.append((tag, "tag", 1))
+        self.add_many(items)
+
+    def extended(self, rows: list[dict]) -> "SuggestIndex":
+        """A new index with the names and tags of `rows` added (queries carry over); this one is left unchanged."""
+        new = SuggestIndex()
+        with self._lock:
+            new.keys = list(self.keys)
+            new.entries = list(self.entries)
+            new.weights = Counter(self.weights)
+            # key sets are never modified once created, so they can be shared
+            new.entry_keys = dict(self.entry_keys)
+        new.add_rows(rows)
+        return new
+
+    def complete(self, prefix: str, limit: int = SUGGEST_LIMIT) -> list[dict]:
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        cached = self._cache.get(prefix)
+        if cached is not None:
+            return cached[:limit]
+        with self._lock:
+            start = bisect.bisect_left(self.keys, prefix)
+            end = bisect.bisect_left(self.keys, prefix + "\uffff")
+            matches = set(self.entries[start:end])
+            ranked = sorted(matches, key=lambda e: (-self.weights[e], len(e[0]), e[0]))
+            cached = [
+                {"text": text, "kind": kind, "count": self.weights[(text, kind)]}
+                for text, kind in ranked[: SUGGEST_LIMIT * 4]
+            ]
+            if len(self._cache) >= _CACHE_SIZE:
+                self._cache.clear()
+            self._cache[prefix] = cached
+        return cached[:limit]
+
+
+def record_query(index: Optional[SuggestIndex], query: str) -> None:
+    """Count a searched query; it joins the live index once it reaches SUGGEST_MIN_QUERY_COUNT searches."""
+    text = " ".join(query.split())
+    if not text or len(text) > 100:
+        return
+    with _query_lock:
+        _query_counts[text] += 1
+        count = _query_counts[text]
+        if len(_query_counts) > MAX_TRACKED_QUERIES:
+            # drop the long tail of one-off queries
+            for rare, _ in _query_counts.most_common()[MAX_TRACKED_QUERIES // 2 :]:
+                del _query_counts[rare]
+    if index is None or count < SUGGEST_MIN_QUERY_COUNT:
+        return
+    # the first time it qualifies it is added with all its searches so far
+    index.add(text, "query", QUERY_WEIGHT * (count if count == SUGGEST_MIN_QUERY_COUNT else 1))
+
+
+def replay_queries(index: SuggestIndex) -> None:
+    with _query_lock:
+        counts = [(text, count) for text, count in _query_counts.items() if count >= SUGGEST_MIN_QUERY_COUNT]
+    index.add_many((text, "query", QUERY_WEIGHT * count) for text, count in counts)
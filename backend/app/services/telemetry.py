@@ -0,0 +1,45 @@
+"""
+The active telemetry run, shared by every service.
+
+A job that records telemetry (a scraper run, see app.services.scraper.telemetry)
+makes itself the active run with `activate`. Code it calls, in any service,
+times its steps with `stage("embed")` and reports failures it handles with
+`record_failure`, without knowing who is listening. The run is kept in a
+context variable, so concurrent runs on different threads stay apart; outside a
+run both are no-ops.
+
+A run is any object with `stage(name, url)` (a context manager) and
+`failure(exc, stage, url)`.
+"""
+
+import contextvars
+from contextlib import nullcontext
+from typing import Optional
+
+_current: contextvars.ContextVar = contextvars.ContextVar("telemetry_run", default=None)
+
+
+def activate(run) -> contextvars.Token:
+    """Make `run` the active run in this context; pass the token to `deactivate`."""
+    return _current.set(run)
+
+
+def deactivate(token: contextvars.Token) -> None:
+    _current.reset(token)
+
+
+def current_run():
+    return _current.get()
+
+
+def stage(name: str, url: Optional[str] = None):
+    """Time a step into the active run, or nothing outside a run."""
+    run = _current.get()
+    return run.stage(name, url) if run is not None else nullcontext()
+
+
+def record_failure(exc: BaseException, stage: Optional[str] = None, url: Optional[str] = None) -> None:
+    """For errors the caller handles and moves past (the run goes on, but it should still be counted)."""
+    run = _current.get()
+    if run is not None:
+        run.failure(exc, stage, url)
@@ -5,98 +5,144 @@ This module provides functionality to visualize high-dimensional embeddings
 stored in a Supabase database by reducing their dimensionality to 3D using PCA
 and plotting them in a 3D scatter plot.
 
+Rows are paged from Supabase (or memory-mapped from a local snapshot) into a
+preallocated float32 matrix and reduced with IncrementalPCA in batches, so the
+whole corpus fits in bounded memory.
+
+Usage:
+  uv run python -m app.services.visualizer.visualize
+  uv run python -m app.services.visualizer.visualize --snapshot --headless --out coords.csv
 """
 
-import os
-from dotenv import load_dotenv
+import argparse
+import time
+from typing import Optional
+
 import numpy as np
-from supabase import create_client, Client
-from sklearn.decomposition import PCA
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-
-load_dotenv()
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-# pull embeddings (adjust table/column names as needed)
-res = supabase.table("projects").select("id, embedding").execute()
-
-rows = res.data
-print("Number of rows:", len(rows))
-
-# Supabase returns the vector column as a Python list; we stack into a matrix
-ids = [r["id"] for r in rows]
-# Validate and clean embeddings before constructing the matrix
-valid_rows = []
-invalid = []
-for r in rows:
-    emb = r.get("embedding")
-    rid = r.get("id")
-    if emb is None:
-        invalid.append((rid, "None"))
-        continue
-    # If embedding stored as JSON/string, try to parse
-    if isinstance(emb, str):
-        try:
-            import json
-
-            emb = json.loads(emb)
-        except Exception:
-            try:
-                emb = eval(emb)  # fallback for python-list-like strings
-            except Exception:
-                invalid.append((rid, "string-unparseable"))
-                continue
-    # Ensure iterable
-    if not hasattr(emb, "__iter__"):
-        invalid.append((rid, "not-iterable"))
-        continue
-    # Convert to numeric numpy array
-    try:
-        emb_arr = np.array(list(emb), dtype=float)
-    except Exception:
-        invalid.append((rid, "non-numeric"))
-        continue
-    valid_rows.append((rid, emb_arr))
-
-if not valid_rows:
-    raise ValueError("No valid embeddings found in `projects.embedding`. Check your table data.")
-
-from collections import Counter
-lengths = [v.shape[0] for _, v in valid_rows]
-most_common_len = Counter(lengths).most_common(1)[0][0]
-filtered = [(i, v) for i, v in valid_rows if v.shape[0] == most_common_len]
-if len(filtered) < len(valid_rows):
-    print(f"Warning: {len(valid_rows)-len(filtered)} embeddings had differing dimensionality and were dropped.")
-
-ids = [i for i, _ in filtered]
-embeddings = np.vstack([v for _, v in filtered])  # shape: (N, D)
-print("Embeddings shape:", embeddings.shape)
-if invalid:
-    print(f"Dropped {len(invalid)} invalid rows. Examples: {invalid[:5]}")
-
-pca = PCA(n_components=3)
-embeddings_3d = pca.fit_transform(embeddings)
-
-fig = plt.figure(figsize=(8, 6))
-ax = fig.add_subplot(111, projection="3d")
-
-ax.scatter(
-    embeddings_3d[:, 0],
-    embeddings_3d[:, 1],
-    embeddings_3d[:, 2],
-    s=5,
-    alpha=0.6,
-)
-
-ax.set_xlabel("PC1")
-ax.set_ylabel("PC2")
-ax.set_zlabel("PC3")
-ax.set_title("projects – 3D view of embeddings (PCA)")
-
-plt.tight_layout()
-plt.show()
\ No newline at end of file
+
+from app.services.corpus.snapshot import PAGE_SIZE, SNAPSHOT_DIR, fetch_pages, load_snapshot, parse_embeddings
+
+PCA_BATCH_SIZE = 4096
+
+
+def count_rows() -> int:
+    from app.services.db.supa_base_client import get_supabase
+
+    res = get_supabase().table("projects").select("id", count="exact").limit(1).execute()
+    return int(res.count or 0)
+
+
+def fetch_embeddings(page_size: int = PAGE_SIZE) -> tuple[np.ndarray, np.ndarray]:
+    """Page through every row into a preallocated float32 matrix. Returns (ids, embeddings)."""
+    expected = count_rows()
+    print("Number of rows:", expected)
+
+    ids = np.empty(expected, dtype=np.int64)
+    embeddings: Optional[np.ndarray] = None
+    filled = dropped = 0
+    for page in fetch_pages("id, embedding", page_size=page_size):
+        dim = embeddings.shape[1] if embeddings is not None else None
+        matrix, keep = parse_embeddings([r.get("embedding") for r in page], dim)
+        dropped += int((~keep).sum())
+        if embeddings is None:
+            embeddings = np.empty((max(expected, matrix.shape[0]), matrix.shape[1]), dtype=np.float32)
+        end = filled + matrix.shape[0]
+        if end > embeddings.shape[0]:
+            # rows were inserted while paging
+            embeddings = np.resize(embeddings, (end, embeddings.shape[1]))
+            ids = np.resize(ids, end)
+        embeddings[filled:end] = matrix
+        ids[filled:end] = [r["id"] for r, ok in zip(page, keep) if ok]
+        filled = end
+
+    if embeddings is None or filled == 0:
+        raise ValueError("No valid embeddings found in `projects.embedding`. Check your table data.")
+    if dropped:
+        print(f"Dropped {dropped} rows with missing, malformed or differently sized embeddings.")
+    return ids[:filled], embeddings[:filled]
+
+
+def reduce_to_3d(embeddings: np.ndarray, method: str = "incremental", batch_size: int = PCA_BATCH_SIZE) -> np.ndarray:
+    """Project embeddings to 3D, streaming batches through IncrementalPCA or using randomized PCA."""
+    from sklearn.decomposition import PCA, IncrementalPCA
+
+    n = embeddings.shape[0]
+    if method == "randomized":
+        return PCA(n_components=3, svd_solver="randomized").fit_transform(embeddings).astype(np.float32)
+
+    pca = IncrementalPCA(n_components=3)
+    batch_size = max(batch_size, 3)
+    for start in range(0, n, batch_size):
+        batch = embeddings[start : start + batch_size]
+        # a trailing batch smaller than n_components can't be fitted on its own
+        if batch.shape[0] >= 3:
+            pca.partial_fit(batch)
+    coords = np.empty((n, 3), dtype=np.float32)
+    for start in range(0, n, batch_size):
+        coords[start : start + batch_size] = pca.transform(embeddings[start : start + batch_size])
+    return coords
+
+
+def write_coords(path: str, ids: np.ndarray, coords: np.ndarray) -> None:
+    """Write id + 3D coordinates as .npz (ids, coords) or CSV (id,x,y,z)."""
+    if path.endswith(".npz"):
+        np.savez(path, ids=ids, coords=coords)
+    else:
+        table = np.column_stack([ids.astype(np.float64), coords])
+        np.savetxt(path, table, delimiter=",", header="id,x,y,z", comments="", fmt=["%d", "%.6f", "%.6f", "%.6f"])
+    print(f"Wrote {len(ids)} coordinates to {path}")
+
+
+def plot(coords: np.ndarray) -> None:
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(8, 6))
+    ax = fig.add_subplot(111, projection="3d")
+
+    ax.scatter(
+        coords[:, 0],
+        coords[:, 1],
+        coords[:, 2],
+        s=5,
+        alpha=0.6,
+    )
+
+    ax.set_xlabel("PC1")
+    ax.set_ylabel("PC2")
+    ax.set_zlabel("PC3")
+    ax.set_title("projects – 3D view of embeddings (PCA)")
+
+    plt.tight_layout()
+    plt.show()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Reduce project embeddings to 3D and plot or export them")
+    ap.add_argument("--snapshot", action="store_true", help="Read the local snapshot instead of Supabase")
+    ap.add_argument("--snapshot-dir", type=str, default=SNAPSHOT_DIR, help="Snapshot directory")
+    ap.add_argument("--page-size", type=int, default=PAGE_SIZE, help="Rows per Supabase request")
+    ap.add_argument("--method", choices=["incremental", "randomized"], default="incremental", help="PCA variant")
+    ap.add_argument("--batch-size", type=int, default=PCA_BATCH_SIZE, help="Rows per IncrementalPCA batch")
+    ap.add_argument("--headless", action="store_true", help="Don't open a plot window")
+    ap.add_argument("--out", type=str, default=None, help="Write coordinates to a .csv or .npz file")
+    args = ap.parse_args()
+
+    started = time.perf_counter()
+    if args.snapshot:
+        snapshot = load_snapshot(args.snapshot_dir)
+        if snapshot is None:
+            raise SystemExit(f"No snapshot in {args.snapshot_dir}, run `python -m app.services.corpus.snapshot` first")
+        ids, embeddings = snapshot.ids, snapshot.embeddings
+    else:
+        ids, embeddings = fetch_embeddings(args.page_size)
+    print("Embeddings shape:", embeddings.shape, f"loaded in {time.perf_counter() - started:.1f}s")
+
+    coords = reduce_to_3d(embeddings, args.method, args.batch_size)
+    if args.out:
+        write_coords(args.out, np.asarray(ids), coords)
+    if not args.headless:
+        plot(coords)
+
+
+if __name__ == "__main__":
+    main()
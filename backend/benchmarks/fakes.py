@@ -0,0 +1,248 @@
+"""
+Local stand-ins for the paid upstreams, for load tests that cost nothing.
+
+  FakeOpenAI    embeddings.create() with configurable latency (fixed + per input)
+  FakeSupabase  table() queries and the match_projects RPC over an in-memory corpus
+  FakeGemini    chat models that "stream" a reply: time to first chunk + per-chunk delay
+
+Latency is simulated with time.sleep, the same way a blocking HTTP call holds a
+worker thread. `install()` swaps them into the app through its injection points.
+"""
+
+import hashlib
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Iterator, Optional
+
+import numpy as np
+
+WORDS = (
+    "ai agent notes meeting legal health fintech payments crypto devtools api security robotics climate energy "
+    "education hiring sales marketing analytics data infra cloud mobile social video music games travel food "
+    "logistics supply chain insurance real estate biotech voice search privacy compliance accounting"
+).split()
+SOURCES = ["YC", "Product Hunt", "Devpost", "Topstartups"]
+
+
+def text_vector(text: str, dim: int) -> np.ndarray:
+    """Deterministic unit vector for a text, so repeated queries embed the same way."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    v = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return v / np.linalg.norm(v)
+
+
+class FakeCorpus:
+    def __init__(self, size: int = 5000, dim: int = 1536, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.dim = dim
+        self.embeddings = rng.standard_normal((size, dim)).astype(np.float32)
+        self.embeddings /= np.linalg.norm(self.embeddings, axis=1, keepdims=True)
+        self.rows = []
+        for i in range(size):
+            words = list(rng.choice(WORDS, size=4, replace=False))
+            self.rows.append(
+                {
+                    "id": i + 1,
+                    "name": f"{words[0].title()}{words[1].title()} {i + 1}",
+                    "short_description": f"{' '.join(words)} for teams",
+                    "long_description": f"We build {' '.join(words)} tools. " * 5,
+                    "tags": [w.upper() for w in words[:2]],
+                    "source": SOURCES[i % len(SOURCES)],
+                    "url": f"https://example{i + 1}.com",
+                    "metadata": {
+                        "batch": ["W24", "S24", "F24", "X25"][i % 4],
+                        "status": "Active" if i % 5 else "Inactive",
+                        "team_size": str(1 + i % 60),
+                        "location": ["San Francisco, CA, USA", "New York, NY, USA", "London, UK"][i % 3],
+                        "founded": str(2015 + i % 10),
+                    },
+                }
+            )
+        self._position = {row["id"]: i for i, row in enumerate(self.rows)}
+        self._embedding_text: dict[int, str] = {}
+
+    def embedding_text(self, pos: int) -> str:
+        """pgvector's text form, which is what PostgREST returns for a vector column."""
+        if pos not in self._embedding_text:
+            self._embedding_text[pos] = "[" + ",".join(f"{x:.6f}" for x in self.embeddings[pos]) + "]"
+        return self._embedding_text[pos]
+
+    def row(self, pos: int, columns: Optional[list[str]] = None) -> dict:
+        row = {**self.rows[pos], "embedding": None}
+        if columns is None or "embedding" in columns:
+            row["embedding"] = self.embedding_text(pos)
+        return row if columns is None else {c: row.get(c) for c in columns}
+
+    def match(self, embedding, sources: Optional[list[str]] = None, count: int = 20) -> list[dict]:
+        q = np.asarray(embedding, dtype=np.float32)
+        scores = self.embeddings @ q
+        if sources:
+            allowed = np.array([r["source"] in sources for r in self.rows])
+            scores = np.where(allowed, scores, -np.inf)
+        top = np.argpartition(-scores, min(count, len(scores) - 1))[:count]
+        top = top[np.argsort(-scores[top])]
+        return [{**self.rows[p], "similarity": float(scores[p])} for p in top if np.isfinite(scores[p])]
+
+
+class FakeEmbeddings:
+    def __init__(self, dim: int, latency_ms: float = 80.0, per_input_ms: float = 0.2):
+        self.dim = dim
+        self.latency_ms = latency_ms
+        self.per_input_ms = per_input_ms
+        self.calls = 0
+
+    def create(self, model: str, input: list[str], dimensions: Optional[int] = None, **kwargs):
+        self.calls += 1
+        time.sleep((self.latency_ms + self.per_input_ms * len(input)) / 1000)
+        dim = dimensions or self.dim
+        return SimpleNamespace(data=[SimpleNamespace(embedding=text_vector(t, dim).tolist()) for t in input])
+
+
+class FakeOpenAI:
+    def __init__(self, dim: int, latency_ms: float = 80.0, per_input_ms: float = 0.2):
+        self.embeddings = FakeEmbeddings(dim, latency_ms, per_input_ms)
+
+
+class _Query:
+    """The subset of the PostgREST query builder the services use."""
+
+    def __init__(self, client: "FakeSupabase", table: str):
+        self.client = client
+        self.table = table
+        self.columns: Optional[list[str]] = None
+        self.filters: list = []
+        self.limit_rows: Optional[int] = None
+        self.count = None
+
+    def select(self, columns: str = "*", count=None):
+        self.columns = None if columns.strip() == "*" else [c.strip() for c in columns.split(",")]
+        self.count = count
+        return self
+
+    def eq(self, column: str, value):
+        self.filters.append(lambda r: r.get(column) == value)
+        return self
+
+    def gt(self, column: str, value):
+        self.filters.append(lambda r: r.get(column) is not None and r.get(column) > value)
+        return self
+
+    def in_(self, column: str, values):
+        wanted = set(values)
+        self.filters.append(lambda r: r.get(column) in wanted)
+        return self
+
+    def order(self, column: str, desc: bool = False):
+        # rows are already kept in id order
+        return self
+
+    def limit(self, n: int):
+        self.limit_rows = n
+        return self
+
+    def insert(self, data):
+        raise NotImplementedError("FakeSupabase is read-only")
+
+    def execute(self):
+        self.client.sleep()
+        corpus = self.client.corpus
+        out = []
+        for pos, base in enumerate(corpus.rows):
+            if all(f(base) for f in self.filters):
+                out.append(corpus.row(pos, self.columns))
+                if self.limit_rows is not None and len(out) >= self.limit_rows:
+                    break
+        return SimpleNamespace(data=out, count=len(corpus.rows) if self.count else None)
+
+
+class _Rpc:
+    def __init__(self, client: "FakeSupabase", name: str, params: dict):
+        self.client = client
+        self.name = name
+        self.params = params
+
+    def execute(self):
+        if self.name != "match_projects":
+            # e.g. match_projects_filtered: callers fall back to match_projects
+            raise RuntimeError(f"FakeSupabase has no RPC {self.name}")
+        self.client.sleep()
+        self.client.rpc_calls += 1
+        rows = self.client.corpus.match(self.params["query_embedding"], self.params.get("sources"))
+        return SimpleNamespace(data=rows)
+
+
+class FakeSupabase:
+    def __init__(self, corpus: FakeCorpus, latency_ms: float = 40.0):
+        self.corpus = corpus
+        self.latency_ms = latency_ms
+        self.rpc_calls = 0
+
+    def sleep(self) -> None:
+        time.sleep(self.latency_ms / 1000)
+
+    def table(self, name: str) -> _Query:
+        return _Query(self, name)
+
+    def rpc(self, name: str, params: dict) -> _Rpc:
+        return _Rpc(self, name, params)
+
+
+@dataclass
+class _Reply:
+    text: str
+
+
+class FakeChat:
+    def __init__(self, model: "FakeModel", history: list):
+        self.model = model
+        self.history = history
+
+    def send_message(self, message: str, stream: bool = False):
+        chunks = self.model.reply_chunks(message)
+        if stream:
+            return chunks
+        return _Reply("".join(c.text for c in chunks))
+
+
+class FakeModel:
+    def __init__(self, gemini: "FakeGemini", model_name: str, system_instruction: str):
+        self.gemini = gemini
+        self.model_name = model_name
+
+    def reply_chunks(self, prompt: str) -> Iterator[_Reply]:
+        self.gemini.calls += 1
+        time.sleep(self.gemini.first_chunk_ms / 1000)
+        for i in range(self.gemini.chunks):
+            if i:
+                time.sleep(self.gemini.chunk_ms / 1000)
+            yield _Reply(f"chunk {i} about {len(prompt)} chars. ")
+
+    def start_chat(self, history: Optional[list] = None) -> FakeChat:
+        return FakeChat(self, history or [])
+
+    def generate_content(self, prompt: str, stream: bool = False):
+        chunks = self.reply_chunks(prompt)
+        return chunks if stream else _Reply("".join(c.text for c in chunks))
+
+
+class FakeGemini:
+    def __init__(self, first_chunk_ms: float = 300.0, chunk_ms: float = 15.0, chunks: int = 40):
+        self.first_chunk_ms = first_chunk_ms
+        self.chunk_ms = chunk_ms
+        self.chunks = chunks
+        self.calls = 0
+
+    def __call__(self, model_name: str, system_instruction: str) -> FakeModel:
+        return FakeModel(self, model_name, system_instruction)
+
+
+def install(supabase: FakeSupabase, openai: FakeOpenAI, gemini: FakeGemini) -> None:
+    """Point the app's Supabase, OpenAI and chat model injection points at the fakes."""
+    from app.services.chat.llm import set_model_factory
+    from app.services.db.supa_base_client import set_supabase
+    from app.services.embedder.embedder import set_openai
+
+    set_supabase(supabase)
+    set_openai(openai)
+    set_model_factory(gemini)
@@ -0,0 +1,124 @@
+"""
+Import-time budget for the API.
+
+Imports `app.main` in fresh interpreters with `python -X importtime`, reports
+the median import time and where it goes (self time summed per top-level
+package), and fails when the median is over budget or when one of the SDKs
+that should load on first use (Supabase, OpenAI, Gemini, Selenium, Redis, ...)
+was imported at start-up. Run it before and after adding imports to the API.
+
+Usage:
+  uv run python -m benchmarks.importtime
+  uv run python -m benchmarks.importtime --runs 10 --budget-ms 800 --top 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# created/imported on first use, never while the app starts
+LAZY_MODULES = [
+    "supabase",
+    "openai",
+    "google.generativeai",
+    "selenium",
+    "webdriver_manager",
+    "redis",
+    "fastapi_limiter",
+    "tiktoken",
+    "bs4",
+]
+
+
+def run_once(module: str) -> tuple[float, list[tuple[int, int, str]]]:
+    """Process wall time in seconds, and (self us, cumulative us, name) per imported module."""
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.strip()))
+    return wall, rows
+
+
+def by_package(rows: list[tuple[int, int, str]]) -> dict[str, int]:
+    totals: dict[str, int] = defaultdict(int)
+    for self_us, _, name in rows:
+        totals[name.split(".")[0]] += self_us
+    return dict(totals)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Measure the API's import time against a budget")
+    ap.add_argument("--module", type=str, default="app.main")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=1000.0, help="Fail when the median import is slower")
+    ap.add_argument("--top", type=int, default=15, help="Packages to list by self time")
+    ap.add_argument("--out", type=str, default=None, help="Also write the results as JSON")
+    args = ap.parse_args()
+
+    run_once(args.module)  # writes bytecode and warms the OS file cache, so every timed run starts alike
+    imports_ms, walls_ms, runs = [], [], []
+    for _ in range(args.runs):
+        wall, rows = run_once(args.module)
+        runs.append(rows)
+        walls_ms.append(wall * 1000)
+        imports_ms.append(next(cum for _, cum, name in rows if name == args.module) / 1000)
+
+    median_ms = statistics.median(imports_ms)
+    rows = runs[imports_ms.index(min(imports_ms, key=lambda ms: abs(ms - median_ms)))]
+    packages = sorted(by_package(rows).items(), key=lambda kv: -kv[1])
+    imported = {name for _, _, name in rows}
+    eager = [m for m in LAZY_MODULES if m in imported]
+
+    print(f"import {args.module}: median {median_ms:.0f} ms (min {min(imports_ms):.0f}, max {max(imports_ms):.0f}) "
+          f"over {args.runs} runs; process wall median {statistics.median(walls_ms):.0f} ms; {len(rows)} modules")
+    print(f"\n{'package':<24} {'self ms':>8}")
+    for name, us in packages[: args.top]:
+        print(f"{name:<24} {us / 1000:>8.1f}")
+
+    failures = []
+    if median_ms > args.budget_ms:
+        failures.append(f"median import {median_ms:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+    if eager:
+        failures.append(f"imported at start-up, should load on first use: {', '.join(eager)}")
+    for f in failures:
+        print(f"FAIL {f}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "args": vars(args),
+                    "median_ms": median_ms,
+                    "import_ms": imports_ms,
+                    "wall_ms": walls_ms,
+                    "packages_ms": {name: us / 1000 for name, us in packages},
+                    "eager": eager,
+                },
+                f,
+                indent=2,
+            )
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
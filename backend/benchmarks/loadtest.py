@@ -0,0 +1,214 @@
+"""
+End-to-end load test of /search and /chat against local fakes (no OpenAI, Supabase or Gemini calls).
+
+Starts the real app under uvicorn on a local port with benchmarks.fakes installed,
+then drives each endpoint at several concurrency levels over HTTP and reports
+throughput and p50/p95/p99 latency. Run it before and after a change to catch
+performance regressions.
+
+Usage:
+  uv run python -m benchmarks.loadtest
+  uv run python -m benchmarks.loadtest --endpoints search --concurrency 1,16,64 --requests 500 --snapshot
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.fakes import WORDS, FakeCorpus, FakeGemini, FakeOpenAI, FakeSupabase, install
+
+
+def _configure_env(args, snapshot_dir: str) -> None:
+    """Settings the app reads at import time; must run before `app` is imported."""
+    os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+    os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.fake")
+    os.environ.setdefault("OPENAI_KEY", "sk-fake")
+    os.environ.setdefault("GEMINI_API_KEY", "fake")
+    os.environ["SNAPSHOT_DIR"] = snapshot_dir
+    os.environ["CORPUS_REFRESH_SECONDS"] = "0"
+    # the fakes need no warm-up, and the real SDKs shouldn't be imported at all
+    os.environ["CLIENT_WARMUP"] = "false"
+    # caches would turn repeated load-test queries into cache hits
+    if not args.caches:
+        os.environ["EMBED_CACHE_PATH"] = ""
+        os.environ["CHAT_CACHE_TTL_SECONDS"] = "0"
+    if not args.admission:
+        os.environ["ADMISSION_ENABLED"] = "false"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(port: int):
+    import uvicorn
+
+    from app.main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+def _search_request(rng: random.Random, worker: int, i: int) -> tuple[str, str, dict]:
+    query = " ".join(rng.sample(WORDS, 3))
+    return "GET", "/search/", {"params": {"query": query}}
+
+
+def _chat_request(rng: random.Random, worker: int, i: int, turns: int = 4) -> tuple[str, str, dict]:
+    # each worker plays one user holding a conversation of `turns` turns, then starts over
+    turn = i % turns
+    conversation = f"load-{worker}-{i // turns}"
+    messages = []
+    for t in range(turn):
+        messages += [
+            {"role": "user", "content": f"follow-up question {t} about my idea"},
+            {"role": "assistant", "content": f"answer {t} " * 40},
+        ]
+    messages.append({"role": "user", "content": f"follow-up question {turn} about my idea"})
+    body = {
+        "messages": messages,
+        "search_similar": True,
+        "idea_query": f"{' '.join(rng.sample(WORDS, 3))} platform",
+        "conversation_id": conversation,
+    }
+    return "POST", "/chat/", {"json": body}
+
+
+REQUESTS = {"search": _search_request, "chat": _chat_request}
+
+
+async def _run_level(base_url: str, endpoint: str, concurrency: int, total: int, seed: int) -> dict:
+    import httpx
+
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    counter = iter(range(total))
+    make = REQUESTS[endpoint]
+
+    async def worker(w: int, client: "httpx.AsyncClient"):
+        rng = random.Random(seed * 1000 + w)
+        for i in counter:
+            method, path, kwargs = make(rng, w, i)
+            started = time.perf_counter()
+            try:
+                res = await client.request(method, path, **kwargs)
+                status = res.status_code
+            except httpx.HTTPError:
+                status = 0
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(w, client) for w in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    ms = np.asarray(latencies) * 1000
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": total,
+        "ok": statuses.get(200, 0),
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 1),
+        "p95_ms": round(float(np.percentile(ms, 95)), 1),
+        "p99_ms": round(float(np.percentile(ms, 99)), 1),
+    }
+
+
+def _print_table(results: list[dict]) -> None:
+    print(f"\n{'endpoint':<8} {'conc':>5} {'reqs':>6} {'ok':>6} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for r in results:
+        print(
+            f"{r['endpoint']:<8} {r['concurrency']:>5} {r['requests']:>6} {r['ok']:>6} {r['rps']:>8} "
+            f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8}"
+        )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Offline load test of /search and /chat with fake upstreams")
+    ap.add_argument("--endpoints", type=str, default="search,chat", help="Comma-separated: search, chat")
+    ap.add_argument("--concurrency", type=str, default="1,8,32", help="Comma-separated concurrency levels")
+    ap.add_argument("--requests", type=int, default=200, help="Requests per endpoint and level")
+    ap.add_argument("--corpus", type=int, default=5000, help="Projects in the fake corpus")
+    ap.add_argument("--dim", type=int, default=1536, help="Embedding dimensions")
+    ap.add_argument("--embed-ms", type=float, default=80.0, help="Fake embedding request latency")
+    ap.add_argument("--db-ms", type=float, default=40.0, help="Fake Supabase query/RPC latency")
+    ap.add_argument("--llm-first-ms", type=float, default=300.0, help="Fake LLM time to first chunk")
+    ap.add_argument("--llm-chunk-ms", type=float, default=15.0, help="Fake LLM delay between chunks")
+    ap.add_argument("--llm-chunks", type=int, default=40, help="Chunks per fake LLM reply")
+    ap.add_argument("--snapshot", action="store_true", help="Sync a local snapshot from the fake DB first")
+    ap.add_argument(
+        "--vector-store",
+        choices=["supabase", "memory"],
+        default="supabase",
+        help="Vector search via the fake match_projects RPC (with --db-ms latency) or an in-process MemoryVectorStore",
+    )
+    ap.add_argument("--caches", action="store_true", help="Keep the embedding and chat response caches on")
+    ap.add_argument("--admission", action="store_true", help="Keep admission control on")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", type=str, default=None, help="Also write the results as JSON")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as tmp:
+        snapshot_dir = os.path.join(tmp, "snapshot")
+        _configure_env(args, snapshot_dir)
+
+        corpus = FakeCorpus(args.corpus, args.dim, args.seed)
+        supabase = FakeSupabase(corpus, args.db_ms)
+        install(
+            supabase,
+            FakeOpenAI(args.dim, args.embed_ms),
+            FakeGemini(args.llm_first_ms, args.llm_chunk_ms, args.llm_chunks),
+        )
+        if args.vector_store == "memory":
+            from app.services.db.vector_store import MemoryVectorStore, set_vector_store
+
+            set_vector_store(MemoryVectorStore(corpus.rows, corpus.embeddings))
+        if args.snapshot:
+            from app.services.corpus.snapshot import sync_snapshot
+
+            supabase.latency_ms, db_ms = 0.0, supabase.latency_ms
+            sync_snapshot(snapshot_dir, full=True)
+            supabase.latency_ms = db_ms
+
+        port = _free_port()
+        server, thread = _start_server(port)
+        base_url = f"http://127.0.0.1:{port}"
+        results = []
+        try:
+            for endpoint in [e.strip() for e in args.endpoints.split(",") if e.strip()]:
+                # one short warm-up pass so imports and first-call setup aren't measured
+                asyncio.run(_run_level(base_url, endpoint, 1, 3, args.seed))
+                for level in [int(c) for c in args.concurrency.split(",")]:
+                    result = asyncio.run(_run_level(base_url, endpoint, level, args.requests, args.seed))
+                    results.append(result)
+                    print(json.dumps(result))
+        finally:
+            server.should_exit = True
+            thread.join(timeout=10)
+
+    _print_table(results)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Offline benchmark of the scraper parsers over saved HTML fixtures.
+
+Each fixture under benchmarks/fixtures/<source>/ is an HTML page next to a
+.json file with the output it must parse to. For every source the benchmark
+checks each page against its expected output, then parses the pages repeatedly
+and reports pages/sec. No browser or network is needed, so parser changes can
+be tuned and checked for breakage before a live crawl.
+
+Capture new fixtures by running a scraper with SCRAPER_FIXTURE_DIR set, copy
+the pages in here, and write their expected output with --update (review the diff).
+
+Usage:
+  uv run python -m benchmarks.parsers
+  uv run python -m benchmarks.parsers --sources devpost,yc_company --seconds 5
+  uv run python -m benchmarks.parsers --update
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from typing import Callable
+
+from app.services.scraper.parsers import (
+    parse_devpost_project,
+    parse_product_hunt_product,
+    parse_topstartups_cards,
+    parse_yc_cards,
+    parse_yc_company,
+)
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _devpost(html: str, name: str):
+    return parse_devpost_project(html, f"https://devpost.com/{name.replace('-', '/', 1)}")
+
+
+# source -> (fixture directory, filename pattern, parser(html, fixture name))
+SOURCES: dict[str, tuple[str, str, Callable[[str, str], object]]] = {
+    "yc_list": ("yc", "list-*.html", lambda html, name: parse_yc_cards(html)),
+    "yc_company": ("yc", "company-*.html", lambda html, name: parse_yc_company(html)),
+    "devpost": ("devpost", "*.html", _devpost),
+    "producthunt": ("producthunt", "*.html", lambda html, name: parse_product_hunt_product(html)),
+    "topstartups": ("topstartups", "*.html", lambda html, name: parse_topstartups_cards(html)),
+}
+
+
+def load_fixtures(source: str, fixture_dir: str = FIXTURE_DIR) -> list[tuple[str, str, str]]:
+    """(name, html, expected-json path) for every page of a source."""
+    folder, pattern, _ = SOURCES[source]
+    pages = []
+    for path in sorted(glob.glob(os.path.join(fixture_dir, folder, pattern))):
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        name = os.path.splitext(os.path.basename(path))[0]
+        pages.append((name, html, os.path.splitext(path)[0] + ".json"))
+    return pages
+
+
+def _diff(expected, actual, path: str = "") -> list[str]:
+    """Field paths where the parse differs from the expected output."""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        out = []
+        for key in sorted(set(expected) | set(actual)):
+            out += _diff(expected.get(key), actual.get(key), f"{path}.{key}" if path else key)
+        return out
+    if isinstance(expected, list) and isinstance(actual, list) and any(isinstance(e, dict) for e in expected):
+        out = [f"{path}: {len(actual)} items, expected {len(expected)}"] if len(expected) != len(actual) else []
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            out += _diff(e, a, f"{path}[{i}]")
+        return out
+    return [] if expected == actual else [f"{path or '<root>'}: {actual!r} != {expected!r}"]
+
+
+def check(source: str, pages: list, update: bool = False) -> tuple[int, list[str]]:
+    """Number of pages whose parse matches their expected output, and the mismatches."""
+    parse = SOURCES[source][2]
+    passed, failures = 0, []
+    for name, html, expected_path in pages:
+        actual = json.loads(json.dumps(parse(html, name)))
+        if update:
+            with open(expected_path, "w", encoding="utf-8") as f:
+                json.dump(actual, f, ensure_ascii=False, indent=2)
+                f.write("\n")
+            passed += 1
+            continue
+        if not os.path.exists(expected_path):
+            failures.append(f"{name}: no expected output ({os.path.basename(expected_path)}), run with --update")
+            continue
+        with open(expected_path, encoding="utf-8") as f:
+            expected = json.load(f)
+        diffs = _diff(expected, actual)
+        if diffs:
+            failures += [f"{name}: {d}" for d in diffs]
+        else:
+            passed += 1
+    return passed, failures
+
+
+def bench(source: str, pages: list, seconds: float) -> dict:
+    """Parse the pages round-robin for about `seconds` and report throughput."""
+    parse = SOURCES[source][2]
+    total_bytes = sum(len(html.encode("utf-8")) for _, html, _ in pages)
+    rounds = 0
+    started = time.perf_counter()
+    while True:
+        for name, html, _ in pages:
+            parse(html, name)
+        rounds += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= seconds:
+            break
+    parsed = rounds * len(pages)
+    return {
+        "pages": parsed,
+        "pages_per_sec": round(parsed / elapsed, 1),
+        "ms_per_page": round(elapsed / parsed * 1000, 2),
+        "mb_per_sec": round(rounds * total_bytes / elapsed / 1e6, 2),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark and check the scraper parsers against saved HTML fixtures")
+    ap.add_argument("--sources", type=str, default=",".join(SOURCES), help="Comma-separated: " + ", ".join(SOURCES))
+    ap.add_argument("--seconds", type=float, default=2.0, help="Timing budget per source")
+    ap.add_argument("--fixtures", type=str, default=FIXTURE_DIR, help="Fixture directory")
+    ap.add_argument("--update", action="store_true", help="Rewrite the expected outputs from the current parsers")
+    ap.add_argument("--out", type=str, default=None, help="Also write the results as JSON")
+    args = ap.parse_args()
+
+    results = []
+    failed = False
+    for source in [s.strip() for s in args.sources.split(",") if s.strip()]:
+        pages = load_fixtures(source, args.fixtures)
+        if not pages:
+            print(f"[{source}] no fixtures")
+            continue
+        passed, failures = check(source, pages, args.update)
+        for f in failures:
+            print(f"[{source}] FAIL {f}")
+        failed = failed or bool(failures)
+        result = {"source": source, "fixtures": len(pages), "correct": passed}
+        if not args.update:
+            result.update(bench(source, pages, args.seconds))
+        results.append(result)
+        print(json.dumps(result))
+
+    if args.update:
+        print(f"Updated expected outputs for {sum(r['fixtures'] for r in results)} fixtures")
+        return
+
+    print(f"\n{'source':<12} {'correct':>9} {'pages/s':>9} {'ms/page':>8} {'MB/s':>6}")
+    for r in results:
+        print(
+            f"{r['source']:<12} {str(r['correct']) + '/' + str(r['fixtures']):>9} {r['pages_per_sec']:>9} "
+            f"{r['ms_per_page']:>8} {r['mb_per_sec']:>6}"
+        )
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
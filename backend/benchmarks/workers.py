@@ -0,0 +1,220 @@
+"""
+Memory and reload behaviour of the search corpus across API worker processes.
+
+Writes a synthetic snapshot, starts W worker processes the way uvicorn
+--workers does (spawned, each loading its own corpus), runs searches over the
+whole matrix in each, and reads /proc/<pid>/smaps_rollup while all of them are
+alive. With the memory-mapped snapshot the embedding matrix is counted once
+across workers (PSS) and stays out of each worker's private memory (USS); with
+--modes copy every worker holds its own matrix, for comparison. (A page mapped
+by a single process counts as private, so the difference shows from 2 workers.)
+
+--reload keeps every worker searching while a new snapshot version is published
+and reports search latency around the swap and whether each worker picked it up.
+
+Linux only (reads /proc).
+
+Usage:
+  uv run python -m benchmarks.workers
+  uv run python -m benchmarks.workers --rows 100000 --workers 1,2,4,8 --modes mmap,copy --reload
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def memory_mb(pid: str = "self") -> dict[str, float]:
+    """RSS, PSS and USS (private) of a process in MB, from smaps_rollup."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in SMAPS_FIELDS:
+                values[key] = int(rest.split()[0]) / 1024
+    return {
+        "rss": values["Rss"],
+        "pss": values["Pss"],
+        "uss": values["Private_Clean"] + values["Private_Dirty"],
+    }
+
+
+def write_fake_snapshot(directory: str, rows: int, dim: int, version: int = 1, start_id: int = 1, previous=None):
+    """Synthetic snapshot with `rows` projects; with `previous` (ids, matrix, table) the rows are appended to it."""
+    import pyarrow as pa
+
+    from app.services.corpus.snapshot import METADATA_SCHEMA, write_snapshot
+    from benchmarks.fakes import FakeCorpus
+
+    fake = FakeCorpus(rows, dim, seed=version)
+    ids = np.arange(start_id, start_id + rows, dtype=np.int64)
+    for pid, row in zip(ids, fake.rows):
+        row["id"] = int(pid)
+        row["metadata"] = json.dumps(row["metadata"])
+    table = pa.Table.from_pylist(fake.rows, schema=METADATA_SCHEMA)
+    matrix = fake.embeddings
+    if previous is not None:
+        ids = np.concatenate([previous[0], ids])
+        matrix = np.concatenate([previous[1], matrix])
+        table = pa.concat_tables([previous[2], table])
+    manifest = {
+        "version": version,
+        "rows": int(ids.shape[0]),
+        "dim": dim,
+        "last_id": int(ids[-1]),
+        "appended": rows if previous is not None else int(ids.shape[0]),
+        "updated": 0,
+        "full": previous is None,
+    }
+    write_snapshot(directory, ids, matrix, table, manifest)
+    return ids, matrix, table
+
+
+def _worker(mode: str, queries: int, reload_seconds: float, ready, measured, results) -> None:
+    # imported here so SNAPSHOT_DIR and CORPUS_RELOAD_SECONDS from the parent apply
+    import app.services.search.corpus as corpus_module
+    from app.services.corpus.snapshot import load_snapshot
+
+    if mode == "copy":
+        corpus_module.load_snapshot = lambda directory: load_snapshot(directory, mmap=False)
+
+    started = time.perf_counter()
+    corpus = corpus_module.get_corpus()
+    load_s = time.perf_counter() - started
+    rng = np.random.default_rng(os.getpid())
+    dim = corpus.embeddings.shape[1]
+
+    def search() -> float:
+        q = rng.standard_normal(dim).astype(np.float32)
+        t = time.perf_counter()
+        corpus_module.get_corpus().vector_search(q / np.linalg.norm(q), 10)
+        return time.perf_counter() - t
+
+    search_ms = [search() * 1000 for _ in range(queries)]
+    ready.wait()  # every worker has loaded and searched: measure them side by side
+    result = {
+        "pid": os.getpid(),
+        "load_s": round(load_s, 3),
+        "search_ms": round(float(np.median(search_ms)), 2),
+        **memory_mb(),
+    }
+
+    if reload_seconds:
+        latencies, version = [], corpus.version
+        until = time.monotonic() + reload_seconds
+        while time.monotonic() < until:
+            latencies.append(search() * 1000)
+        result["reload"] = {
+            "searches": len(latencies),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+            "max_ms": round(max(latencies), 2),
+            "version_before": version,
+            "version_after": corpus_module.get_corpus().version,
+        }
+    results.put(result)
+    measured.wait()
+
+
+def run(mode: str, workers: int, queries: int, reload_seconds: float, snapshot_dir: str, dim: int) -> list[dict]:
+    ctx = mp.get_context("spawn")
+    ready, measured = ctx.Barrier(workers + 1), ctx.Barrier(workers + 1)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker, args=(mode, queries, reload_seconds, ready, measured, results))
+        for _ in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    ready.wait()
+    if reload_seconds:
+        time.sleep(reload_seconds / 3)
+        from app.services.corpus.snapshot import load_snapshot, read_manifest
+
+        current = load_snapshot(snapshot_dir)
+        write_fake_snapshot(
+            snapshot_dir,
+            max(1, len(current) // 100),
+            dim,
+            version=read_manifest(snapshot_dir)["version"] + 1,
+            start_id=int(current.ids[-1]) + 1,
+            previous=(np.asarray(current.ids), np.asarray(current.embeddings), current.metadata),
+        )
+    out = [results.get() for _ in procs]
+    measured.wait()
+    for p in procs:
+        p.join()
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Per-worker memory and reload latency of the shared snapshot")
+    ap.add_argument("--rows", type=int, default=50000, help="Projects in the synthetic snapshot")
+    ap.add_argument("--dim", type=int, default=1536)
+    ap.add_argument("--workers", type=str, default="1,2,4", help="Comma-separated worker counts")
+    ap.add_argument("--modes", type=str, default="mmap,copy", help="mmap (shared snapshot) and/or copy (private matrix)")
+    ap.add_argument("--queries", type=int, default=20, help="Searches per worker before measuring")
+    ap.add_argument("--reload", action="store_true", help="Publish a new version while the workers search")
+    ap.add_argument("--reload-seconds", type=float, default=6.0, help="How long workers search during --reload")
+    ap.add_argument("--out", type=str, default=None, help="Also write the results as JSON")
+    args = ap.parse_args()
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        sys.exit("benchmarks.workers reads /proc/<pid>/smaps_rollup and only runs on Linux")
+
+    with tempfile.TemporaryDirectory(prefix="workers-bench-") as tmp:
+        snapshot_dir = os.path.join(tmp, "snapshot")
+        os.environ["SNAPSHOT_DIR"] = snapshot_dir
+        os.environ["CORPUS_RELOAD_SECONDS"] = "0.5"
+        write_fake_snapshot(snapshot_dir, args.rows, args.dim)
+        matrix_mb = args.rows * args.dim * 4 / 2**20
+        print(f"Snapshot: {args.rows} rows x {args.dim} dims, embedding matrix {matrix_mb:.0f} MB")
+
+        results = []
+        for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+            for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+                per_worker = run(mode, workers, args.queries, args.reload_seconds if args.reload else 0,
+                                 snapshot_dir, args.dim)
+                result = {
+                    "mode": mode,
+                    "workers": workers,
+                    "rss_mb": round(sum(w["rss"] for w in per_worker) / workers, 1),
+                    "uss_mb": round(sum(w["uss"] for w in per_worker) / workers, 1),
+                    "pss_total_mb": round(sum(w["pss"] for w in per_worker), 1),
+                    "load_s": round(max(w["load_s"] for w in per_worker), 2),
+                    "search_ms": round(float(np.median([w["search_ms"] for w in per_worker])), 2),
+                }
+                if args.reload:
+                    reloads = [w["reload"] for w in per_worker]
+                    result["reload_p99_ms"] = max(r["p99_ms"] for r in reloads)
+                    result["reload_max_ms"] = max(r["max_ms"] for r in reloads)
+                    result["reloaded"] = sum(r["version_after"] != r["version_before"] for r in reloads)
+                results.append(result)
+                print(json.dumps(result))
+
+    header = f"\n{'mode':<6} {'workers':>7} {'RSS/w MB':>9} {'USS/w MB':>9} {'PSS total':>10} {'load s':>7} {'search ms':>10}"
+    if args.reload:
+        header += f" {'reload p99':>11} {'reload max':>11} {'reloaded':>9}"
+    print(header)
+    for r in results:
+        line = (
+            f"{r['mode']:<6} {r['workers']:>7} {r['rss_mb']:>9} {r['uss_mb']:>9} {r['pss_total_mb']:>10} "
+            f"{r['load_s']:>7} {r['search_ms']:>10}"
+        )
+        if args.reload:
+            line += f" {r['reload_p99_ms']:>11} {r['reload_max_ms']:>11} {str(r['reloaded']) + '/' + str(r['workers']):>9}"
+        print(line)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+-- Metadata filter pushdown for /search.
+--
+-- Same result shape as match_projects, but the YC metadata filters are applied in
+-- the WHERE clause before ranking by embedding distance. The expression indexes
+-- below match the expressions used in the function, so a selective filter
+-- (one batch, a status, a founded range) narrows the rows before any distance
+-- is computed. Run once in the Supabase SQL editor.
+
+create extension if not exists pg_trgm;
+
+-- first number in the text ('11-50' -> 11, '1,200' -> 1200), null when there is none or it
+-- has more than 9 digits, so no stored value can overflow the cast (filters.parse_int matches it)
+create or replace function project_meta_int(value text)
+returns int
+language sql
+immutable
+as $$
+  select case when length(digits) between 1 and 9 then digits::int end
+  from (select replace(substring(value from '\d{1,3}(?:,\d{3})+|\d+'), ',', '') as digits) n
+$$;
+
+create index if not exists projects_meta_batch_idx on projects ((lower(metadata->>'batch')));
+create index if not exists projects_meta_status_idx on projects ((lower(metadata->>'status')));
+-- rebuilt on every run: an index over an older definition of project_meta_int would keep its old values
+drop index if exists projects_meta_founded_idx;
+drop index if exists projects_meta_team_size_idx;
+create index projects_meta_founded_idx on projects ((project_meta_int(metadata->>'founded')));
+create index projects_meta_team_size_idx on projects ((project_meta_int(metadata->>'team_size')));
+create index if not exists projects_meta_location_trgm_idx
+  on projects using gin ((lower(metadata->>'location')) gin_trgm_ops);
+
+create or replace function match_projects_filtered(
+  query_embedding vector(1536),
+  sources text[] default null,
+  batches text[] default null,
+  statuses text[] default null,
+  locations text[] default null,
+  founded_min int default null,
+  founded_max int default null,
+  team_size_min int default null,
+  team_size_max int default null,
+  match_count int default 20
+)
+returns table (
+  id bigint,
+  name text,
+  short_description text,
+  long_description text,
+  tags text[],
+  source text,
+  url text,
+  metadata jsonb,
+  similarity float
+)
+language sql
+stable
+as $$
+  select
+    p.id,
+    p.name,
+    p.short_description,
+    p.long_description,
+    p.tags,
+    p.source,
+    p.url,
+    p.metadata,
+    1 - (p.embedding <=> query_embedding) as similarity
+  from projects p
+  where (sources is null or p.source = any(sources))
+    and (batches is null or lower(p.metadata->>'batch') = any(batches))
+    and (statuses is null or lower(p.metadata->>'status') = any(statuses))
+    and (locations is null or lower(p.metadata->>'location') like any(locations))
+    and (founded_min is null or project_meta_int(p.metadata->>'founded') >= founded_min)
+    and (founded_max is null or project_meta_int(p.metadata->>'founded') <= founded_max)
+    and (team_size_min is null or project_meta_int(p.metadata->>'team_size') >= team_size_min)
+    and (team_size_max is null or project_meta_int(p.metadata->>'team_size') <= team_size_max)
+  order by p.embedding <=> query_embedding
+  limit match_count;
+$$;
@@ -0,0 +1,6 @@
+import pytest
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path) -> str:
+    return str(tmp_path / "snapshot")
@@ -0,0 +1,48 @@
+"""Builders shared by the tests."""
+
+import json
+
+import numpy as np
+import pyarrow as pa
+
+from app.services.corpus.snapshot import METADATA_SCHEMA, Snapshot, write_snapshot
+
+SOURCES = ["YC", "Devpost", None]
+
+
+def make_table(rows: list[dict]) -> pa.Table:
+    """Metadata table in the snapshot schema; missing columns are null."""
+    full = []
+    for row in rows:
+        row = {name: row.get(name) for name in METADATA_SCHEMA.names}
+        row["metadata"] = json.dumps(row["metadata"] or {})
+        full.append(row)
+    return pa.Table.from_pylist(full, schema=METADATA_SCHEMA)
+
+
+def unit_rows(matrix) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def make_snapshot(rows: list[dict], embeddings, version: int = 1) -> Snapshot:
+    """In-memory Snapshot; rows need at least an id."""
+    ids = np.array([r["id"] for r in rows], dtype=np.int64)
+    manifest = {"version": version, "rows": len(rows), "dim": int(np.shape(embeddings)[1])}
+    return Snapshot(ids=ids, embeddings=unit_rows(embeddings), metadata=make_table(rows), manifest=manifest)
+
+
+def company_rows(start: int, count: int) -> list[dict]:
+    return [
+        {"id": i, "name": f"Company {i}", "source": SOURCES[i % len(SOURCES)], "metadata": {"batch": "W24"}}
+        for i in range(start, start + count)
+    ]
+
+
+def publish_snapshot(directory: str, version: int, rows: int, dim: int = 8, **manifest_fields):
+    """Write snapshot `version` to disk holding ids 1..rows; returns (ids, embeddings)."""
+    ids = np.arange(1, rows + 1, dtype=np.int64)
+    embeddings = unit_rows(np.random.default_rng(version).standard_normal((rows, dim)))
+    manifest = {"version": version, "rows": rows, "dim": dim, "last_id": rows, **manifest_fields}
+    write_snapshot(directory, ids, embeddings, make_table(company_rows(1, rows)), manifest)
+    return ids, embeddings
@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Request
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+
+from app.services.admission import admission
+from app.services.admission.admission import AdmissionController, Limits, TokenBuckets, client_key
+
+
+def test_bucket_admits_a_burst_then_asks_to_wait():
+    buckets = TokenBuckets(rate=2.0, burst=3)
+    assert [buckets.take("a", now=0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert buckets.take("a", now=0.0) == pytest.approx(0.5)
+    # other clients have their own bucket
+    assert buckets.take("b", now=0.0) == 0.0
+
+
+def test_bucket_refills_at_its_rate_up_to_the_burst():
+    buckets = TokenBuckets(rate=1.0, burst=2)
+    buckets.take("a", now=0.0)
+    buckets.take("a", now=0.0)
+    assert buckets.take("a", now=1.0) == 0.0
+    assert buckets.take("a", now=1.0) > 0
+    # a long idle period refills to the burst, not beyond it
+    assert [buckets.take("a", now=100.0) for _ in range(3)][-1] > 0
+
+
+def test_bucket_forgets_the_least_recent_clients():
+    buckets = TokenBuckets(rate=0.1, burst=1, max_clients=2)
+    for client in ("a", "b", "c"):
+        buckets.take(client, now=0.0)
+    # "a" was evicted and starts again with a full bucket
+    assert buckets.take("a", now=0.0) == 0.0
+    assert buckets.take("c", now=0.0) > 0
+
+
+def _controller(rate_limit: bool = False, **limits) -> AdmissionController:
+    values = {"concurrency": 1, "queue": 1, "wait_seconds": 0.05, "rate": 1.0, "burst": 2, **limits}
+    return AdmissionController("search", Limits(**values), redis_url="", rate_limit=rate_limit)
+
+
+def _status(coro) -> int:
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(coro)
+    assert "Retry-After" in raised.value.headers
+    return raised.value.status_code
+
+
+def test_rate_limit_is_off_by_default():
+    controller = _controller(concurrency=10)
+
+    async def many():
+        for _ in range(10):
+            await controller.acquire("10.0.0.1")
+            controller.release()
+
+    asyncio.run(many())
+    assert controller.rejected["rate"] == 0
+
+
+def test_rate_limit_rejects_with_429():
+    controller = _controller(rate_limit=True, concurrency=10)
+
+    async def burst():
+        for _ in range(3):
+            await controller.acquire("10.0.0.1")
+            controller.release()
+
+    assert _status(burst()) == 429
+    assert controller.rejected["rate"] == 1
+
+
+def test_full_queue_rejects_with_503():
+    controller = _controller(queue=0)
+
+    async def crowd():
+        await controller.acquire("a")
+        await controller.acquire("b")
+
+    assert _status(crowd()) == 503
+    assert controller.rejected["queue_full"] == 1
+
+
+def test_queued_request_past_its_deadline_is_rejected():
+    controller = _controller(queue=1, wait_seconds=0.05)
+
+    async def crowd():
+        await controller.acquire("a")
+        await controller.acquire("b")
+
+    assert _status(crowd()) == 503
+    assert controller.rejected["deadline"] == 1
+    assert controller.waiting == 0
+
+
+def test_queued_request_gets_the_released_slot():
+    controller = _controller(queue=1, wait_seconds=1.0)
+
+    async def handoff():
+        await controller.acquire("a")
+        waiter = asyncio.create_task(controller.acquire("b"))
+        await asyncio.sleep(0.01)
+        assert controller.waiting == 1
+        controller.release()
+        await waiter
+        assert controller.running == 1
+        controller.release()
+
+    asyncio.run(handoff())
+    assert controller.stats()["rejected"] == {"rate": 0, "queue_full": 0, "deadline": 0}
+
+
+def _client_behind(trusted: str, forwarded: str) -> str:
+    """client_key for a request from 10.0.0.2 after uvicorn's proxy-headers middleware."""
+    keys = []
+
+    async def app(scope, receive, send):
+        keys.append(client_key(Request(scope)))
+
+    scope = {
+        "type": "http",
+        "scheme": "http",
+        "client": ("10.0.0.2", 4000),
+        "headers": [(b"x-forwarded-for", forwarded.encode())],
+    }
+    asyncio.run(ProxyHeadersMiddleware(app, trusted_hosts=trusted)(scope, None, None))
+    return keys[0]
+
+
+def test_client_key_is_the_hop_the_trusted_proxy_appended():
+    assert _client_behind("10.0.0.2", "203.0.113.7") == "203.0.113.7"
+    # whatever the client put in front of the proxy's hop is ignored
+    assert _client_behind("10.0.0.2", "1.2.3.4, 203.0.113.7") == "203.0.113.7"
+    assert _client_behind("10.0.0.2", "5.6.7.8, 203.0.113.7") == "203.0.113.7"
+    # an untrusted peer is keyed by its own address
+    assert _client_behind("127.0.0.1", "1.2.3.4") == "10.0.0.2"
+
+
+def test_start_up_warns_when_rate_limits_may_key_on_the_proxy(monkeypatch, capsys):
+    monkeypatch.setattr(admission, "ADMISSION_ENABLED", True)
+    monkeypatch.setattr(admission, "ADMISSION_RATE_LIMIT", True)
+    monkeypatch.delenv("FORWARDED_ALLOW_IPS", raising=False)
+    admission.check_config()
+    assert "--forwarded-allow-ips" in capsys.readouterr().out
+
+    monkeypatch.setenv("FORWARDED_ALLOW_IPS", "10.0.0.2")
+    admission.check_config()
+    assert capsys.readouterr().out == ""
+
+
+def test_start_up_rejects_a_rate_that_never_refills(monkeypatch):
+    monkeypatch.setattr(admission, "ADMISSION_ENABLED", True)
+    monkeypatch.setattr(admission, "ADMISSION_RATE_LIMIT", True)
+    monkeypatch.setenv("ADMISSION_CHAT_RATE", "0")
+    with pytest.raises(ValueError, match="ADMISSION_CHAT_RATE"):
+        admission.check_config()
+
+    monkeypatch.setattr(admission, "ADMISSION_RATE_LIMIT", False)
+    admission.check_config()
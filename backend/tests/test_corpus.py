@@ -0,0 +1,89 @@
+import time
+
+import numpy as np
+import pytest
+
+from app.services.corpus.snapshot import load_snapshot
+from app.services.search import corpus as corpus_module
+from app.services.search.corpus import IdIndex, SearchCorpus
+from tests.helpers import publish_snapshot
+
+
+def test_id_index_on_sorted_ids():
+    index = IdIndex(np.array([3, 7, 9], dtype=np.int64))
+    assert [index.get(3), index.get(9), index.get("7")] == [0, 2, 1]
+    assert index.get(5) is None and index.get(10) is None and index.get("x") is None
+    assert 7 in index and 8 not in index
+    with pytest.raises(KeyError):
+        index[8]
+    assert len(index) == 3
+
+
+def test_id_index_on_unsorted_ids():
+    index = IdIndex(np.array([9, 3, 7], dtype=np.int64))
+    assert [index[9], index[3], index[7]] == [0, 1, 2]
+    assert index.get(4, -1) == -1
+
+
+def test_blocked_search_matches_brute_force(snapshot_dir, monkeypatch):
+    publish_snapshot(snapshot_dir, 1, 500, dim=16)
+    corpus = SearchCorpus(load_snapshot(snapshot_dir))
+    monkeypatch.setattr(corpus_module, "SCORE_BLOCK_ROWS", 64)
+    queries = np.random.default_rng(3).standard_normal((4, 16)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    scores = queries @ np.asarray(corpus.embeddings).T
+
+    for i, results in enumerate(corpus.batch_vector_search(queries, 10)):
+        assert [p for p, _ in results] == list(np.argsort(-scores[i])[:10])
+
+    mask = np.zeros(500, dtype=bool)
+    mask[::7] = True
+    masked = np.where(mask, scores[0], -np.inf)
+    assert [p for p, _ in corpus.vector_search(queries[0], 5, mask)] == list(np.argsort(-masked)[:5])
+
+
+def test_reload_publishes_a_new_corpus_and_leaves_the_old_one_alone(snapshot_dir, monkeypatch):
+    monkeypatch.setattr(corpus_module, "CORPUS_RELOAD_SECONDS", 0.0)
+    monkeypatch.setattr(corpus_module, "_corpus", None)
+    monkeypatch.setattr(corpus_module, "_checked_at", 0.0)
+    monkeypatch.setattr(corpus_module, "_reloading", False)
+
+    publish_snapshot(snapshot_dir, 1, 50)
+    old = corpus_module.get_corpus(snapshot_dir)
+    assert (old.version, len(old)) == (1, 50)
+
+    publish_snapshot(snapshot_dir, 2, 80)
+    # the request that notices the new version is answered from the current one
+    assert corpus_module.get_corpus(snapshot_dir) is old
+    deadline = time.monotonic() + 10
+    while corpus_module._reloading and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    new = corpus_module.get_corpus(snapshot_dir)
+    assert new is not old
+    assert (new.version, len(new), len(new.lexical), new.position.get(80)) == (2, 80, 80, 79)
+    assert (old.version, len(old), len(old.lexical), old.position.get(80)) == (1, 50, 50, None)
+
+
+def test_appended_rows_extend_a_copy_of_the_indexes(snapshot_dir, monkeypatch):
+    monkeypatch.setattr(corpus_module, "CORPUS_RELOAD_SECONDS", 0.0)
+    monkeypatch.setattr(corpus_module, "_corpus", None)
+    monkeypatch.setattr(corpus_module, "_checked_at", 0.0)
+
+    publish_snapshot(snapshot_dir, 1, 50)
+    old = corpus_module.get_corpus(snapshot_dir)
+    publish_snapshot(snapshot_dir, 2, 80, appended=30)
+    new = corpus_module._load(snapshot_dir, old)
+
+    assert new is not old and new.lexical is not old.lexical
+    assert (new.version, len(new), len(new.lexical), new.facets.size, new.metadata.size) == (2, 80, 80, 80, 80)
+    assert new.lexical.match_name("company 80") == [(79, 1.0)]
+    assert new.position.get(80) == 79
+    # only the appended rows were indexed: rows 1..50 are the same objects
+    assert new.rows[0] is old.rows[0]
+    assert (old.version, len(old), len(old.lexical), old.facets.size, old.metadata.size) == (1, 50, 50, 50, 50)
+    assert old.lexical.search("80") == [] and new.lexical.search("80")[0][0] == 79
+
+    # anything but a pure append of the next version is rebuilt
+    publish_snapshot(snapshot_dir, 3, 90, appended=10, updated=2)
+    assert new.extended(corpus_module.load_snapshot(snapshot_dir)) is None
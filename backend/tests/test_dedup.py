@@ -0,0 +1,118 @@
+import os
+
+import numpy as np
+
+from app.services.corpus import dedup
+from app.services.corpus.dedup import (
+    _UnionFind,
+    company_domain,
+    find_duplicates,
+    normalize_company_name,
+    read_clusters,
+)
+from tests.helpers import make_snapshot
+
+
+def test_company_names_lose_case_punctuation_and_suffixes():
+    assert normalize_company_name("Acme Labs, Inc.") == "acme"
+    assert normalize_company_name("acme") == "acme"
+    # a name that is only a suffix is kept
+    assert normalize_company_name("Labs") == "labs"
+    assert normalize_company_name(None) == ""
+
+
+def test_company_domain_ignores_listing_sites():
+    assert company_domain("https://www.Acme.com:443/about") == "acme.com"
+    assert company_domain("acme.io") == "acme.io"
+    assert company_domain("https://www.ycombinator.com/companies/acme") is None
+    assert company_domain("https://devpost.com/software/acme") is None
+    assert company_domain("") is None
+
+
+def test_union_find_roots_at_the_smallest_member():
+    uf = _UnionFind(6)
+    uf.union(4, 2)
+    uf.union(5, 4)
+    uf.union(1, 3)
+    assert [uf.find(i) for i in range(6)] == [0, 1, 2, 1, 2, 2]
+    uf.union(3, 5)
+    assert {uf.find(i) for i in (1, 2, 3, 4, 5)} == {1}
+
+
+def _corpus():
+    """Rows 10/40 are near-identical, 20/50 share a name at moderate similarity, 30 is alone."""
+    rng = np.random.default_rng(1)
+    basis = np.linalg.qr(rng.standard_normal((16, 16)))[0].T.astype(np.float32)
+    vectors = [basis[0], basis[1], basis[2], basis[0] + 0.01 * basis[3], basis[1] + 0.6 * basis[4]]
+    rows = [
+        {"id": 10, "name": "Acme", "url": "https://acme.com"},
+        {"id": 20, "name": "Gridsense Inc", "url": "https://gridsense.io"},
+        {"id": 30, "name": "Paperline", "url": "https://paperline.app"},
+        {"id": 40, "name": "Acme Notes", "url": "https://acmenotes.com"},
+        {"id": 50, "name": "GridSense", "url": "https://www.ycombinator.com/companies/gridsense"},
+    ]
+    return rows, np.array(vectors)
+
+
+def test_duplicates_share_the_smallest_id(snapshot_dir):
+    rows, vectors = _corpus()
+    meta = find_duplicates(make_snapshot(rows, vectors), snapshot_dir)
+
+    ids, clusters = read_clusters(snapshot_dir)
+    assert dict(zip(ids.tolist(), clusters.tolist())) == {10: 10, 20: 20, 30: 30, 40: 10, 50: 20}
+    assert meta["duplicate_groups"] == 2
+    assert meta["links"] == 2
+
+
+def test_column_tiles_find_the_same_pairs(snapshot_dir, monkeypatch):
+    rng = np.random.default_rng(7)
+    base = rng.standard_normal((300, 12))
+    # every tenth row reappears later with a little noise
+    vectors = np.concatenate([base, base[::10] + 0.001 * rng.standard_normal((30, 12))])
+    rows = [{"id": i + 1, "name": f"Company {i + 1}"} for i in range(len(vectors))]
+    snapshot = make_snapshot(rows, vectors)
+
+    find_duplicates(snapshot, snapshot_dir, full=True)
+    expected = read_clusters(snapshot_dir)[1]
+
+    monkeypatch.setattr(dedup, "BLOCK_ROWS", 64)
+    monkeypatch.setattr(dedup, "COLUMN_BLOCK", 50)
+    snapshot.manifest["version"] = 2
+    meta = find_duplicates(snapshot, snapshot_dir, full=True)
+    assert np.array_equal(read_clusters(snapshot_dir)[1], expected)
+    assert meta["duplicate_groups"] == 30
+
+
+def test_later_runs_only_compare_appended_rows(snapshot_dir):
+    rows, vectors = _corpus()
+    find_duplicates(make_snapshot(rows[:4], vectors[:4]), snapshot_dir)
+
+    meta = find_duplicates(make_snapshot(rows, vectors, version=2), snapshot_dir)
+    assert meta["compared_from"] == 4
+    ids, clusters = read_clusters(snapshot_dir)
+    assert dict(zip(ids.tolist(), clusters.tolist()))[50] == 20
+    # the same snapshot version is not recomputed
+    assert find_duplicates(make_snapshot(rows, vectors, version=2), snapshot_dir) == meta
+
+
+def test_name_matches_need_the_name_threshold(snapshot_dir, monkeypatch):
+    rows, vectors = _corpus()
+    # 20 and 50 share a name at cosine ~0.86: not close enough any more
+    monkeypatch.setattr(dedup, "DEDUP_NAME_THRESHOLD", 0.9)
+    find_duplicates(make_snapshot(rows, vectors), snapshot_dir)
+    ids, clusters = read_clusters(snapshot_dir)
+    assert dict(zip(ids.tolist(), clusters.tolist())) == {10: 10, 20: 20, 30: 30, 40: 10, 50: 50}
+
+
+def test_runs_are_published_as_versions(snapshot_dir):
+    rows, vectors = _corpus()
+    find_duplicates(make_snapshot(rows[:4], vectors[:4]), snapshot_dir)
+    # an unpublished leftover from a run that died, and a file from the old flat layout
+    directory = os.path.join(snapshot_dir, "dedup")
+    os.makedirs(os.path.join(directory, "v2"))
+    np.save(os.path.join(directory, "clusters.npy"), np.zeros(3, dtype=np.int64))
+
+    meta = find_duplicates(make_snapshot(rows, vectors, version=2), snapshot_dir)
+    assert meta["data"] == "v2"
+    assert sorted(os.listdir(directory)) == ["meta.json", "v1", "v2"]
+    assert len(read_clusters(snapshot_dir)[0]) == len(rows)
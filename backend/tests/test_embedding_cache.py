@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.embedder import cache as cache_module
+from app.services.embedder import embedder
+from app.services.embedder.cache import EmbeddingCache, cache_key, pack_vector, unpack_vector
+
+VECTOR_BYTES = 4 * 10
+
+
+@pytest.fixture
+def path(tmp_path) -> str:
+    return str(tmp_path / "cache" / "embeddings.sqlite")
+
+
+def vector(i: float) -> list[float]:
+    return [float(i)] * 10
+
+
+def test_keys_depend_on_model_dimensions_and_text():
+    assert cache_key("m", 256, "text") == cache_key("m", 256, "text")
+    assert len({cache_key("m", 256, "text"), cache_key("m", None, "text"), cache_key("n", 256, "text")}) == 3
+    assert unpack_vector(pack_vector([0.5, -2.0])) == [0.5, -2.0]
+
+
+def test_round_trip_and_running_size(path):
+    cache = EmbeddingCache(path, max_bytes=10_000)
+    cache.put_many({"a": vector(1), "b": vector(2)})
+    assert cache.get_many(["a", "b", "missing", "a"]) == {"a": vector(1), "b": vector(2)}
+    assert cache.size_bytes() == 2 * VECTOR_BYTES
+
+    # replacing an entry only counts the difference
+    cache.put_many({"a": [1.0] * 5})
+    assert cache.size_bytes() == VECTOR_BYTES + 20 == cache._sum_sizes()
+    cache.close()
+    assert EmbeddingCache(path).size_bytes() == VECTOR_BYTES + 20
+
+
+def test_eviction_drops_least_recently_used(path):
+    cache = EmbeddingCache(path, max_bytes=5 * VECTOR_BYTES)
+    for i in range(5):
+        cache.put_many({f"k{i}": vector(i)})
+    # a hit makes k0 recent, even though its new last_used is still buffered
+    assert cache.get_many(["k0"]) == {"k0": vector(0)}
+
+    cache.put_many({"k5": vector(5)})
+    kept = cache.get_many([f"k{i}" for i in range(6)])
+    assert "k0" in kept and "k5" in kept
+    # untouched entries go oldest first, down to 90% of the budget
+    assert sorted(kept) == ["k0", "k3", "k4", "k5"]
+    assert cache.size_bytes() <= cache.max_bytes * cache_module._EVICT_TARGET
+
+
+def test_lookups_do_not_write_until_enough_hits(path, monkeypatch):
+    monkeypatch.setattr(cache_module, "_TOUCH_FLUSH", 3)
+    cache = EmbeddingCache(path)
+    cache.put_many({"a": vector(1)})
+    cache.get_many(["a"])
+    cache.get_many(["a"])
+    assert len(cache._touched) == 1
+    cache.put_many({"b": vector(2), "c": vector(3)})
+    cache.get_many(["a", "b", "c"])
+    assert cache._touched == {}
+
+
+def test_shared_cache_is_created_once(monkeypatch, path):
+    monkeypatch.setattr(cache_module, "EMBED_CACHE_PATH", path)
+    monkeypatch.setattr(cache_module, "_cache", None)
+    monkeypatch.setattr(cache_module, "EmbeddingCache", lambda: EmbeddingCache(path))
+    assert cache_module.get_cache() is cache_module.get_cache()
+    monkeypatch.setattr(cache_module, "EMBED_CACHE_PATH", "")
+    assert cache_module.get_cache() is None
+
+
+def test_an_unopenable_cache_is_skipped(monkeypatch, tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    monkeypatch.setattr(cache_module, "_cache", None)
+    monkeypatch.setattr(cache_module, "_cache_failed", False)
+    monkeypatch.setattr(cache_module, "EmbeddingCache", lambda: EmbeddingCache(str(blocker / "embeddings.sqlite")))
+    assert cache_module.get_cache() is None
+    assert cache_module._cache_failed
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.inputs: list[list[str]] = []
+
+    def create(self, model, input, **kwargs):
+        self.inputs.append(list(input))
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[float(len(t))]) for t in input])
+
+
+def test_only_ingest_uses_the_cache_and_blank_texts_are_not_sent(monkeypatch, path):
+    fake = FakeEmbeddings()
+    monkeypatch.setattr(embedder, "get_openai", lambda: SimpleNamespace(embeddings=fake))
+    cache = EmbeddingCache(path)
+    monkeypatch.setattr(embedder, "get_cache", lambda: cache)
+
+    assert embedder.embed_texts(["ab", "", "  ", "abc", "ab"]) == [[2.0], None, None, [3.0], [2.0]]
+    assert fake.inputs == [["ab", "abc"]]
+    assert cache.size_bytes() == 0
+
+    embedder.embed_texts(["ab", "abcd"], use_cache=True)
+    embedder.embed_texts(["ab", "abcd"], use_cache=True)
+    assert fake.inputs[1:] == [["ab", "abcd"]]
+    assert embedder.embded_query(" ") is None
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from app.services.search.filters import MetadataFilters, MetadataIndex, parse_int
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        ("2021", 2021),
+        ("1,200", 1200),
+        ("11-50", 11),
+        ("2021-2022", 2021),
+        ("1-10 employees", 1),
+        ("Founded in 2019", 2019),
+        ("12345678901", None),
+        ("unknown", None),
+        (None, None),
+        (42, 42),
+    ],
+)
+def test_parse_int_takes_the_first_number(value, expected):
+    assert parse_int(value) == expected
+
+
+def test_ranges_use_the_first_number():
+    rows = [
+        {"metadata": {"founded": "2021-2022", "team_size": "11-50"}},
+        {"metadata": {"founded": "2015", "team_size": "1,200"}},
+        {"metadata": {}},
+    ]
+    index = MetadataIndex()
+    index.add(rows)
+
+    filters = MetadataFilters(founded_min=2020, team_size_max=100)
+    assert index.filter_mask(filters).tolist() == [True, False, False]
+    assert [filters.matches(r) for r in rows] == [True, False, False]
+    assert np.array_equal(index.filter_mask(MetadataFilters(team_size_min=1000)), [False, True, False])
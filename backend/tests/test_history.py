@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+from types import SimpleNamespace
+
+import pytest
+
+from app.routes import chat as chat_route
+from app.routes.chat import ChatRequest
+from app.services.chat import history, sessions
+from app.services.chat.history import compact_history, history_digest
+from app.services.chat.sessions import SessionStore
+
+BUDGET = 600
+
+
+@pytest.fixture(autouse=True)
+def small_budget(monkeypatch):
+    monkeypatch.setattr(history, "CHAT_SUMMARY_TOKENS", 50)
+    monkeypatch.setattr(history, "_summaries", OrderedDict())
+
+
+def conversation(turns: int) -> list[dict]:
+    """`turns` user/model exchanges of about 100 tokens per message."""
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "parts": [f"question {i} " + "word " * 100]})
+        messages.append({"role": "model", "parts": [f"answer {i} " + "word " * 100]})
+    return messages
+
+
+class Summarizer:
+    def __init__(self):
+        self.prompts: list[str] = []
+
+    def __call__(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return f"summary {len(self.prompts)}"
+
+
+def test_short_history_is_sent_unchanged():
+    summarize = Summarizer()
+    messages = conversation(2)
+    assert compact_history(messages, summarize, "c1", budget=BUDGET) is messages
+    assert summarize.prompts == []
+
+
+def test_old_turns_are_folded_into_a_summary():
+    summarize = Summarizer()
+    messages = conversation(6)
+    compacted = compact_history(messages, summarize, "c1", budget=BUDGET)
+
+    assert len(summarize.prompts) == 1
+    assert compacted[0] == {"role": "user", "parts": ["Summary of our conversation so far:\nsummary 1"]}
+    assert compacted[1]["role"] == "model"
+    kept = compacted[2:]
+    assert kept == messages[-len(kept) :]
+    assert kept[0]["role"] == "user"
+    assert 0 < len(kept) < len(messages)
+    # the summarized turns are in the prompt, the kept ones are not
+    assert "question 0" in summarize.prompts[0]
+    assert kept[0]["parts"][0].split(" word")[0] not in summarize.prompts[0]
+
+
+def test_the_next_turn_reuses_the_cached_summary():
+    summarize = Summarizer()
+    messages = conversation(6)
+    first = compact_history(messages, summarize, "c1", budget=BUDGET)
+    again = compact_history(messages, summarize, "c1", budget=BUDGET)
+    assert again == first
+    assert len(summarize.prompts) == 1
+
+    # when more turns age out, only they are summarized, on top of the previous summary
+    compact_history(conversation(10), summarize, "c1", budget=BUDGET)
+    assert len(summarize.prompts) == 2
+    assert "Summary so far:\nsummary 1" in summarize.prompts[1]
+    assert "question 0" not in summarize.prompts[1]
+
+
+def test_edited_history_is_summarized_again():
+    summarize = Summarizer()
+    messages = conversation(6)
+    compact_history(messages, summarize, "c1", budget=BUDGET)
+
+    edited = [{"role": "user", "parts": ["a different opening " + "word " * 100]}] + messages[1:]
+    compact_history(edited, summarize, "c1", budget=BUDGET)
+    assert len(summarize.prompts) == 2
+    assert "Summary so far" not in summarize.prompts[1]
+
+
+def test_without_a_conversation_id_nothing_is_shared():
+    summarize = Summarizer()
+    messages = conversation(6)
+    compact_history(messages, summarize, None, budget=BUDGET)
+    compact_history(messages, summarize, None, budget=BUDGET)
+    assert len(summarize.prompts) == 2
+    assert len(history._summaries) == 0
+
+
+def test_a_failed_summary_keeps_the_recent_turns():
+    def broken(prompt: str) -> str:
+        raise RuntimeError("model unavailable")
+
+    messages = conversation(6)
+    compacted = compact_history(messages, broken, "c1", budget=BUDGET)
+    assert compacted == messages[-len(compacted) :]
+    assert compacted[0]["role"] == "user"
+
+
+def test_digest_covers_roles_and_text():
+    a = [{"role": "user", "parts": ["hi"]}]
+    assert history_digest(a) == history_digest([{"role": "user", "parts": ["hi"]}])
+    assert history_digest(a) != history_digest([{"role": "model", "parts": ["hi"]}])
+    assert history_digest(a) != history_digest([{"role": "user", "parts": ["hi!"]}])
+
+
+class FakeModel:
+    """Chat model stand-in: replies to every message and records summary prompts."""
+
+    def __init__(self, summarize: Summarizer):
+        self.summarize = summarize
+        self.sent_histories: list[list[dict]] = []
+
+    def generate_content(self, prompt: str):
+        return SimpleNamespace(text=self.summarize(prompt))
+
+    def start_chat(self, history: list[dict]):
+        self.sent_histories.append(history)
+        return SimpleNamespace(send_message=lambda message: SimpleNamespace(text="answer " + "word " * 100))
+
+
+def test_chat_sessions_reuse_the_summary_across_turns(monkeypatch):
+    summarize = Summarizer()
+    model = FakeModel(summarize)
+    monkeypatch.setattr(chat_route, "GEMINI_API_KEY", "key")
+    monkeypatch.setattr(chat_route, "chat_model", lambda name, instruction: model)
+    monkeypatch.setattr(chat_route, "get_response_cache", lambda: None)
+    monkeypatch.setattr(chat_route, "get_session_store", lambda: store)
+    monkeypatch.setattr(chat_route, "compact_history", partial(compact_history, budget=BUDGET))
+    store = SessionStore()
+
+    messages: list[dict] = []
+    conversation_id = None
+    for turn in range(12):
+        messages.append({"role": "user", "content": f"question {turn} " + "word " * 100})
+        response = chat_route.chat(ChatRequest(messages=messages, conversation_id=conversation_id))
+        conversation_id = response.conversation_id
+        messages.append({"role": "assistant", "content": response.message})
+
+    # a summary call every few turns, each folding in only newly aged-out turns
+    assert 1 < len(summarize.prompts) <= 6
+    for prompt in summarize.prompts:
+        assert "Summary of our conversation so far" not in prompt
+    assert model.sent_histories[-1][0]["parts"][0].endswith(f"summary {len(summarize.prompts)}")
+    # the session keeps every turn, the summary is only in what was sent
+    assert len(store.get(conversation_id).history) == 24
+
+
+def test_session_history_comes_with_its_ideas_flag():
+    session = SessionStore().get("c1")
+    client = conversation(1)
+    assert session.history_for(client) is None
+
+    server = [{"role": "user", "parts": ["question 0 plus ideas"]}, client[1]]
+    session.record_turn(server, client, ideas_in_history=True)
+    assert session.history_for(client) == (server, True)
+    # new ideas have to be shown again, so the history no longer counts as holding them
+    session.set_retrieval("another idea", 0.0, None, [])
+    assert session.history_for(client) == (server, False)
+    # an edited client history drops the server-side copy
+    assert session.history_for(conversation(2)) is None
+    assert session.history_for(client) is None
+
+
+def test_shared_session_store_is_created_once_across_threads(monkeypatch):
+    created = []
+
+    class SlowStore(SessionStore):
+        def __init__(self):
+            time.sleep(0.05)
+            created.append(self)
+            super().__init__()
+
+    monkeypatch.setattr(sessions, "_store", None)
+    monkeypatch.setattr(sessions, "SessionStore", SlowStore)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(sessions.get_session_store())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(created) == 1
+    assert all(r is created[0] for r in results)
@@ -0,0 +1,66 @@
+import numpy as np
+
+from app.services.search.lexical import LexicalIndex, tokenize, trigrams
+
+
+def test_tokenize_lowercases_and_drops_stopwords():
+    assert tokenize("The AI notes for Sales-Teams") == ["ai", "notes", "sales", "teams"]
+    assert tokenize(None) == []
+
+
+def _index() -> LexicalIndex:
+    index = LexicalIndex()
+    index.add(
+        [
+            {"name": "Acme Robotics", "short_description": "warehouse robots", "tags": ["Robotics"]},
+            {"name": "Paperline", "long_description": "robotics is mentioned once in a long description"},
+            {"name": "Notewise", "short_description": "meeting notes with AI", "tags": ["AI", "Productivity"]},
+        ]
+    )
+    return index
+
+
+def test_bm25_ranks_name_and_tag_matches_above_body_text():
+    index = _index()
+    results = index.search("robotics")
+    assert [doc for doc, _ in results] == [0, 1]
+    assert results[0][1] > results[1][1]
+    assert index.search("unknownword") == []
+
+
+def test_bm25_respects_the_allowed_mask():
+    index = _index()
+    assert [doc for doc, _ in index.search("robotics", allowed=np.array([False, True, True]))] == [1]
+
+
+def test_appended_documents_continue_the_positions():
+    index = _index()
+    index.add([{"name": "Robo Fleet", "tags": ["Robotics"]}])
+    assert len(index) == 4
+    assert 3 in dict(index.search("robotics"))
+
+
+def test_name_match_exact_then_fuzzy():
+    index = _index()
+    assert index.match_name("acme robotics") == [(0, 1.0)]
+    fuzzy = index.match_name("Notewize")
+    assert fuzzy[0][0] == 2 and 0.5 <= fuzzy[0][1] < 1.0
+    assert index.match_name("zzzz") == []
+    assert trigrams("ab") == {"  a", " ab", "ab "}
+
+
+def test_extended_index_leaves_the_original_unchanged():
+    index = _index()
+    extended = index.extended([{"name": "Acme Robotics", "tags": ["Robotics"], "short_description": "robots"}])
+
+    assert (len(index), len(extended)) == (3, 4)
+    assert [doc for doc, _ in index.search("robotics")] == [0, 1]
+    assert sorted(doc for doc, _ in extended.search("robotics")) == [0, 1, 3]
+    assert index.match_name("acme robotics") == [(0, 1.0)]
+    assert extended.match_name("acme robotics") == [(0, 1.0), (3, 1.0)]
+    # untouched posting lists are shared, touched ones were copied
+    assert extended.postings["notes"] is index.postings["notes"]
+    assert extended.postings["robotics"] is not index.postings["robotics"]
+    # the extended index appends in place like any other
+    extended.add([{"name": "Later"}])
+    assert len(extended.postings["robotics"]) == 3
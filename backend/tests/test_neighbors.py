@@ -0,0 +1,41 @@
+import os
+
+import numpy as np
+
+from app.services.corpus.neighbors import build_neighbors, compute_knn, project_neighbors, read_neighbors
+from tests.helpers import company_rows, make_snapshot, unit_rows
+
+
+def test_knn_matches_brute_force():
+    embeddings = unit_rows(np.random.default_rng(0).standard_normal((60, 8)))
+    sims, pos = compute_knn(embeddings, k=5, workers=2)
+
+    scores = embeddings @ embeddings.T
+    np.fill_diagonal(scores, -np.inf)
+    expected = np.argsort(-scores, axis=1)[:, :5]
+    assert np.array_equal(pos, expected)
+    np.testing.assert_allclose(sims, np.take_along_axis(scores, expected, axis=1), rtol=1e-6)
+
+
+def test_appended_rows_with_negative_similarity_still_merge(snapshot_dir):
+    vectors = [[1, 0.2], [1, -0.2], [-1, 0.1]]
+    build_neighbors(make_snapshot(company_rows(1, 2), vectors[:2]), snapshot_dir, k=3)
+    # row 1 has a single neighbor; the rest of its list is padding that a later merge must not prefer
+    assert [pid for pid, _ in project_neighbors(1, snapshot_dir)] == [2]
+
+    meta = build_neighbors(make_snapshot(company_rows(1, 3), vectors, version=2), snapshot_dir, k=3)
+    assert meta["computed_from"] == 2
+    neighbors = project_neighbors(1, snapshot_dir)
+    assert [pid for pid, _ in neighbors] == [2, 3]
+    assert neighbors[1][1] < 0
+
+
+def test_builds_are_published_as_versions(snapshot_dir):
+    vectors = unit_rows(np.random.default_rng(1).standard_normal((30, 8)))
+    for version, rows in ((1, 20), (2, 25), (3, 30)):
+        build_neighbors(make_snapshot(company_rows(1, rows), vectors[:rows], version=version), snapshot_dir, k=4)
+
+    directory = os.path.join(snapshot_dir, "neighbors")
+    assert sorted(os.listdir(directory)) == ["meta.json", "v2", "v3"]
+    ids, neighbors, sims = read_neighbors(snapshot_dir)
+    assert len(ids) == neighbors.shape[0] == sims.shape[0] == 30
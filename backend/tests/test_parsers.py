@@ -0,0 +1,131 @@
+import json
+
+import pytest
+
+from app.services.scraper.parsers import (
+    parse_devpost_project,
+    parse_product_hunt_product,
+    parse_topstartups_cards,
+    parse_yc_cards,
+    parse_yc_company,
+)
+from benchmarks.parsers import SOURCES, load_fixtures
+
+FIXTURES = [(source, name, html, expected) for source in SOURCES for name, html, expected in load_fixtures(source)]
+
+
+def test_every_source_has_fixtures():
+    assert {source for source, *_ in FIXTURES} == set(SOURCES)
+
+
+@pytest.mark.parametrize(
+    "source,name,html,expected_path", FIXTURES, ids=[f"{source}/{name}" for source, name, *_ in FIXTURES]
+)
+def test_parser_matches_saved_output(source, name, html, expected_path):
+    parse = SOURCES[source][2]
+    with open(expected_path, encoding="utf-8") as f:
+        expected = json.load(f)
+    assert json.loads(json.dumps(parse(html, name))) == expected
+
+
+def _fixture(source: str, name: str):
+    return next(html for page, html, _ in load_fixtures(source) if page == name)
+
+
+# read off the fixture HTML by hand, so a parser change can't quietly rewrite them the way --update does
+def test_yc_listing_by_hand():
+    cards = parse_yc_cards(_fixture("yc_list", "list-fall-2024"))
+    assert len(cards) == 40
+    assert cards[0] == {
+        "name": "SecurityLegal",
+        "url": "https://www.ycombinator.com/companies/securitylegal",
+        "location": "Bengaluru, India",
+        "short_description": "Meeting robotics analytics agent sales fintech agent notes.",
+        "tags": ["B2B", "Fintech"],
+    }
+    assert cards[1]["tags"] == ["Developer Tools"]
+
+
+def test_yc_company_by_hand():
+    assert parse_yc_company(_fixture("yc_company", "company-gridsense")) == {
+        "founded": "2023",
+        "batch": "Fall 2024",
+        "team_size": "12",
+        "status": "Acquired",
+        "primary_partner": None,
+        "long_description": "GridSense forecasts substation load for utilities using smart meter data.",
+    }
+    assert parse_yc_company(_fixture("yc_company", "company-nodesc")) == {
+        "founded": "2024",
+        "batch": None,
+        "team_size": "2",
+        "status": None,
+        "primary_partner": None,
+        "long_description": "No description found",
+    }
+
+
+def test_devpost_project_by_hand():
+    html = _fixture("devpost", "software-medimatch")
+    assert parse_devpost_project(html, "https://devpost.com/software/medimatch") == {
+        "name": "MediMatch",
+        "short_description": "Match patients with clinical trials in seconds",
+        "long_description": (
+            "MediMatch reads a patient summary and ranks open clinical trials by eligibility.\n"
+            "Coordinators get a shortlist with the criteria each patient meets.\n"
+            "• FHIR import\n"
+            "• Explainable matches"
+        ),
+        "url": "https://devpost.com/software/medimatch",
+        "source": "Devpost",
+        "tags": ["fastapi", "google-cloud", "python", "react"],
+        "created_at": "2024-10-13T17:02:11-04:00",
+    }
+
+
+def test_product_hunt_product_by_hand():
+    assert parse_product_hunt_product(_fixture("producthunt", "products-flowdesk")) == {
+        "name": "Flowdesk",
+        "short_description": "Your inbox, sorted by what matters",
+        "long_description": "Flowdesk triages email with an on-device model.\nIt drafts replies for the rest.",
+        "url": "https://flowdesk.app/?ref=producthunt",
+        # launch tags only, not the header's topic links; lower-cased, whitespace collapsed, deduplicated
+        "tags": ["email", "productivity", "artificial intelligence"],
+    }
+
+
+def test_topstartups_cards_by_hand():
+    cards = parse_topstartups_cards(_fixture("topstartups", "index"))
+    assert len(cards) == 30
+    assert cards[0] == {
+        "name": "SalesVideo",
+        "url": "https://salesvideo.com/?utm_source=topstartups.io",
+        "short_description": (
+            "Robotics marketing security travel data meeting agent cloud payments devtools robotics fintech mobile education."
+        ),
+        "tags": ["Robotics", "SaaS", "Series C"],
+        "team_size": "1-10 employees",
+        "location": "San Francisco, CA, USA",
+        "founded": "2021",
+    }
+    assert cards[1]["location"] == "London, UK"
+
+
+def test_yc_cards_resolve_relative_links():
+    html = '<a class="_company_i9oky_355" href="/companies/acme"><span class="_coName_i9oky_470">Acme</span></a>'
+    assert parse_yc_cards(html) == [
+        {
+            "name": "Acme",
+            "url": "https://www.ycombinator.com/companies/acme",
+            "location": "Unknown",
+            "short_description": "",
+            "tags": [],
+        }
+    ]
+
+
+def test_parsers_tolerate_empty_pages():
+    assert parse_yc_cards("") == []
+    assert parse_topstartups_cards("<html><body></body></html>") == []
+    company = parse_yc_company("<html></html>")
+    assert isinstance(company, dict)
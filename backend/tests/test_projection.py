@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+
+from app.services.corpus.projection import build_map_table, project, read_map, update_map
+from app.services.corpus.snapshot import load_snapshot
+from tests.helpers import publish_snapshot as publish
+
+
+def test_map_round_trip_after_refreshes(snapshot_dir):
+    publish(snapshot_dir, 1, 60)
+    update_map(load_snapshot(snapshot_dir), snapshot_dir)
+    # two more refreshes prune v1, which the map labels used to be read from
+    publish(snapshot_dir, 2, 80)
+    publish(snapshot_dir, 3, 100)
+    update_map(load_snapshot(snapshot_dir), snapshot_dir)
+
+    meta, table = build_map_table(snapshot_dir, dims=3)
+    assert table.column_names == ["id", "x", "y", "z", "cluster", "name", "source"]
+    assert table.num_rows == 100
+    assert table.column("name").to_pylist() == [f"Company {i}" for i in range(1, 101)]
+    assert table.column("source").to_pylist()[:3] == ["Devpost", None, "YC"]
+
+    _, flat = build_map_table(snapshot_dir, dims=2)
+    assert "z" not in flat.column_names
+
+
+def test_map_labels_missing_ids_as_null(snapshot_dir):
+    publish(snapshot_dir, 1, 40)
+    update_map(load_snapshot(snapshot_dir), snapshot_dir)
+    # a snapshot that lost rows since the map was built
+    publish(snapshot_dir, 2, 30)
+
+    _, table = build_map_table(snapshot_dir)
+    names = table.column("name").to_pylist()
+    assert names[:30] == [f"Company {i}" for i in range(1, 31)]
+    assert names[30:] == [None] * 10
+
+
+def test_appended_rows_keep_mapped_coordinates(snapshot_dir):
+    publish(snapshot_dir, 1, 50)
+    update_map(load_snapshot(snapshot_dir), snapshot_dir)
+    first = read_map(snapshot_dir)
+    # below MAP_REFIT_GROWTH, so the stored model is reused
+    publish(snapshot_dir, 2, 52, appended=2, updated=0)
+    meta = update_map(load_snapshot(snapshot_dir), snapshot_dir)
+
+    current = read_map(snapshot_dir)
+    assert not meta["refit"]
+    np.testing.assert_array_equal(current["coords"][:50], first["coords"])
+
+
+def test_updated_rows_are_reprojected(snapshot_dir):
+    publish(snapshot_dir, 1, 50)
+    update_map(load_snapshot(snapshot_dir), snapshot_dir)
+    # the helper draws new embeddings per version, as if every row had been edited
+    publish(snapshot_dir, 2, 52, appended=2, updated=50)
+    snapshot = load_snapshot(snapshot_dir)
+    meta = update_map(snapshot, snapshot_dir)
+
+    current = read_map(snapshot_dir)
+    assert not meta["refit"]
+    expected = project(np.asarray(snapshot.embeddings), current["mean"], current["components"])
+    np.testing.assert_allclose(current["coords"], expected, rtol=1e-5, atol=1e-6)
+
+
+def test_map_versions_are_published_by_swapping_meta(snapshot_dir):
+    publish(snapshot_dir, 1, 40)
+    for version in range(1, 4):
+        if version > 1:
+            publish(snapshot_dir, version, 40 + version)
+        update_map(load_snapshot(snapshot_dir), snapshot_dir)
+
+    directory = os.path.join(snapshot_dir, "map")
+    assert read_map(snapshot_dir)["meta"]["data"] == "v3"
+    assert sorted(os.listdir(directory)) == ["meta.json", "v2", "v3"]
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from app.services.search.ranking import RRF_K, maximal_marginal_relevance, reciprocal_rank_fusion
+from tests.helpers import unit_rows
+
+
+def test_rrf_scores_are_summed_reciprocal_ranks():
+    fused = dict(reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]]))
+    assert fused["a"] == pytest.approx(1 / (RRF_K + 1) + 1 / (RRF_K + 2))
+    assert fused["b"] == pytest.approx(1 / (RRF_K + 2))
+    assert fused["c"] == pytest.approx(1 / (RRF_K + 3) + 1 / (RRF_K + 1))
+
+
+def test_rrf_prefers_items_both_rankings_agree_on():
+    vector = ["x", "shared", "y", "z"]
+    lexical = ["w", "v", "shared"]
+    assert reciprocal_rank_fusion([vector, lexical])[0][0] == "shared"
+    assert reciprocal_rank_fusion([]) == []
+
+
+def test_mmr_without_diversity_follows_relevance():
+    vectors = unit_rows(np.random.default_rng(0).standard_normal((6, 8)))
+    relevance = np.array([0.2, 0.9, 0.5, 0.7, 0.1, 0.3])
+    assert maximal_marginal_relevance(relevance, vectors, 4, diversity=0.0) == [1, 3, 2, 5]
+
+
+def test_mmr_skips_near_duplicates_of_what_it_picked():
+    base = np.eye(4, dtype=np.float32)
+    # 0 and 1 are the same idea, 2 is different and a little less relevant
+    vectors = unit_rows([base[0], base[0] + 0.01 * base[1], base[2], base[3]])
+    relevance = np.array([0.9, 0.89, 0.8, 0.1])
+    assert maximal_marginal_relevance(relevance, vectors, 2, diversity=0.0) == [0, 1]
+    assert maximal_marginal_relevance(relevance, vectors, 2, diversity=0.5) == [0, 2]
+
+
+def test_mmr_handles_small_candidate_sets():
+    assert maximal_marginal_relevance(np.array([]), np.zeros((0, 4)), 5) == []
+    picked = maximal_marginal_relevance(np.array([0.3, 0.6]), np.eye(2) * 3, 5)
+    assert sorted(picked) == [0, 1]
@@ -0,0 +1,36 @@
+import threading
+import time
+
+from app.services.chat import cache as cache_module
+from app.services.chat.cache import ResponseCache
+
+
+def test_shared_cache_is_created_once_across_threads(monkeypatch):
+    created = []
+
+    class SlowCache(ResponseCache):
+        def __init__(self):
+            time.sleep(0.05)  # widen the window between the check and the assignment
+            created.append(self)
+            super().__init__(redis_url="")
+
+    monkeypatch.setattr(cache_module, "_cache", None)
+    monkeypatch.setattr(cache_module, "ResponseCache", SlowCache)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache_module.get_response_cache())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(created) == 1
+    assert all(r is created[0] for r in results)
+
+
+def test_redis_calls_time_out_and_fall_back_to_the_local_cache():
+    cache = ResponseCache(redis_url="redis://127.0.0.1:1/0")
+    kwargs = cache._redis.connection_pool.connection_kwargs
+    assert kwargs["socket_timeout"] == kwargs["socket_connect_timeout"] == cache_module.CHAT_CACHE_REDIS_TIMEOUT
+
+    cache.put("k", "v")  # the Redis write fails, the local entry stays
+    assert cache.get("k") == "v"
+    assert cache.get("missing") is None
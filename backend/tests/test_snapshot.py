@@ -0,0 +1,117 @@
+import json
+import os
+
+import numpy as np
+import pyarrow.parquet as pq
+import pytest
+
+from app.services.corpus.snapshot import load_snapshot, parse_embeddings, read_manifest, read_metadata, source_codes
+from tests.helpers import company_rows, make_table, unit_rows
+from tests.helpers import publish_snapshot as publish
+
+
+def test_snapshot_round_trips(snapshot_dir):
+    ids, embeddings = publish(snapshot_dir, 1, 30)
+
+    snapshot = load_snapshot(snapshot_dir)
+    assert isinstance(snapshot.embeddings, np.memmap)
+    assert np.array_equal(snapshot.ids, ids)
+    assert np.allclose(snapshot.embeddings, embeddings)
+    assert snapshot.rows()[0] == {
+        "id": 1,
+        "name": "Company 1",
+        "short_description": None,
+        "long_description": None,
+        "tags": None,
+        "source": "Devpost",
+        "url": None,
+        "metadata": {"batch": "W24"},
+    }
+
+
+def test_write_publishes_a_version_directory(snapshot_dir):
+    publish(snapshot_dir, 1, 30)
+
+    manifest = read_manifest(snapshot_dir)
+    assert manifest["data"] == "v1"
+    assert manifest["sources"] == ["Devpost", "YC"]
+    assert sorted(os.listdir(snapshot_dir)) == ["manifest.json", "v1"]
+    assert sorted(os.listdir(os.path.join(snapshot_dir, "v1"))) == [
+        "embeddings.npy",
+        "ids.npy",
+        "metadata.parquet",
+        "sources.npy",
+    ]
+
+
+
+def test_new_versions_swap_the_manifest_and_keep_the_previous_one(snapshot_dir):
+    publish(snapshot_dir, 1, 10)
+    publish(snapshot_dir, 2, 20)
+    publish(snapshot_dir, 3, 30)
+
+    assert read_manifest(snapshot_dir)["data"] == "v3"
+    # a reader that opened v2 just before the swap can still finish
+    assert sorted(os.listdir(snapshot_dir)) == ["manifest.json", "v2", "v3"]
+    assert len(load_snapshot(snapshot_dir)) == 30
+
+
+def test_republishing_the_current_version_is_rejected(snapshot_dir):
+    publish(snapshot_dir, 1, 10)
+    with pytest.raises(ValueError):
+        publish(snapshot_dir, 1, 12)
+    assert len(load_snapshot(snapshot_dir)) == 10
+
+
+def test_flat_layout_still_loads_and_is_pruned_two_versions_later(snapshot_dir):
+    os.makedirs(snapshot_dir)
+    ids = np.arange(1, 6, dtype=np.int64)
+    np.save(os.path.join(snapshot_dir, "ids.npy"), ids)
+    np.save(os.path.join(snapshot_dir, "embeddings.npy"), unit_rows(np.ones((5, 4))))
+    pq.write_table(make_table(company_rows(1, 5)), os.path.join(snapshot_dir, "metadata.parquet"))
+    with open(os.path.join(snapshot_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "rows": 5, "dim": 4}, f)
+
+    snapshot = load_snapshot(snapshot_dir)
+    assert np.array_equal(snapshot.ids, ids)
+    assert snapshot.sources is None
+    assert read_metadata(snapshot_dir, columns=["id"]).num_rows == 5
+
+    publish(snapshot_dir, 2, 6, dim=4)
+    assert os.path.exists(os.path.join(snapshot_dir, "ids.npy"))
+    publish(snapshot_dir, 3, 7, dim=4)
+    assert sorted(os.listdir(snapshot_dir)) == ["manifest.json", "v2", "v3"]
+
+
+def test_source_codes_index_sorted_names():
+    codes, names = source_codes(make_table(company_rows(1, 6)))
+    assert names == ["Devpost", "YC"]
+    assert codes.dtype == np.int16
+    assert codes.tolist() == [0, -1, 1, 0, -1, 1]
+
+
+def test_read_metadata_follows_the_manifest(snapshot_dir):
+    assert read_metadata(snapshot_dir) is None
+    publish(snapshot_dir, 1, 10)
+    publish(snapshot_dir, 2, 15)
+    table = read_metadata(snapshot_dir, columns=["id", "name"])
+    assert table.column_names == ["id", "name"]
+    assert table.num_rows == 15
+
+
+def test_parse_embeddings_checks_every_row_length():
+    # 12 values over 4 rows would reshape to (4, 3) if only the total were checked
+    values = ["[1,0,0]", "[0,1,0]", "[1,1]", "[0,0,1,1]"]
+    matrix, keep = parse_embeddings(values)
+    assert keep.tolist() == [True, True, False, False]
+    assert matrix.tolist() == [[1, 0, 0], [0, 1, 0]]
+
+
+def test_parse_embeddings_skips_malformed_and_missing_rows():
+    matrix, keep = parse_embeddings(["[0.5,0.25]", "[0.5,oops]", None, [1, 2]], dim=2)
+    assert keep.tolist() == [True, False, False, True]
+    assert matrix.dtype == np.float32
+    assert matrix.tolist() == [[0.5, 0.25], [1, 2]]
+
+    matrix, keep = parse_embeddings(["[0.5,0.25]", "[1,2]"], dim=3)
+    assert matrix.shape == (0, 3) and not keep.any()
@@ -0,0 +1,97 @@
+import threading
+from collections import Counter
+
+import pytest
+
+from app.services.search import suggest
+from app.services.search.suggest import SuggestIndex, record_query, replay_queries
+
+
+@pytest.fixture(autouse=True)
+def fresh_query_counts(monkeypatch):
+    monkeypatch.setattr(suggest, "_query_counts", Counter())
+    monkeypatch.setattr(suggest, "SUGGEST_MIN_QUERY_COUNT", 3)
+
+
+def _index() -> SuggestIndex:
+    index = SuggestIndex()
+    index.add_rows(
+        [
+            {"name": "Acme Robotics", "tags": ["Robotics", "AI"]},
+            {"name": "Robin", "tags": ["Fintech"]},
+            {"name": "Notewise AI", "tags": ["AI"]},
+        ]
+    )
+    return index
+
+
+def test_completes_any_word_of_a_name_and_tags():
+    index = _index()
+    assert [s["text"] for s in index.complete("rob")] == ["Robin", "Robotics", "Acme Robotics"]
+    assert [s["text"] for s in index.complete("ai")] == ["AI", "Notewise AI"]
+    assert index.complete("zz") == []
+    assert index.complete("   ") == []
+
+
+def test_more_frequent_entries_rank_first():
+    index = _index()
+    assert index.complete("ai")[0] == {"text": "AI", "kind": "tag", "count": 2}
+    index.add("Acme Robotics", "name", weight=5)
+    assert index.complete("rob")[0]["text"] == "Acme Robotics"
+
+
+def test_queries_are_suggested_only_after_repeated_searches():
+    index = _index()
+    record_query(index, "robot  lawnmower")
+    record_query(index, "robot lawnmower")
+    assert [s["text"] for s in index.complete("robot l")] == []
+
+    record_query(index, "robot lawnmower")
+    assert index.complete("robot l") == [
+        {"text": "robot lawnmower", "kind": "query", "count": 3 * suggest.QUERY_WEIGHT}
+    ]
+    record_query(index, "robot lawnmower")
+    assert index.complete("robot l")[0]["count"] == 4 * suggest.QUERY_WEIGHT
+
+
+def test_rebuilt_indexes_replay_only_frequent_queries():
+    for _ in range(3):
+        record_query(None, "climate api")
+    record_query(None, "my secret startup")
+
+    index = _index()
+    replay_queries(index)
+    assert [s["text"] for s in index.complete("climate")] == ["climate api"]
+    assert index.complete("my secret") == []
+
+
+def test_concurrent_adds_keep_keys_sorted():
+    index = _index()
+
+    def add(worker: int) -> None:
+        for i in range(200):
+            index.add(f"company {worker} {i}", "name")
+
+    threads = [threading.Thread(target=add, args=(w,)) for w in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert index.keys == sorted(index.keys)
+    assert len(index.keys) == len(index.entries)
+    assert index.complete("company 5 19")[0]["text"].startswith("company 5 19")
+
+
+def test_extended_index_adds_rows_and_keeps_queries():
+    index = _index()
+    for _ in range(3):
+        record_query(index, "robot lawnmower")
+    extended = index.extended([{"name": "Robo Fleet", "tags": ["Robotics", "Logistics"]}] * 40)
+
+    assert [s["text"] for s in extended.complete("robo")][:2] == ["Robotics", "Robo Fleet"]
+    assert extended.complete("robotics")[0]["count"] == 41
+    assert extended.complete("robot l") == index.complete("robot l")
+    assert extended.keys == sorted(extended.keys)
+    # the original is unchanged
+    assert index.complete("robotics")[0]["count"] == 1
+    assert index.complete("robo f") == index.complete("logis") == []
@@ -0,0 +1,59 @@
+import struct
+
+import numpy as np
+import pytest
+
+from app.services.db.vector_store import MemoryVectorStore, VectorStore, decode_vector, encode_vector
+from app.services.search.filters import MetadataFilters
+
+
+def test_pgvector_codec_round_trips():
+    vector = np.array([0.25, -1.5, 3.0], dtype=np.float32)
+    data = encode_vector(vector)
+    # binary format: uint16 dimensions, uint16 unused, big-endian float4 values
+    assert data[:4] == struct.pack(">HH", 3, 0)
+    assert data[4:] == struct.pack(">3f", 0.25, -1.5, 3.0)
+    decoded = decode_vector(data)
+    assert decoded.dtype == np.float32
+    assert np.array_equal(decoded, vector)
+    assert np.array_equal(decode_vector(encode_vector([1.0] * 1536)), np.ones(1536, dtype=np.float32))
+
+
+def _store() -> MemoryVectorStore:
+    rows = [
+        {"id": 1, "name": "Acme", "source": "YC", "metadata": {"batch": "W24"}},
+        {"id": 2, "name": "Gridsense", "source": "Devpost", "metadata": {"batch": "S24"}},
+        {"id": 3, "name": "Paperline", "source": "YC", "metadata": {"batch": "S24"}},
+    ]
+    embeddings = np.array([[1, 0, 0], [0.8, 0.6, 0], [0, 0, 2]], dtype=np.float32)
+    return MemoryVectorStore(rows, embeddings)
+
+
+def test_memory_store_ranks_by_cosine():
+    results = _store().match([1, 0.1, 0])
+    assert [r["id"] for r in results] == [1, 2, 3]
+    assert results[0]["similarity"] == pytest.approx(1 / np.sqrt(1.01))
+    assert results[2]["similarity"] == pytest.approx(0.0)
+
+
+def test_memory_store_filters_sources_and_metadata():
+    store = _store()
+    assert [r["id"] for r in store.match([1, 0, 0], sources=["YC"])] == [1, 3]
+    filters = MetadataFilters(batch=["S24"])
+    assert [r["id"] for r in store.match_filtered([1, 0, 0], None, filters)] == [2, 3]
+    assert [r["id"] for r in store.match_filtered([1, 0, 0], ["YC"], filters, count=1)] == [3]
+
+
+def test_memory_store_returns_normalized_embeddings_by_id():
+    found = _store().embeddings([3, 99])
+    assert list(found) == [3]
+    assert np.allclose(found[3], [0, 0, 1])
+
+
+def test_incomplete_backends_fail_when_created():
+    class MatchOnly(VectorStore):
+        def match(self, embedding, sources=None):
+            return []
+
+    with pytest.raises(TypeError):
+        MatchOnly()
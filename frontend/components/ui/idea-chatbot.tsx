@@ -31,6 +31,8 @@ export function IdeaChatbot({ open, onOpenChange }: IdeaChatbotProps) {
   ]);
   const [input, setInput] = useState("");
   const [loading, setLoading] = useState(false);
+  // issued by the backend on the first reply, keeps this chat's server-side session and summary
+  const [conversationId, setConversationId] = useState<string | null>(null);
   const messagesEndRef = useRef<HTMLDivElement>(null);
   const BACKEND_URL =
     process.env.NEXT_PUBLIC_BACKEND_URL || "http://localhost:8000";
@@ -108,8 +110,13 @@ export function IdeaChatbot({ open, onOpenChange }: IdeaChatbotProps) {
         messages: apiMessages,
         search_similar: shouldSearch && ideaQuery.length > 0,
         idea_query: ideaQuery,
+        conversation_id: conversationId,
       });
 
+      if (response.data.conversation_id) {
+        setConversationId(response.data.conversation_id);
+      }
+
       const assistantMessage: Message = {
         role: "assistant",
         content: response.data.message,